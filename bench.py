@@ -0,0 +1,377 @@
+"""
+Micro-benchmarks del simulador.
+
+Uso:
+    python bench.py            # ejecuta todos
+    python bench.py memoria    # solo uno (ver BENCHMARKS)
+"""
+import asyncio
+import contextlib
+import gc
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import timeit
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+
+from bintrace import BinaryTrace, convert_csv
+from detection import AdaptiveDetection
+from io_utils import iter_events, load_config, load_events
+from loadgen import DEFAULT_BATCH, reply_mix, run_load
+from lockmon import LockMonitor
+from models import Process, ResourceType, Event, SystemState
+from scenario_gen import ScenarioSpec, write_scenario
+from server import ResourceServer
+from sim import handle_request, handle_release, handle_compute, run_simulation
+from tracelog import TraceWriter
+
+
+# ───────────────────────────────────────────────
+# Memoria por objeto de modelo
+# ───────────────────────────────────────────────
+
+@dataclass
+class _ProcessDict:
+    """Equivalente al Process anterior (dataclass con __dict__) para comparar."""
+    pid: str
+    priority: int = 1
+    work_done: int = 0
+
+
+def _measure(factory, n):
+    gc.collect()
+    tracemalloc.start()
+    objs = [factory(i) for i in range(n)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Restamos la lista contenedora para quedarnos con el coste por objeto
+    return (size - sys.getsizeof(objs)) / n, objs
+
+
+def bench_memoria(n=100_000):
+    pids = [f"P{i}" for i in range(n)]
+
+    per_dict, keep1 = _measure(lambda i: _ProcessDict(pids[i], 1), n)
+    per_slot, keep2 = _measure(lambda i: Process(pids[i], 1), n)
+    del keep1, keep2
+
+    print(f"Memoria por Process ({n} procesos):")
+    print(f"  dataclass (__dict__): {per_dict:8.1f} bytes")
+    print(f"  __slots__:            {per_slot:8.1f} bytes")
+    print(f"  ahorro:               {per_dict - per_slot:8.1f} bytes/objeto "
+          f"({(per_dict - per_slot) * n / 1024 / 1024:.1f} MiB en total)")
+
+
+# ───────────────────────────────────────────────
+# Throughput de los manejadores de eventos
+# ───────────────────────────────────────────────
+
+def bench_manejadores(n=200_000):
+    state = SystemState(mode="deteccion", victim_policy="menor_trabajo_hecho")
+    for i in range(100):
+        state.processes[f"P{i}"] = Process(pid=f"P{i}")
+    for i in range(10):
+        state.resources[f"R{i}"] = ResourceType(rid=f"R{i}", total_instances=50, available_instances=50)
+
+    events = []
+    for i in range(n):
+        pid = f"P{i % 100}"
+        rid = f"R{i % 10}"
+        events.append(Event("REQUEST", pid, rid, 1))
+        events.append(Event("COMPUTE", pid, None, 1))
+        events.append(Event("RELEASE", pid, rid, 1))
+
+    handlers = {"REQUEST": handle_request, "RELEASE": handle_release, "COMPUTE": handle_compute}
+    sink = io.StringIO()
+    t0 = time.perf_counter()
+    with contextlib.redirect_stdout(sink):
+        for e in events:
+            handlers[e.type](state, e)
+            if sink.tell() > 1 << 20:
+                sink.seek(0)
+                sink.truncate()
+    dt = time.perf_counter() - t0
+    print(f"Manejadores: {len(events)} eventos en {dt:.3f}s "
+          f"({len(events) / dt:,.0f} eventos/s)")
+
+
+# ───────────────────────────────────────────────
+# Carga de eventos: lista completa vs. streaming
+# ───────────────────────────────────────────────
+
+def _write_trace(path, n, n_proc=100, n_res=10):
+    """Escribe una traza sintética de n eventos en formato events.csv."""
+    kinds = ("REQUEST", "COMPUTE", "RELEASE")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write("type,process,resource,amount_or_time\n")
+        for i in range(n):
+            kind = kinds[i % 3]
+            rid = "" if kind == "COMPUTE" else f"R{i % n_res}"
+            f.write(f"{kind},P{i % n_proc},{rid},1\n")
+
+
+def bench_carga(n=300_000):
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    os.close(fd)
+    try:
+        _write_trace(path, n)
+
+        for name, loader in (("load_events", load_events), ("iter_events", iter_events)):
+            gc.collect()
+            tracemalloc.start()
+            t0 = time.perf_counter()
+            first = None
+            count = 0
+            for _ in loader(path):
+                if first is None:
+                    first = time.perf_counter() - t0
+                count += 1
+            total = time.perf_counter() - t0
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{name:12s}: {count} eventos, primer evento {first * 1000:8.2f} ms, "
+                  f"total {total:.2f}s, pico {peak / 1024 / 1024:7.2f} MiB")
+    finally:
+        os.remove(path)
+
+
+# ───────────────────────────────────────────────
+# Traza binaria (.evb) vs. CSV
+# ───────────────────────────────────────────────
+
+def bench_binario(n=1_000_000):
+    tmpdir = tempfile.mkdtemp()
+    csv_path = os.path.join(tmpdir, "events.csv")
+    evb_path = os.path.join(tmpdir, "events.evb")
+    try:
+        _write_trace(csv_path, n)
+        convert_csv(csv_path, evb_path)
+        size = os.path.getsize(evb_path)
+
+        t0 = time.perf_counter()
+        count = sum(1 for _ in iter_events(csv_path))
+        t_csv = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with BinaryTrace(evb_path) as trace:
+            count_bin = sum(1 for _ in trace)
+        t_iter = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with BinaryTrace(evb_path) as trace:
+            cols = trace.columns()
+            checksum = sum(cols["amount"])
+            del cols
+        t_cols = time.perf_counter() - t0
+
+        print(f"CSV ({os.path.getsize(csv_path) / 1e6:.1f} MB): {count} eventos en {t_csv:.2f}s")
+        print(f"EVB ({size / 1e6:.1f} MB), iterando Event: {count_bin} eventos en {t_iter:.2f}s")
+        print(f"EVB por columnas: {t_cols:.3f}s ({size / 1e6 / max(t_cols, 1e-9):.0f} MB/s, suma={checksum})")
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+# ───────────────────────────────────────────────
+# Coste de exportar la traza estructurada
+# ───────────────────────────────────────────────
+
+def _contention_state(n_proc=100, n_res=10, instances=50):
+    state = SystemState(mode="deteccion", victim_policy="menor_trabajo_hecho",
+                        detection_interval=1000)
+    for i in range(n_proc):
+        state.processes[f"P{i}"] = Process(pid=f"P{i}")
+    for i in range(n_res):
+        state.resources[f"R{i}"] = ResourceType(rid=f"R{i}", total_instances=instances,
+                                                available_instances=instances)
+    return state
+
+
+def bench_traza(n=100_000):
+    tmpdir = tempfile.mkdtemp()
+    csv_path = os.path.join(tmpdir, "events.csv")
+    try:
+        _write_trace(csv_path, n)
+        events = load_events(csv_path)
+        with open(os.devnull, "w") as null:
+            for label, trace_path in (("sin traza", None),
+                                      ("JSONL", os.path.join(tmpdir, "t.jsonl")),
+                                      ("CSV", os.path.join(tmpdir, "t.csv"))):
+                state = _contention_state()
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(null):
+                    if trace_path:
+                        with TraceWriter(trace_path) as tracer:
+                            run_simulation(state, events, tracer)
+                    else:
+                        run_simulation(state, events)
+                dt = time.perf_counter() - t0
+                extra = f", {os.path.getsize(trace_path) / 1e6:.1f} MB" if trace_path else ""
+                print(f"Simulación {label:9s}: {n} eventos en {dt:.2f}s{extra}")
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+# ───────────────────────────────────────────────
+# Detección: intervalo fijo vs. adaptativo
+# ───────────────────────────────────────────────
+
+def bench_deteccion(n=50_000):
+    tmpdir = tempfile.mkdtemp()
+    try:
+        # Eventos al azar: los ciclos no se deshacen solos hasta que se detectan
+        config_path, events_path, _ = write_scenario(ScenarioSpec("aleatorio", 50, 10, n, seed=1), tmpdir)
+        events = load_events(events_path, load_config(config_path))
+        with open(os.devnull, "w") as null:
+            for label, interval, adaptive in (("fijo 1", 1, False), ("fijo 8", 8, False),
+                                              ("adaptativo", 1, True)):
+                state = load_config(config_path)
+                state.detection_interval = interval
+                if adaptive:
+                    state.detection_policy = AdaptiveDetection(interval)
+                history = state.entity_history
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(null):
+                    run_simulation(state, events, history)
+                dt = time.perf_counter() - t0
+                print(f"Detección {label:10s}: {n} eventos en {dt:.2f}s, "
+                      f"{history.count('DETECT')} interbloqueos")
+                if adaptive:
+                    for line in state.detection_policy.summary(state.tick)[1:]:
+                        print(line)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+# ───────────────────────────────────────────────
+# Costo del monitor de locks (camino sin contención)
+# ───────────────────────────────────────────────
+
+def bench_locks(n=500_000):
+    monitor = LockMonitor()
+    for label, native, monitored in (("Lock", threading.Lock(), monitor.Lock()),
+                                     ("RLock", threading.RLock(), monitor.RLock()),
+                                     ("Semaphore", threading.Semaphore(), monitor.Semaphore())):
+        times = []
+        for lock in (native, monitored):
+            def use(lock=lock):
+                with lock:
+                    pass
+            times.append(min(timeit.repeat(use, number=n, repeat=5)) / n * 1e9)
+        print(f"{label:10s} with: nativo {times[0]:6.0f} ns, monitoreado {times[1]:6.0f} ns "
+              f"(+{times[1] - times[0]:.0f} ns)")
+
+
+def bench_servidor(n=300_000, clients=50):
+    # Servidor y clientes en el mismo proceso y el mismo bucle: la cifra es
+    # una cota inferior de la del servidor solo (python server.py + loadgen.py)
+    state = _contention_state(n_proc=200, n_res=100, instances=2)
+
+    async def run():
+        server = ResourceServer(state, out=io.StringIO())
+        serving = asyncio.ensure_future(server.serve(port=0))
+        while server.address is None:
+            await asyncio.sleep(0.01)
+        host, port = server.address
+        workers, latency, elapsed = await run_load(
+            sorted(state.processes), sorted(state.resources), clients, n, DEFAULT_BATCH, 0, host, port)
+        server.stop()
+        await serving
+        return server, workers, latency, elapsed
+
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        server, workers, latency, elapsed = asyncio.run(run())
+    replies = sum((w.replies for w in workers), Counter())
+    blocked = len({pid for (pid, rid), units in state.requests.items() if units > 0})
+    print(f"servidor: {server.messages} mensajes de {clients} clientes en {elapsed:.2f} s "
+          f"({server.messages / elapsed:,.0f} msg/s): {reply_mix(replies, sum(w.aborts for w in workers))}")
+    print(f"  {server.deadlocks} interbloqueos resueltos, {blocked}/{len(state.processes)} procesos "
+          f"esperando al final; latencia por lote: {latency.summary()}")
+
+
+# ───────────────────────────────────────────────
+# Tiempo de importación (arranque)
+# ───────────────────────────────────────────────
+
+# Bibliotecas pesadas: la consola no debe cargarlas; la GUI carga PyQt5 al
+# importar y las de gráficos recién al mostrar la ventana (charts.py)
+HEAVY_MODULES = ("PyQt5", "matplotlib", "networkx", "numpy")
+
+# Módulo -> bibliotecas pesadas que se aceptan al importarlo
+STARTUP_MODULES = {
+    "main": (),
+    "follow": (),
+    "scenario_cache": (),
+    "tracelog": (),
+    "gui": ("PyQt5",),
+    "charts": HEAVY_MODULES,
+}
+
+
+def _import_time(module):
+    """
+    Importa `module` en un intérprete nuevo con -X importtime. Devuelve
+    (segundos, bibliotecas pesadas cargadas).
+    """
+    code = (f"import sys, {module}; "
+            f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            capture_output=True, text=True, check=True)
+    # Formato: "import time: propio | acumulado | módulo" (en microsegundos)
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].rstrip() == " " + module:
+            return int(parts[1]) / 1e6, result.stdout.split()
+    raise RuntimeError(f"no se encontró el tiempo de importación de {module}")
+
+
+def bench_arranque(repeat=5):
+    print(f"Importación en un intérprete nuevo (mediana de {repeat}):")
+    ok = True
+    for module, allowed in STARTUP_MODULES.items():
+        times = []
+        for _ in range(repeat):
+            seconds, heavy = _import_time(module)
+            times.append(seconds)
+        times.sort()
+        unexpected = [m for m in heavy if m not in allowed]
+        ok = ok and not unexpected
+        note = f"  ¡carga {', '.join(unexpected)}!" if unexpected else ""
+        print(f"  {module:15s} {times[len(times) // 2] * 1000:8.1f} ms  "
+              f"[{', '.join(heavy) or 'sin bibliotecas pesadas'}]{note}")
+    if not ok:
+        print("  Hay módulos que cargan bibliotecas que no deberían (ver STARTUP_MODULES)")
+
+
+BENCHMARKS = {
+    "memoria": bench_memoria,
+    "manejadores": bench_manejadores,
+    "carga": bench_carga,
+    "binario": bench_binario,
+    "traza": bench_traza,
+    "deteccion": bench_deteccion,
+    "locks": bench_locks,
+    "servidor": bench_servidor,
+    "arranque": bench_arranque,
+}
+
+
+def main(argv):
+    names = argv[1:] or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            print(f"Benchmark desconocido: {name}. Opciones: {', '.join(BENCHMARKS)}")
+            return 1
+        BENCHMARKS[name]()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
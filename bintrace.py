@@ -0,0 +1,340 @@
+"""
+Formato binario de trazas de eventos (.evb).
+
+Diseño del archivo (little-endian):
+
+    cabecera   : magic "EVTB", versión u16, reservado u16,
+                 n_pids u32, n_rids u32, n_records u64
+    tablas     : n_pids cadenas y luego n_rids cadenas,
+                 cada una como longitud u16 + bytes UTF-8
+    relleno    : hasta alinear a 16 bytes
+    registros  : n_records registros fijos de 16 bytes
+                 (type u8, 3 bytes de relleno, pid_idx u32, rid_idx u32, amount i32)
+
+El lector mapea el archivo con mmap y decodifica los registros sobre un
+memoryview, sin copiarlos; si NumPy está instalado, `columns()` devuelve
+vistas directas del archivo como arreglos. Las trazas comprimidas
+(.evb.gz, .evb.bz2, .evb.xz) no se pueden mapear: iter_bin_events las
+decodifica en streaming por bloques.
+
+Uso:
+    python bintrace.py events.csv events.evb
+"""
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from io_utils import EventFormatError, detect_compression, iter_events
+from models import Event
+
+
+MAGIC = b"EVTB"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHHIIQ")
+RECORD = struct.Struct("<B3xIIi")
+STRLEN = struct.Struct("<H")
+ALIGN = 16
+
+# Límites de los campos: longitud u16 de los identificadores, amount i32
+MAX_ID_BYTES = 0xFFFF
+
+NO_RESOURCE = 0xFFFFFFFF
+
+EVENT_TYPES = ("REQUEST", "RELEASE", "COMPUTE")
+TYPE_CODES = {name: code for code, name in enumerate(EVENT_TYPES)}
+
+# NumPy es opcional y solo lo usa BinaryTrace.columns(): se importa ahí,
+# así la simulación por consola (que lee .evb desde la caché) no lo carga
+_numpy = None
+_record_dtype = None
+
+
+def _load_numpy():
+    """(numpy, dtype de un registro) o (None, None) si NumPy no está instalado."""
+    global _numpy, _record_dtype
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            _numpy = False
+        else:
+            _numpy = numpy
+            _record_dtype = numpy.dtype([
+                ("type", "u1"), ("_pad", "V3"),
+                ("pid", "<u4"), ("rid", "<u4"), ("amount", "<i4"),
+            ])
+    return (_numpy, _record_dtype) if _numpy else (None, None)
+
+
+# ───────────────────────────────────────────────
+# Escritura / conversión desde CSV
+# ───────────────────────────────────────────────
+
+def write_trace(events, path: str) -> int:
+    """
+    Escribe un iterable de Event en formato .evb y devuelve el número de
+    registros. Los registros se acumulan en un archivo temporal mientras
+    se construyen las tablas de cadenas, así que la memoria no depende
+    del tamaño de la traza. Si `path` termina en .gz/.bz2/.xz/.lzma, la
+    salida se comprime.
+
+    Un identificador de más de MAX_ID_BYTES bytes o un amount fuera del
+    rango de 32 bits lanza EventFormatError con el índice del evento. La
+    salida se escribe en un temporal que se renombra a `path` solo al
+    terminar, así un error nunca deja un .evb truncado.
+    """
+    pid_index: Dict[str, int] = {}
+    rid_index: Dict[str, int] = {}
+    pack = RECORD.pack
+    count = 0
+
+    def fail(msg: str) -> None:
+        raise EventFormatError(path, [(count, msg)], unit="evento")
+
+    def new_id(table: Dict[str, int], name: str) -> int:
+        size = len(name.encode("utf-8"))
+        if size > MAX_ID_BYTES:
+            fail(f"identificador de {size} bytes (máximo {MAX_ID_BYTES}): {name[:40]!r}...")
+        index = table[name] = len(table)
+        return index
+
+    with tempfile.TemporaryFile() as body:
+        buf = bytearray()
+        for e in events:
+            code = TYPE_CODES.get(e.type)
+            if code is None:
+                raise ValueError(f"Tipo de evento desconocido: {e.type!r}")
+            pid_idx = pid_index.get(e.process_id)
+            if pid_idx is None:
+                pid_idx = new_id(pid_index, e.process_id)
+            if e.resource_id is None:
+                rid_idx = NO_RESOURCE
+            else:
+                rid_idx = rid_index.get(e.resource_id)
+                if rid_idx is None:
+                    rid_idx = new_id(rid_index, e.resource_id)
+            try:
+                buf += pack(code, pid_idx, rid_idx, e.amount_or_time)
+            except struct.error:
+                fail(f"amount fuera del rango de 32 bits: {e.amount_or_time!r}")
+            count += 1
+            if len(buf) >= 1 << 20:
+                body.write(buf)
+                buf.clear()
+        body.write(buf)
+
+        module = detect_compression(path, sniff=False)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+        os.close(fd)
+        try:
+            with (module.open(tmp_path, "wb") if module else open(tmp_path, "wb")) as out:
+                head = bytearray(HEADER.pack(MAGIC, VERSION, 0, len(pid_index), len(rid_index), count))
+                for table in (pid_index, rid_index):
+                    for name in table:  # los dict conservan el orden de inserción = índice
+                        raw = name.encode("utf-8")
+                        head += STRLEN.pack(len(raw))
+                        head += raw
+                head += b"\0" * (-len(head) % ALIGN)
+                out.write(head)
+                body.seek(0)
+                shutil.copyfileobj(body, out, 1 << 20)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    return count
+
+
+def convert_csv(csv_path: str, out_path: str) -> int:
+    """Convierte un events.csv (opcionalmente comprimido) al formato binario .evb."""
+    return write_trace(iter_events(csv_path), out_path)
+
+
+# ───────────────────────────────────────────────
+# Lectura con mmap
+# ───────────────────────────────────────────────
+
+# Máximo de registros distintos cuyo Event se reutiliza al decodificar
+DECODE_CACHE_SIZE = 1 << 16
+
+
+def _decode(records, pids: List[str], rids: List[str], memo: Dict[tuple, Event]) -> Iterator[Event]:
+    """
+    Convierte tuplas (type, pid_idx, rid_idx, amount) en Event. Los
+    registros idénticos comparten la misma instancia de Event (el motor
+    nunca modifica los eventos), lo que ahorra construirlos y memoria.
+    """
+    for rec in records:
+        event = memo.get(rec)
+        if event is None:
+            code, pid_idx, rid_idx, amount = rec
+            event = Event(
+                EVENT_TYPES[code],
+                pids[pid_idx],
+                None if rid_idx == NO_RESOURCE else rids[rid_idx],
+                amount,
+            )
+            if len(memo) < DECODE_CACHE_SIZE:
+                memo[rec] = event
+        yield event
+
+
+def _read_header(read, path: str) -> Tuple[List[str], List[str], int, int]:
+    """
+    Lee cabecera y tablas de cadenas usando `read(n)` (mmap o archivo).
+    Devuelve (pids, rids, n_records, offset del primer registro).
+    """
+    raw = read(HEADER.size)
+    if len(raw) < HEADER.size:
+        raise ValueError(f"{path}: cabecera incompleta")
+    magic, version, _, n_pids, n_rids, n_records = HEADER.unpack(raw)
+    if magic != MAGIC:
+        raise ValueError(f"{path}: no es una traza .evb")
+    if version != VERSION:
+        raise ValueError(f"{path}: versión de traza no soportada ({version})")
+
+    offset = HEADER.size
+    tables: List[List[str]] = []
+    for n in (n_pids, n_rids):
+        names = []
+        for _ in range(n):
+            raw = read(STRLEN.size)
+            if len(raw) < STRLEN.size:
+                raise ValueError(f"{path}: tabla de cadenas truncada")
+            (length,) = STRLEN.unpack(raw)
+            names.append(sys.intern(read(length).decode("utf-8")))
+            offset += STRLEN.size + length
+        tables.append(names)
+
+    padding = -offset % ALIGN
+    read(padding)
+    return tables[0], tables[1], n_records, offset + padding
+
+
+class BinaryTrace:
+    """
+    Traza .evb abierta con mmap. Se puede iterar (produce Event) o leer
+    por columnas con `columns()`. Usar como context manager o llamar a
+    close() al terminar.
+    """
+
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # archivo vacío
+            self._file.close()
+            raise ValueError(f"{path}: archivo de traza vacío")
+        self._view = memoryview(self._mm)
+
+        try:
+            self.pids, self.rids, n_records, offset = _read_header(self._mm.read, path)
+        except ValueError:
+            self.close()
+            raise
+        end = offset + n_records * RECORD.size
+        if end > len(self._mm):
+            self.close()
+            raise ValueError(f"{path}: traza truncada")
+        self._records = self._view[offset:end]
+        self._offset = offset
+        self.n_records = n_records
+
+    def __len__(self) -> int:
+        return self.n_records
+
+    def __iter__(self) -> Iterator[Event]:
+        return _decode(RECORD.iter_unpack(self._records), self.pids, self.rids, {})
+
+    def columns(self):
+        """
+        Devuelve un dict con las columnas type, pid, rid y amount (índices
+        en las tablas `pids`/`rids`). Con NumPy son vistas sin copia sobre
+        el mmap; sin NumPy, listas decodificadas.
+        """
+        np, record_dtype = _load_numpy()
+        if np is not None:
+            rec = np.frombuffer(self._mm, dtype=record_dtype,
+                                count=self.n_records, offset=self._offset)
+            return {name: rec[name] for name in ("type", "pid", "rid", "amount")}
+        cols = list(zip(*RECORD.iter_unpack(self._records))) or [(), (), (), ()]
+        return {name: list(col) for name, col in zip(("type", "pid", "rid", "amount"), cols)}
+
+    def close(self) -> None:
+        # Los memoryview deben liberarse antes de cerrar el mmap. Si todavía
+        # hay un iterador o arreglo NumPy vivo sobre el buffer, el mmap se
+        # libera cuando ese objeto se recolecta.
+        for name in ("_records", "_view", "_mm"):
+            obj = getattr(self, name, None)
+            if obj is None:
+                continue
+            try:
+                if isinstance(obj, memoryview):
+                    obj.release()
+                else:
+                    obj.close()
+            except BufferError:
+                pass
+            setattr(self, name, None)
+        self._file.close()
+
+    def __enter__(self) -> "BinaryTrace":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _iter_compressed(path: str, module) -> Iterator[Event]:
+    """Decodifica una traza .evb comprimida en streaming, por bloques."""
+    with module.open(path, "rb") as f:
+        pids, rids, n_records, _ = _read_header(f.read, path)
+        memo: Dict[tuple, Event] = {}
+        block = RECORD.size * 65536
+        remaining = n_records * RECORD.size
+        while remaining > 0:
+            data = f.read(min(block, remaining))
+            if not data or len(data) % RECORD.size:
+                raise ValueError(f"{path}: traza truncada")
+            remaining -= len(data)
+            yield from _decode(RECORD.iter_unpack(data), pids, rids, memo)
+
+
+def iter_bin_events(path: str) -> Iterator[Event]:
+    """Equivalente a io_utils.iter_events para trazas .evb (mapeadas o comprimidas)."""
+    module = detect_compression(path, sniff=True)
+    if module is not None:
+        yield from _iter_compressed(path, module)
+        return
+    with BinaryTrace(path) as trace:
+        yield from trace
+
+
+def is_binary_trace(path: str) -> bool:
+    """Indica si `path` empieza con la firma del formato .evb (también comprimido)."""
+    try:
+        module = detect_compression(path, sniff=True)
+        with (module.open(path, "rb") if module else open(path, "rb")) as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except (OSError, EOFError, ValueError):
+        return False
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Uso: python bintrace.py events.csv events.evb")
+        return 1
+    n = convert_csv(argv[0], argv[1])
+    print(f"{n} eventos convertidos a {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
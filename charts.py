@@ -0,0 +1,510 @@
+"""
+Widgets de Matplotlib de la GUI (gráficos de estados y de uso de
+recursos, y grafo de espera animado).
+
+Importar este módulo carga Matplotlib con el backend Qt5Agg, NumPy y
+NetworkX (por graph_view), que son la mayor parte del tiempo de
+arranque. gui.py lo importa recién cuando la ventana ya está en
+pantalla (DeadlockGUI.init_charts), así la interfaz aparece enseguida.
+"""
+import math
+
+import matplotlib
+matplotlib.use('Qt5Agg')
+
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+from matplotlib.patches import Shadow
+from matplotlib.ticker import MaxNLocator
+from matplotlib.transforms import Bbox
+import numpy as np
+
+from PyQt5.QtCore import QTimer
+
+from deadlock import build_wait_for_graph, strongly_connected_components
+from graph_view import (LOD_THRESHOLD, GraphLayout, GridIndex, condensed_view, full_view,
+                        neighbourhood_view)
+from render import apply_phase, draw_view, node_radius_px, update_edge_geometry
+
+
+def chart_canvas(figsize=(6, 4)):
+    """Lienzo Qt con una figura vacía, para los gráficos de la barra superior."""
+    return FigureCanvas(Figure(figsize=figsize))
+
+
+class ChartBlitter:
+    """
+    Blitting para los gráficos de la barra superior: los artistas que
+    cambian se marcan como animados y se repintan sobre el fondo guardado
+    en el último dibujado completo (ejes, títulos, leyendas).
+    """
+
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self.artists = []
+        self.background = None
+        self.size = None
+        canvas.mpl_connect('draw_event', self._on_draw)
+
+    def set_artists(self, artists):
+        for artist in artists:
+            artist.set_animated(True)
+        self.artists = list(artists)
+        self.background = None
+
+    def _on_draw(self, event):
+        figure = self.canvas.figure
+        self.background = self.canvas.copy_from_bbox(figure.bbox)
+        self.size = figure.bbox.size.tolist()
+        for artist in self.artists:
+            figure.draw_artist(artist)
+
+    def _stale(self):
+        # Sin fondo, o el lienzo cambió de tamaño y todavía no se redibujó
+        return self.background is None or self.size != self.canvas.figure.bbox.size.tolist()
+
+    def refresh(self, full=False):
+        """Repinta solo los artistas animados; con full=True (o sin fondo) todo."""
+        if full or self._stale():
+            self.canvas.draw_idle()
+            return
+        figure = self.canvas.figure
+        self.canvas.restore_region(self.background)
+        for artist in self.artists:
+            figure.draw_artist(artist)
+        self.canvas.blit(figure.bbox)
+
+    def refresh_regions(self, regions):
+        """
+        Repinta solo algunas zonas: `regions` es una lista de (bbox en
+        pantalla, artistas que caen dentro). El resto del gráfico queda
+        como estaba.
+        """
+        if self._stale():
+            self.canvas.draw_idle()
+            return
+        figure = self.canvas.figure
+        height = figure.bbox.height
+        for bbox, artists in regions:
+            # restore_region usa coordenadas con origen arriba; xy es el
+            # origen del fondo guardado (toda la figura), no el de la zona
+            x0, y0, x1, y1 = bbox.extents
+            self.canvas.restore_region(self.background, bbox=(x0, height - y1, x1, height - y0),
+                                       xy=(0, 0))
+            for artist in artists:
+                figure.draw_artist(artist)
+            self.canvas.blit(bbox)
+
+
+# Barras máximas en el gráfico de uso; con más recursos se agrupan en "Otros"
+USAGE_CHART_MAX_BARS = 20
+
+
+def usage_chart_data(resources, shown=(), max_bars=USAGE_CHART_MAX_BARS):
+    """
+    (nombres, en uso, disponibles) para el gráfico de uso. Si hay más de
+    `max_bars` recursos, se toman los max_bars - 1 más usados (en el orden
+    de la configuración) y el resto se suma en una barra "Otros (n)". A
+    igual uso se prefieren los que ya estaban en `shown`, para que las
+    barras no cambien de recurso (y de etiqueta) a cada paso.
+    """
+    names = list(resources)
+    used = [r.total_instances - r.available_instances for r in resources.values()]
+    avail = [r.available_instances for r in resources.values()]
+    if len(names) <= max_bars:
+        return tuple(names), tuple(used), tuple(avail)
+    shown = set(shown)
+    keep = sorted(range(len(names)), key=lambda i: (-used[i], names[i] not in shown))[:max_bars - 1]
+    keep.sort()
+    kept = set(keep)
+    rest = [i for i in range(len(names)) if i not in kept]
+    return (
+        tuple(names[i] for i in keep) + (f"Otros ({len(rest)})",),
+        tuple(used[i] for i in keep) + (sum(used[i] for i in rest),),
+        tuple(avail[i] for i in keep) + (sum(avail[i] for i in rest),),
+    )
+
+
+def _show_placeholder(canvas, title):
+    fig = canvas.figure
+    fig.clear()
+    ax = fig.add_subplot(111)
+    ax.text(0.5, 0.5, 'Cargue la configuración\npara ver los datos',
+            ha='center', va='center', transform=ax.transAxes, fontsize=12)
+    ax.set_title(title)
+    canvas.draw_idle()
+
+
+class StatesChart:
+    """
+    Torta de estados de los procesos (activos, bloqueados, abortados). Se
+    crea una vez y después solo se mueven sus sectores y textos; si los
+    conteos no cambiaron no se redibuja.
+    """
+
+    def __init__(self):
+        self.canvas = chart_canvas()
+        self.blitter = ChartBlitter(self.canvas)
+        self.chart = None
+
+    def update(self, state):
+        if not state:
+            self.chart = None
+            self.blitter.set_artists([])
+            _show_placeholder(self.canvas, 'Distribución de Estados de Procesos')
+            return
+
+        # Calcular conteos de estados
+        aborted = len(state.aborted_processes)
+        blocked = len(state.waiting_processes())
+        active = len(state.processes) - blocked - aborted
+        sizes = (active, blocked, aborted)
+        if self.chart is not None and self.chart["sizes"] == sizes:
+            return
+
+        if self.chart is None:
+            # Crear gráfico (una sola vez)
+            fig = self.canvas.figure
+            fig.clear()
+            ax = fig.add_subplot(111)
+            labels = ['Activos', 'Bloqueados', 'Abortados']
+            colors = ['#28a745', '#ffc107', '#dc3545']
+            wedges, texts, autotexts = ax.pie([1, 1, 1], labels=labels, colors=colors, autopct='%1.1f%%',
+                                            startangle=90, shadow=True)
+            for autotext in autotexts:
+                autotext.set_color('white')
+                autotext.set_fontweight('bold')
+            empty = ax.text(0.5, 0.5, 'No hay procesos', ha='center', va='center', transform=ax.transAxes)
+            ax.set_title('Distribución de Estados de Procesos', fontweight='bold')
+            shadows = [p for p in ax.patches if isinstance(p, Shadow)]
+            self.chart = {"wedges": wedges, "texts": texts, "autotexts": autotexts,
+                          "empty": empty, "sizes": None, "new": True}
+            self.blitter.set_artists(shadows + list(wedges) + list(texts) + list(autotexts) + [empty])
+
+        chart = self.chart
+        chart["sizes"] = sizes
+        total = sum(sizes)
+        chart["empty"].set_visible(total == 0)
+        angle = 90.0
+        for wedge, label, pct, size in zip(chart["wedges"], chart["texts"], chart["autotexts"], sizes):
+            visible = total > 0 and size > 0
+            for artist in (wedge, label, pct):
+                artist.set_visible(visible)
+            if not visible:
+                continue
+            # Misma geometría que ax.pie: sentido antihorario desde las 12
+            span = 360.0 * size / total
+            wedge.set_theta1(angle)
+            wedge.set_theta2(angle + span)
+            mid = math.radians(angle + span / 2)
+            x, y = math.cos(mid), math.sin(mid)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment('left' if x > 0 else 'right')
+            pct.set_position((0.6 * x, 0.6 * y))
+            pct.set_text(f'{100.0 * size / total:1.1f}%')
+            angle += span
+        self.blitter.refresh(full=chart.pop("new", False))
+
+
+class UsageChart:
+    """
+    Barras de uso de los recursos. Las barras y sus textos se reutilizan
+    mientras no cambie la cantidad de barras; con más de
+    USAGE_CHART_MAX_BARS recursos se muestran los más usados y el resto
+    se agrupa en una barra "Otros".
+    """
+
+    def __init__(self):
+        self.canvas = chart_canvas()
+        self.blitter = ChartBlitter(self.canvas)
+        self.chart = None
+
+    def update(self, state):
+        if not state or not state.resources:
+            self.chart = None
+            self.blitter.set_artists([])
+            _show_placeholder(self.canvas, 'Uso de Recursos del Sistema')
+            return
+
+        # Preparar datos
+        chart = self.chart
+        resources, used_instances, available_instances = usage_chart_data(
+            state.resources, chart["labels"] if chart else ())
+        data = (resources, used_instances, available_instances)
+        if chart is not None and chart["data"] == data:
+            return
+
+        n = len(resources)
+        if chart is None or chart["n"] != n:
+            fig = self.canvas.figure
+            fig.clear()
+            ax = fig.add_subplot(111)
+            x = range(n)
+
+            # Barras
+            bars_used = ax.bar(x, [0] * n, label='En Uso', color='#dc3545', alpha=0.8)
+            bars_avail = ax.bar(x, [0] * n, label='Disponibles', color='#28a745', alpha=0.8)
+
+            # Personalización
+            ax.set_xlabel('Recursos')
+            ax.set_ylabel('Instancias')
+            # Las instancias son enteras (y las marcas angostas no empujan la etiqueta)
+            ax.yaxis.set_major_locator(MaxNLocator(integer=True))
+            ax.set_title('Uso de Recursos del Sistema', fontweight='bold')
+            ax.set_xticks(x)
+            # Leyenda fija arriba (con 'best' se movería en cada dibujado
+            # completo y las barras repintadas quedarían encima)
+            ax.legend(loc='upper center', ncol=2)
+
+            # Textos con los valores en las barras
+            text_style = dict(ha='center', va='center', fontweight='bold', color='white')
+            used_texts = [ax.text(i, 0, '', **text_style) for i in x]
+            avail_texts = [ax.text(i, 0, '', **text_style) for i in x]
+            chart = self.chart = {"n": n, "ax": ax, "used": bars_used, "avail": bars_avail,
+                                  "used_texts": used_texts, "avail_texts": avail_texts,
+                                  "labels": None, "top": None, "data": None}
+            self.blitter.set_artists(list(bars_used) + list(bars_avail) + used_texts + avail_texts)
+
+        previous = chart["data"]
+        chart["data"] = data
+        ax = chart["ax"]
+        # Cambios de ejes (nombres de barras o escala) requieren un dibujado completo
+        full = previous is None
+        if chart["labels"] != resources:
+            chart["labels"] = resources
+            ax.set_xticklabels(resources)
+            full = True
+        for i, (used, avail) in enumerate(zip(used_instances, available_instances)):
+            chart["used"][i].set_height(used)
+            chart["avail"][i].set_y(used)
+            chart["avail"][i].set_height(avail)
+            text = chart["used_texts"][i]
+            text.set_visible(used > 0)
+            text.set_position((i, used / 2))
+            text.set_text(str(used))
+            text = chart["avail_texts"][i]
+            text.set_visible(avail > 0)
+            text.set_position((i, used + avail / 2))
+            text.set_text(str(avail))
+        top = max((u + a for u, a in zip(used_instances, available_instances)), default=0)
+        if chart["top"] != top:
+            chart["top"] = top
+            # Margen arriba para la leyenda
+            ax.set_ylim(0, top * 1.25 if top else 1)
+            full = True
+        if full:
+            self.blitter.refresh(full=True)
+            return
+
+        # Normalmente un evento cambia una o dos barras: solo se repintan esas columnas
+        changed = [i for i in range(n)
+                   if (previous[1][i], previous[2][i]) != (used_instances[i], available_instances[i])]
+        if len(changed) > n // 2:
+            self.blitter.refresh()
+            return
+        to_screen = ax.transData.transform
+        y0, y1 = ax.bbox.y0, ax.bbox.y1
+        regions = []
+        for i in changed:
+            x0 = to_screen((i - 0.5, 0))[0]
+            x1 = to_screen((i + 0.5, 0))[0]
+            regions.append((Bbox.from_extents(x0, y0, x1, y1),
+                            [chart["used"][i], chart["avail"][i],
+                             chart["used_texts"][i], chart["avail_texts"][i]]))
+        self.blitter.refresh_regions(regions)
+
+
+class AnimatedGraph(FigureCanvas):
+    """
+    Canvas del grafo de espera. Los artistas (nodos, aristas, flechas y
+    etiquetas) se crean una sola vez por estructura del grafo; cada
+    cuadro de la animación solo cambia tamaños y transparencias y se
+    pinta con blitting sobre un fondo guardado. Los nodos que no pulsan
+    (activos y abortados) quedan en el fondo, así el costo de un cuadro
+    depende solo de las aristas y de los procesos bloqueados.
+
+    Con más de LOD_THRESHOLD procesos se dibuja la vista general
+    (componentes con ciclo y grupos por estado) o, tras un clic en un
+    grupo, el detalle de sus procesos y vecinos: el dibujo tiene una
+    cantidad acotada de nodos aunque haya miles de procesos.
+
+    El estilo del dibujo está en render.py, compartido con el
+    renderizado por lotes sin ventana.
+    """
+
+    def __init__(self, parent=None):
+        self.fig = Figure(figsize=(8, 6))
+        super().__init__(self.fig)
+        self.setParent(parent)
+        
+        self.ax = self.fig.add_subplot(111)
+        self.animation_timer = QTimer()
+        self.animation_timer.timeout.connect(self.update_animation)
+        self.animation_phase = 0
+        self.current_state = None
+        # Posiciones de los nodos, compartidas con la selección por clic.
+        # Los grafos grandes usan otro layout (sus nodos son grupos) y
+        # `focus` son los procesos del grupo abierto, o None
+        self.graph_layout = GraphLayout()
+        self.lod_layout = GraphLayout()
+        self.focus = None
+        self._layout = self.graph_layout
+        self._view = None
+
+        # Artistas persistentes y datos de la estructura dibujada
+        self._structure = None
+        self._artists = None  # render.GraphArtists de la estructura dibujada
+        self._background = None
+        # Índice de nodos en píxeles; se invalida cuando cambia la vista
+        self._hit_index = None
+        self.mpl_connect('draw_event', self._on_draw)
+        
+    def update_animation(self):
+        """Avanza la animación un cuadro (sin reconstruir el grafo)"""
+        self.animation_phase += 0.1
+        self._blit_frame()
+        
+    def start_animation(self):
+        """Inicia la animación"""
+        self.animation_timer.start(100)  # 10 FPS
+        
+    def stop_animation(self):
+        """Detiene la animación"""
+        self.animation_timer.stop()
+
+    def reset_view(self):
+        """Olvida posiciones y grupo abierto (al cargar otra configuración)."""
+        self.graph_layout.clear()
+        self.lod_layout.clear()
+        self.focus = None
+
+    def view_node(self, name):
+        """ViewNode dibujado con ese nombre, o None."""
+        if self._view is None or name is None:
+            return None
+        return next((node for node in self._view.nodes if node.name == name), None)
+
+    def drill_down(self, name):
+        """
+        Clic en un grafo grande: un grupo se abre y un clic en el fondo
+        vuelve a la vista general. Devuelve True si cambió la vista (en
+        ese caso hay que volver a llamar a draw_graph).
+        """
+        node = self.view_node(name)
+        if node is not None and node.is_group:
+            self.focus = node.members
+        elif name is None and self.focus is not None:
+            self.focus = None
+        else:
+            return False
+        self.lod_layout.clear()
+        return True
+
+    def node_radius_px(self):
+        """Radio en píxeles de un nodo sin pulso."""
+        return node_radius_px(self.fig.dpi)
+
+    def node_at(self, x, y):
+        """
+        Proceso dibujado en el punto (x, y) de la pantalla (coordenadas de
+        evento de Matplotlib), o None. El umbral es el radio del nodo en
+        pantalla, así que acompaña al zoom y al tamaño de la ventana.
+        """
+        positions = self._layout.positions
+        if self._structure is None or not positions:
+            return None
+        if self._hit_index is None:
+            names = list(positions)
+            pixels = self.ax.transData.transform(np.array([positions[n] for n in names], dtype=float))
+            self._hit_index = GridIndex(
+                {name: (float(px), float(py)) for name, (px, py) in zip(names, pixels)},
+                self.node_radius_px(),
+            )
+        return self._hit_index.nearest(x, y)
+
+    def _apply_phase(self):
+        """Aplica la fase actual: pulso de los bloqueados y flujo de las aristas."""
+        apply_phase(self._artists, abs(self.animation_phase % 1 - 0.5))
+
+    def _on_draw(self, event):
+        """Tras un dibujado completo (carga, cambio de tamaño) guarda el fondo."""
+        self._hit_index = None
+        if self._artists is None:
+            self._background = None
+            return
+        # La geometría de las aristas depende de la transformación de pantalla
+        update_edge_geometry(self._artists, self._layout.positions, self.ax.transData,
+                             self.node_radius_px())
+        self._background = self.copy_from_bbox(self.ax.bbox)
+        self._apply_phase()
+        for artist in self._artists.animated():
+            self.ax.draw_artist(artist)
+
+    def _blit_frame(self):
+        if self._background is None or self._artists is None:
+            return
+        self.restore_region(self._background)
+        self._apply_phase()
+        for artist in self._artists.animated():
+            self.ax.draw_artist(artist)
+        self.blit(self.ax.bbox)
+
+    def _show_message(self, text, title=None):
+        self.ax.clear()
+        self._structure = None
+        self._view = None
+        self._artists = None
+        self.ax.text(0.5, 0.5, text, ha='center', va='center',
+                     transform=self.ax.transAxes, fontsize=12)
+        if title:
+            self.ax.set_title(title)
+        self.ax.axis("off")
+        self.draw()
+        
+    def draw_graph(self, state=None):
+        """
+        Dibuja el grafo del estado. Si la estructura (nodos, aristas y
+        estado de cada nodo) no cambió, no se rehace nada.
+        """
+        if not state:
+            self.current_state = None
+            self._show_message('Cargue la configuración\npara ver el grafo', 'Grafo de Espera')
+            return
+            
+        graph = build_wait_for_graph(state, verbose=False)
+        self.current_state = state
+        if not graph:
+            self._show_message('No hay procesos en el sistema')
+            return
+
+        blocked = state.blocked_processes
+        aborted = state.aborted_processes
+        if len(graph) <= LOD_THRESHOLD:
+            self.focus = None
+            view = full_view(graph, blocked, aborted)
+            layout = self.graph_layout
+        else:
+            if self.focus is None:
+                view = condensed_view(graph, blocked, aborted, strongly_connected_components(graph))
+            else:
+                view = neighbourhood_view(graph, self.focus, blocked, aborted)
+            layout = self.lod_layout
+        nodes = [node.name for node in view.nodes]
+        view_edges = {}
+        for a, b in view.edges:
+            view_edges.setdefault(a, []).append(b)
+        pos = layout.update(nodes, view_edges)
+        structure = (id(layout), layout.version, tuple(view.edges),
+                     tuple((node.name, node.label, node.status) for node in view.nodes), view.note)
+        if structure == self._structure:
+            return
+        self._structure = structure
+        self._layout = layout
+        self._view = view
+        self._hit_index = None
+        
+        # Los bloqueados y las aristas se dibujan en cada cuadro (pulso); el resto, en el fondo
+        self._artists = draw_view(self.ax, view, pos, animated=True)
+        
+        # El dibujado completo dispara _on_draw, que guarda el fondo y pinta los artistas
+        self.draw()
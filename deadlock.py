@@ -1,23 +1,31 @@
 from models import SystemState
 
-def build_wait_for_graph(state: SystemState):
+def build_wait_for_graph(state: SystemState, verbose: bool = True):
     """
     Construye el grafo de espera (Wait-For Graph):
     Si un proceso tiene una solicitud pendiente de un recurso
     que está asignado a otro proceso, se crea una arista.
+    Con verbose=False no imprime el grafo (uso desde la GUI).
     """
     graph = {pid: [] for pid in state.processes.keys()}
 
+    # Procesos que poseen cada recurso (en el orden de la matriz de
+    # asignación), así cada solicitud no recorre la matriz entera
+    holders = {}
+    for (other_pid, other_rid), alloc_units in state.allocation.items():
+        if alloc_units > 0:
+            holders.setdefault(other_rid, []).append(other_pid)
+
     # Recorremos todas las solicitudes pendientes
     for (pid, rid), req_units in state.requests.items():
         if req_units > 0:
-            # Buscar TODOS los procesos que poseen ese recurso
-            for (other_pid, other_rid), alloc_units in state.allocation.items():
-                if other_rid == rid and alloc_units > 0 and other_pid != pid:
-                    if other_pid not in graph[pid]:
-                        graph[pid].append(other_pid)
+            # TODOS los procesos que poseen ese recurso
+            for other_pid in holders.get(rid, ()):
+                if other_pid != pid and other_pid not in graph[pid]:
+                    graph[pid].append(other_pid)
 
-    print(f"[DEBUG] Wait-for graph construido: {graph}")
+    if verbose:
+        print(f"[DEBUG] Wait-for graph construido: {graph}")
     return graph
 
 
@@ -51,6 +59,59 @@ def detect_cycle(graph):
     return None
 
 
+def strongly_connected_components(graph):
+    """
+    Componentes fuertemente conexas del grafo de espera (algoritmo de
+    Tarjan, sin recursión para no chocar con el límite de Python en
+    grafos grandes). Cada componente con más de un proceso contiene un
+    interbloqueo. Devuelve una lista de listas de procesos.
+    """
+    index = {}
+    low = {}
+    stack = []
+    on_stack = set()
+    components = []
+    counter = 0
+
+    for root in graph:
+        if root in index:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(graph.get(root, ())))]
+        while work:
+            node, neighbors = work[-1]
+            for neighbor in neighbors:
+                if neighbor not in index:
+                    index[neighbor] = low[neighbor] = counter
+                    counter += 1
+                    stack.append(neighbor)
+                    on_stack.add(neighbor)
+                    work.append((neighbor, iter(graph.get(neighbor, ()))))
+                    break
+                if neighbor in on_stack and index[neighbor] < low[node]:
+                    low[node] = index[neighbor]
+            else:
+                # Se terminaron los vecinos de node
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    if low[node] < low[parent]:
+                        low[parent] = low[node]
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(component)
+    return components
+
+
 def select_victim(state: SystemState, cycle):
     """Selecciona la víctima según la política configurada."""
     if not cycle:
@@ -68,9 +129,12 @@ def select_victim(state: SystemState, cycle):
 
 
 def resolve_deadlock(state: SystemState, victim):
-    """Libera todos los recursos del proceso víctima y lo marca como abortado."""
+    """
+    Libera todos los recursos del proceso víctima y lo marca como abortado.
+    Devuelve la lista de (recurso, unidades) liberados.
+    """
     if victim not in state.processes:
-        return
+        return []
 
     print(f" Interbloqueo detectado. Se abortará {victim}.\n")
 
@@ -85,8 +149,7 @@ def resolve_deadlock(state: SystemState, victim):
         if pid == victim:
             state.requests.pop((pid, rid))
 
-    if not hasattr(state, "aborted_processes"):
-        state.aborted_processes = set()
     state.aborted_processes.add(victim)
 
     print(f"⚰ {victim} liberó recursos: {to_release}\n")
+    return to_release
@@ -0,0 +1,275 @@
+"""
+Registro de la simulación como registros con índices, independiente de Qt.
+
+Cada línea que escribe el motor se guarda junto con:
+
+    kinds     banderas de tipo (REQUEST, RELEASE, COMPUTE, DEADLOCK, ABORT),
+              con el mismo criterio que el filtro de la GUI
+    entities  ids de procesos y recursos que aparecen en la línea
+
+LogStore mantiene un índice por tipo y otro por entidad (posiciones de
+las líneas), así filtrar por tipo o por un id no recorre todo el
+registro. La búsqueda de texto libre sí recorre las líneas candidatas,
+pero si el texto nuevo extiende al anterior (el usuario sigue
+escribiendo) solo revisa el resultado previo.
+
+La clasificación (LineClassifier) se puede hacer en el hilo de la
+simulación; la GUI solo agrega los resultados al almacén.
+
+En memoria solo quedan las últimas `capacity` líneas (una ventana que
+avanza); el registro completo se va escribiendo en un archivo temporal
+y se puede guardar con save(). Las posiciones son absolutas (la línea
+n del registro completo), así que siguen valiendo cuando la ventana
+avanza. Memoria y costo por línea no dependen del largo de la corrida.
+"""
+import os
+import re
+import shutil
+import tempfile
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from io_utils import open_output
+
+
+KINDS = ("REQUEST", "RELEASE", "COMPUTE", "DEADLOCK", "ABORT")
+KIND_FLAGS = {kind: 1 << i for i, kind in enumerate(KINDS)}
+
+# Máximo de líneas distintas cuya clasificación se recuerda
+CLASSIFY_CACHE_SIZE = 1 << 16
+
+# Líneas que se conservan en memoria (el resto queda solo en disco)
+DEFAULT_CAPACITY = 200_000
+
+_TOKEN = re.compile(r"\w+")
+
+Classified = Tuple[int, Tuple[str, ...]]
+
+
+class LineClassifier:
+    """
+    Calcula (kinds, entities) de cada línea. El registro repite mucho las
+    mismas líneas (estado de los recursos, separadores), así que el
+    resultado se memoriza por texto.
+    """
+
+    def __init__(self, known_ids: Iterable[str] = ()):
+        self.known_ids = frozenset(known_ids)
+        self._memo: Dict[str, Classified] = {}
+
+    def classify_line(self, line: str) -> Classified:
+        hit = self._memo.get(line)
+        if hit is not None:
+            return hit
+        flags = 0
+        if "REQUEST" in line:
+            flags |= KIND_FLAGS["REQUEST"]
+        if "RELEASE" in line:
+            flags |= KIND_FLAGS["RELEASE"]
+        if "COMPUTE" in line:
+            flags |= KIND_FLAGS["COMPUTE"]
+        lower = line.lower()
+        if "interbloqueo" in lower:
+            flags |= KIND_FLAGS["DEADLOCK"]
+        if "abort" in lower:
+            flags |= KIND_FLAGS["ABORT"]
+        known = self.known_ids
+        entities = tuple(dict.fromkeys(t for t in _TOKEN.findall(line) if t in known))
+        result = (flags, entities)
+        if len(self._memo) < CLASSIFY_CACHE_SIZE:
+            self._memo[line] = result
+        return result
+
+    def classify(self, lines: Sequence[str]) -> List[Classified]:
+        classify_line = self.classify_line
+        return [classify_line(line) for line in lines]
+
+
+class LogStore:
+    """
+    Ventana de las últimas líneas del registro más sus índices por tipo y
+    por entidad. `first` es la posición absoluta de la línea más vieja en
+    memoria y len(store) la posición siguiente a la última.
+    """
+
+    def __init__(self, known_ids: Iterable[str] = (), capacity: int = DEFAULT_CAPACITY,
+                 spill: bool = True):
+        self.classifier = LineClassifier(known_ids)
+        self.capacity = capacity
+        self._spill = None
+        self.spill_path: Optional[str] = None
+        if spill:
+            fd, self.spill_path = tempfile.mkstemp(prefix="interbloqueos-", suffix=".log")
+            self._spill = os.fdopen(fd, "w", encoding="utf-8", newline="", buffering=1 << 20)
+        self.clear()
+
+    def clear(self) -> None:
+        self.first = 0
+        self.lines: List[str] = []
+        self.longest = 0  # largo de la línea más larga (ancho de la vista)
+        self.flags = bytearray()
+        self.entities: List[Tuple[str, ...]] = []
+        self.by_kind: Dict[str, array] = {kind: array("I") for kind in KINDS}
+        self.by_entity: Dict[str, array] = {}
+        self._entity_names: Dict[str, str] = {}
+        self._last_query: Optional[Tuple[Optional[str], str, int, array]] = None
+        if self._spill is not None:
+            self._spill.seek(0)
+            self._spill.truncate()
+
+    def set_known_ids(self, known_ids: Iterable[str]) -> None:
+        """Cambia los ids reconocidos (al cargar otra configuración) y vacía el registro."""
+        self.classifier = LineClassifier(known_ids)
+        self.clear()
+
+    def __len__(self) -> int:
+        return self.first + len(self.lines)
+
+    def line(self, index: int) -> str:
+        """Texto de la línea en la posición absoluta `index` (debe estar en memoria)."""
+        return self.lines[index - self.first]
+
+    def entities_of(self, index: int) -> Tuple[str, ...]:
+        return self.entities[index - self.first]
+
+    def extend(self, lines: Sequence[str], classified: Optional[List[Classified]] = None) -> int:
+        """
+        Agrega líneas (con su clasificación, si ya se calculó en otro hilo)
+        y devuelve la posición absoluta de la primera. Si la ventana se
+        pasa de `capacity`, se descartan de memoria las líneas más viejas.
+        """
+        if not lines:
+            return len(self)
+        if self._spill is not None:
+            self._spill.write("\n".join(lines))
+            self._spill.write("\n")
+        if classified is None:
+            classified = self.classifier.classify(lines)
+        start = len(self)
+        self.lines.extend(lines)
+        self.longest = max(self.longest, max(map(len, lines)))
+        by_kind = self.by_kind
+        by_entity = self.by_entity
+        entities = self.entities
+        all_flags = self.flags
+        for i, (flags, ents) in enumerate(classified, start):
+            all_flags.append(flags)
+            entities.append(ents)
+            if flags:
+                for kind in KINDS:
+                    if flags & KIND_FLAGS[kind]:
+                        by_kind[kind].append(i)
+            for ent in ents:
+                idx = by_entity.get(ent)
+                if idx is None:
+                    idx = by_entity[ent] = array("I")
+                    self._entity_names[ent.lower()] = ent
+                idx.append(i)
+
+        # Se recorta de a bloques (un cuarto de la capacidad) para que el
+        # costo por línea sea constante
+        if len(self.lines) > self.capacity + self.capacity // 4:
+            self._evict(len(self.lines) - self.capacity)
+        return start
+
+    def _evict(self, count: int) -> None:
+        del self.lines[:count]
+        del self.flags[:count]
+        del self.entities[:count]
+        self.first += count
+        first = self.first
+        for idx in self.by_kind.values():
+            del idx[:bisect_left(idx, first)]
+        for idx in self.by_entity.values():
+            del idx[:bisect_left(idx, first)]
+        self._last_query = None
+
+    def save(self, path: str) -> None:
+        """Guarda el registro completo (comprimido si `path` termina en .gz, .xz, ...)."""
+        if self._spill is None:
+            raise ValueError("Este registro no se guarda en disco")
+        self._spill.flush()
+        with open(self.spill_path, "r", encoding="utf-8", newline="") as src, open_output(path) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+
+    def close(self) -> None:
+        """Cierra y borra el archivo temporal del registro."""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+            os.remove(self.spill_path)
+
+    def entity_for(self, text: str) -> Optional[str]:
+        """Id presente en el registro que coincide con `text` sin distinguir mayúsculas."""
+        return self._entity_names.get(text.strip().lower())
+
+    def query(self, kind: Optional[str] = None, text: str = "") -> Optional[array]:
+        """
+        Posiciones de las líneas en memoria que pasan el filtro, en orden.
+        Devuelve None cuando no hay filtro (todas las líneas). Si `text` es
+        exactamente un id de proceso o recurso se usa el índice por
+        entidad; si no, se busca como subcadena sin distinguir mayúsculas.
+        """
+        text = text.strip()
+        if not kind and not text:
+            return None
+
+        entity = self.entity_for(text) if text else None
+        if entity is not None:
+            self._last_query = None
+            rows = self.by_entity[entity]
+            if kind:
+                flag = KIND_FLAGS[kind]
+                flags = self.flags
+                first = self.first
+                return array("I", (i for i in rows if flags[i - first] & flag))
+            return array("I", rows)
+
+        if not text:
+            self._last_query = None
+            return array("I", self.by_kind[kind])
+
+        needle = text.lower()
+        total = len(self)
+        last = self._last_query
+        if last is not None and last[0] == kind and needle.startswith(last[1]):
+            # Refinamiento: el resultado anterior más lo agregado desde entonces
+            rows = self._scan(last[3], needle)
+            rows.extend(self.filter_range(last[2], total, kind, text))
+        else:
+            rows = self._scan(self.by_kind[kind] if kind else range(self.first, total), needle)
+        self._last_query = (kind, needle, total, rows)
+        return array("I", rows)  # copia: quien la recibe puede extenderla
+
+    def _scan(self, candidates: Iterable[int], needle: str) -> array:
+        # Muchas líneas se repiten: el resultado se recuerda por texto
+        lines = self.lines
+        first = self.first
+        seen: Dict[str, bool] = {}
+        rows = array("I")
+        for i in candidates:
+            line = lines[i - first]
+            hit = seen.get(line)
+            if hit is None:
+                hit = seen[line] = needle in line.lower()
+            if hit:
+                rows.append(i)
+        return rows
+
+    def filter_range(self, start: int, end: int, kind: Optional[str], text: str) -> array:
+        """Posiciones en [start, end) que pasan el filtro (líneas recién agregadas)."""
+        text = text.strip()
+        first = self.first
+        rows: Iterable[int] = range(max(start, first), end)
+        if kind:
+            flag = KIND_FLAGS[kind]
+            flags = self.flags
+            rows = [i for i in rows if flags[i - first] & flag]
+        if not text:
+            return array("I", rows)
+        entity = self.entity_for(text)
+        if entity is not None:
+            entities = self.entities
+            return array("I", (i for i in rows if entity in entities[i - first]))
+        return self._scan(rows, text.lower())
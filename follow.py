@@ -0,0 +1,235 @@
+"""
+Modo follow: simula un flujo de eventos en vivo, al estilo `tail -f`.
+
+Un hilo lector toma las filas nuevas de un events.csv que va creciendo
+(o de stdin) y las pasa, ya parseadas, al motor por una cola acotada:
+si el motor se atrasa, el lector se bloquea (backpressure) en lugar de
+acumular filas en memoria. Cada fila lleva la marca de tiempo en que se
+leyó, así se mide la latencia desde la fila escrita hasta el veredicto
+de interbloqueo.
+
+Uso:
+    python follow.py config.json events.csv
+    generador_de_eventos | python follow.py config.json -
+"""
+import argparse
+import contextlib
+import os
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from typing import Deque, Iterator, List, Optional, TextIO
+
+from io_utils import load_config, parse_event_lines
+from models import SystemState
+from sim import step, show_summary
+
+
+# Fin del flujo (lo pone el lector en la cola)
+_EOF = object()
+
+
+def follow_lines(
+    f: TextIO,
+    poll_interval: float = 0.05,
+    stop: Optional[threading.Event] = None,
+    idle_timeout: Optional[float] = None,
+) -> Iterator[str]:
+    """
+    Produce las líneas completas de `f` a medida que se escriben. Al
+    llegar al final espera `poll_interval` y reintenta (una línea a
+    medio escribir se guarda hasta que llegue su salto de línea). Termina
+    cuando `stop` se activa o tras `idle_timeout` segundos sin datos.
+    """
+    partial = ""
+    idle_since = time.monotonic()
+    while stop is None or not stop.is_set():
+        line = f.readline()
+        if line:
+            idle_since = time.monotonic()
+            if not line.endswith("\n"):
+                partial += line
+                continue
+            yield (partial + line).rstrip("\r\n")
+            partial = ""
+            continue
+        if idle_timeout is not None and time.monotonic() - idle_since >= idle_timeout:
+            break
+        time.sleep(poll_interval)
+    if partial:
+        yield partial.rstrip("\r")
+
+
+def _read_pipe(f: TextIO) -> Iterator[str]:
+    # En una tubería readline() se bloquea hasta que haya datos; "" es EOF
+    for line in iter(f.readline, ""):
+        yield line.rstrip("\r\n")
+
+
+class LiveFeed:
+    """
+    Lector en segundo plano: parsea filas nuevas y las encola como
+    (evento, instante de lectura) en una cola de tamaño `buffer_size`.
+    """
+
+    def __init__(self, source: TextIO, state: SystemState, buffer_size: int = 1024,
+                 poll_interval: float = 0.05, idle_timeout: Optional[float] = None,
+                 is_pipe: bool = False):
+        self.queue: "queue.Queue" = queue.Queue(maxsize=buffer_size)
+        self.stop = threading.Event()
+        self.errors = 0
+        self._source = source
+        self._state = state
+        self._poll_interval = poll_interval
+        self._idle_timeout = idle_timeout
+        self._is_pipe = is_pipe
+        self._thread = threading.Thread(target=self._run, name="follow-reader", daemon=True)
+
+    def start(self) -> "LiveFeed":
+        self._thread.start()
+        return self
+
+    def _lines(self) -> Iterator[str]:
+        if self._is_pipe:
+            return _read_pipe(self._source)
+        return follow_lines(self._source, self._poll_interval, self.stop, self._idle_timeout)
+
+    def _run(self) -> None:
+        stamps: List[float] = []
+
+        def blocks():
+            # Una línea por bloque: el parser la procesa en cuanto llega
+            for line in self._lines():
+                stamps.append(time.monotonic())
+                yield [line]
+
+        def on_error(lineno: int, msg: str) -> None:
+            self.errors += 1
+            print(f"[FOLLOW] fila descartada, línea {lineno}: {msg}", file=sys.stderr)
+
+        try:
+            for event in parse_event_lines(blocks(), getattr(self._source, "name", "<stream>"),
+                                           self._state, on_error):
+                item = (event, stamps[-1])
+                stamps.clear()
+                if not self._put(item):
+                    break
+        finally:
+            self._put(_EOF)
+
+    def _put(self, item) -> bool:
+        # put() con tiempo de espera para poder atender stop(); False si se detuvo
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is _EOF:
+                return
+            yield item
+
+
+class LatencyStats:
+    """
+    Acumula latencias (en segundos). Se guardan solo las últimas `window`
+    muestras para que la memoria no crezca en flujos largos; media,
+    percentiles y máximo se calculan todos sobre esa misma ventana, y
+    `count` cuenta todas las muestras.
+    """
+
+    def __init__(self, window: int = 10000):
+        self.count = 0
+        self.recent: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.recent.append(seconds)
+
+    def summary(self) -> str:
+        if not self.count:
+            return "sin muestras"
+        data = sorted(self.recent)
+        n = len(data)
+        mean = sum(data) / n * 1000
+        p50 = data[n // 2] * 1000
+        p95 = data[min(n - 1, int(0.95 * n))] * 1000
+        p99 = data[min(n - 1, int(0.99 * n))] * 1000
+        window = f"n={n}" if n == self.count else f"n={self.count}, últimas {n}:"
+        return (f"{window} media={mean:.2f} ms p50={p50:.2f} ms p95={p95:.2f} ms "
+                f"p99={p99:.2f} ms máx={data[-1] * 1000:.2f} ms")
+
+
+def run_follow(state: SystemState, feed: LiveFeed, out: TextIO, quiet: bool = False) -> None:
+    """
+    Consume el flujo en vivo con el motor paso a paso e informa cada
+    interbloqueo en cuanto se detecta, con su latencia desde la lectura.
+    """
+    applied = LatencyStats()
+    verdicts = LatencyStats()
+    engine_out = open(os.devnull, "w") if quiet else out
+
+    print("[FOLLOW] Esperando eventos... (Ctrl+C para terminar)", file=out, flush=True)
+    try:
+        with contextlib.redirect_stdout(engine_out):
+            for index, (event, read_at) in enumerate(feed):
+                result = step(state, event, index)
+                now = time.monotonic()
+                applied.add(now - read_at)
+                if result:
+                    cycle, victim = result
+                    verdicts.add(now - read_at)
+                    print(f"[FOLLOW] Tick {state.tick}: interbloqueo entre {', '.join(cycle)}; "
+                          f"víctima {victim}; latencia {(now - read_at) * 1000:.2f} ms",
+                          file=out, flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        feed.stop.set()
+        if quiet:
+            engine_out.close()
+
+    with contextlib.redirect_stdout(out):
+        show_summary(state)
+    print(f"[FOLLOW] Latencia fila -> evento aplicado: {applied.summary()}", file=out)
+    print(f"[FOLLOW] Latencia fila -> veredicto:       {verdicts.summary()}", file=out)
+    if feed.errors:
+        print(f"[FOLLOW] Filas descartadas: {feed.errors}", file=out)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Simulación sobre un flujo de eventos en vivo")
+    parser.add_argument("config", help="archivo de configuración")
+    parser.add_argument("events", nargs="?", default="-",
+                        help="events.csv a seguir, o '-' para leer de stdin (por defecto)")
+    parser.add_argument("--buffer", type=int, default=1024,
+                        help="eventos en tránsito antes de frenar al lector (por defecto 1024)")
+    parser.add_argument("--poll", type=float, default=0.05,
+                        help="segundos entre consultas al llegar al final del archivo")
+    parser.add_argument("--idle-timeout", type=float, default=None,
+                        help="terminar tras estos segundos sin filas nuevas")
+    parser.add_argument("--quiet", action="store_true",
+                        help="mostrar solo veredictos y resumen, no el estado de cada tick")
+    args = parser.parse_args(argv)
+
+    state = load_config(args.config)
+    out = sys.stdout
+    if args.events == "-":
+        feed = LiveFeed(sys.stdin, state, args.buffer, is_pipe=True)
+        run_follow(state, feed.start(), out, args.quiet)
+    else:
+        with open(args.events, "r", newline="", encoding="utf-8-sig") as f:
+            feed = LiveFeed(f, state, args.buffer, args.poll, args.idle_timeout)
+            run_follow(state, feed.start(), out, args.quiet)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Geometría del grafo de espera, independiente de Qt.
+
+GraphLayout guarda las posiciones de los nodos y solo las recalcula
+cuando cambia el conjunto de nodos: la primera vez se hace el
+spring_layout completo y después los nodos nuevos se ubican con unas
+pocas iteraciones dejando fijos los que ya estaban, así el dibujo no
+salta. Las aristas del grafo de espera cambian en cada evento pero no
+mueven los nodos.
+
+GridIndex resuelve "qué nodo hay en este punto" con una grilla de
+celdas del tamaño del nodo, sin recorrer todos los nodos: sirve para
+los clics y para el tooltip al mover el mouse.
+
+edge_geometry calcula en coordenadas de pantalla los segmentos y las
+puntas de flecha de todas las aristas de una vez, para dibujarlas con
+dos colecciones de Matplotlib en lugar de un parche por arista.
+
+Con más de LOD_THRESHOLD procesos no se dibuja cada proceso: la vista
+general (condensed_view) junta cada componente con ciclo en un
+supernodo y el resto de los procesos en grupos por estado, y al abrir
+un grupo (neighbourhood_view) se ven sus procesos y los vecinos
+inmediatos. Cualquiera de las dos tiene una cantidad acotada de nodos.
+"""
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import networkx as nx
+import numpy as np
+
+
+Position = Tuple[float, float]
+
+# Parámetros del spring_layout (los mismos que usaba la GUI)
+LAYOUT_SEED = 42
+LAYOUT_K = 2
+LAYOUT_ITERATIONS = 50
+
+# Iteraciones para ubicar nodos nuevos con los demás fijos
+INCREMENTAL_ITERATIONS = 15
+
+# Desplazamiento lateral de cada arista (px): separa A->B de B->A
+EDGE_OFFSET_PX = 4.0
+
+# Con más procesos que esto se dibuja por niveles de detalle
+LOD_THRESHOLD = 40
+
+# Máximo de procesos en la vista de detalle de un grupo
+LOD_MAX_NODES = 30
+
+# Componentes con ciclo que se muestran por separado en la vista general
+LOD_MAX_COMPONENTS = 20
+
+
+class GraphLayout:
+    """
+    Posiciones cacheadas de los nodos. `update()` devuelve el dict
+    nodo -> (x, y); `version` aumenta cada vez que las posiciones cambian,
+    para que quien dibuje sepa cuándo rehacer su geometría.
+    """
+
+    def __init__(self, seed: int = LAYOUT_SEED, k: float = LAYOUT_K,
+                 iterations: int = LAYOUT_ITERATIONS):
+        self.seed = seed
+        self.k = k
+        self.iterations = iterations
+        self.positions: Dict[str, Position] = {}
+        self.version = 0
+
+    def update(self, nodes: Iterable[str],
+               edges: Optional[Dict[str, list]] = None) -> Dict[str, Position]:
+        """
+        Ajusta el layout a `nodes`. `edges` (grafo de espera como
+        dict nodo -> lista de nodos) solo se usa cuando hay que calcular
+        posiciones nuevas.
+        """
+        nodes = list(nodes)
+        current = self.positions
+        added = [n for n in nodes if n not in current]
+        if not added and len(nodes) == len(current):
+            return current
+
+        keep = set(nodes)
+        positions = {n: p for n, p in current.items() if n in keep}
+        if added:
+            G = nx.DiGraph()
+            G.add_nodes_from(nodes)
+            for pid, deps in (edges or {}).items():
+                if pid in keep:
+                    G.add_edges_from((pid, dep) for dep in deps if dep in keep)
+            if positions:
+                # Solo se mueven los nodos nuevos
+                layout = nx.spring_layout(G, pos=positions, fixed=list(positions),
+                                          seed=self.seed, k=self.k,
+                                          iterations=INCREMENTAL_ITERATIONS)
+            else:
+                layout = nx.spring_layout(G, seed=self.seed, k=self.k,
+                                          iterations=self.iterations)
+            positions = {n: (float(x), float(y)) for n, (x, y) in layout.items()}
+
+        self.positions = positions
+        self.version += 1
+        return positions
+
+    def clear(self) -> None:
+        """Olvida las posiciones (p. ej. al cargar otra configuración)."""
+        self.positions = {}
+        self.version += 1
+
+
+class GridIndex:
+    """
+    Índice espacial de puntos con nombre sobre una grilla uniforme. Con
+    celdas de lado igual al radio de búsqueda, una consulta revisa solo
+    las 3x3 celdas vecinas.
+    """
+
+    def __init__(self, points: Dict[str, Position], cell: float):
+        self.cell = cell if cell > 0 else 1.0
+        self._buckets: Dict[Tuple[int, int], List[Tuple[str, float, float]]] = {}
+        for name, (x, y) in points.items():
+            key = (int(math.floor(x / self.cell)), int(math.floor(y / self.cell)))
+            self._buckets.setdefault(key, []).append((name, x, y))
+
+    def __len__(self) -> int:
+        return sum(len(b) for b in self._buckets.values())
+
+    def nearest(self, x: float, y: float, radius: Optional[float] = None) -> Optional[str]:
+        """Punto más cercano a (x, y) a menos de `radius` (por defecto, una celda)."""
+        radius = self.cell if radius is None else radius
+        reach = int(math.ceil(radius / self.cell))
+        cx = int(math.floor(x / self.cell))
+        cy = int(math.floor(y / self.cell))
+        best = None
+        best_dist = radius * radius
+        buckets = self._buckets
+        for i in range(cx - reach, cx + reach + 1):
+            for j in range(cy - reach, cy + reach + 1):
+                for name, px, py in buckets.get((i, j), ()):
+                    dist = (px - x) ** 2 + (py - y) ** 2
+                    if dist < best_dist:
+                        best_dist = dist
+                        best = name
+        return best
+
+
+def edge_geometry(
+    pos: Dict[str, Position],
+    edges: Sequence[Tuple[str, str]],
+    transform,
+    inset_px: float,
+) -> Tuple[np.ndarray, np.ndarray, List[float]]:
+    """
+    Geometría de las aristas para `transform` (p. ej. ax.transData).
+    Cada arista se recorta `inset_px` píxeles en ambos extremos (el radio
+    del nodo) y se desplaza un poco a su derecha. Devuelve
+    (segmentos en datos con forma (n, 2, 2), puntas en datos (n, 2),
+    ángulos de las puntas en radianes, medidos en pantalla).
+    """
+    if not edges:
+        return np.empty((0, 2, 2)), np.empty((0, 2)), []
+    src = np.array([pos[a] for a, _ in edges], dtype=float)
+    dst = np.array([pos[b] for _, b in edges], dtype=float)
+    a = transform.transform(src)
+    b = transform.transform(dst)
+    d = b - a
+    length = np.hypot(d[:, 0], d[:, 1])
+    length[length == 0] = 1.0
+    u = d / length[:, None]
+    normal = np.column_stack((u[:, 1], -u[:, 0])) * EDGE_OFFSET_PX
+    start = a + u * inset_px + normal
+    tip = b - u * inset_px + normal
+
+    inverse = transform.inverted()
+    segments = np.stack((inverse.transform(start), inverse.transform(tip)), axis=1)
+    angles = [math.atan2(y, x) for x, y in u]
+    return segments, segments[:, 1], angles
+
+
+class ViewNode(NamedTuple):
+    """
+    Nodo de una vista del grafo: un proceso o un grupo de procesos.
+    `name` identifica la posición en el layout; `label` es el texto que
+    se dibuja.
+    """
+    name: str
+    label: str
+    status: str  # "blocked", "active" o "aborted"
+    members: Tuple[str, ...]
+
+    @property
+    def is_group(self) -> bool:
+        return self.members != (self.name,)
+
+
+class GraphView(NamedTuple):
+    nodes: List[ViewNode]
+    edges: List[Tuple[str, str]]
+    title: str
+    note: str = ""  # aclaración (nodos ocultos, cómo volver)
+
+
+def node_status(pid: str, blocked, aborted) -> str:
+    """Mismo criterio que el panel de detalles: abortado, bloqueado o activo."""
+    if pid in aborted:
+        return "aborted"
+    if pid in blocked:
+        return "blocked"
+    return "active"
+
+
+def full_view(graph: Dict[str, list], blocked, aborted) -> GraphView:
+    """Todos los procesos y todas las aristas (grafos chicos)."""
+    nodes = [ViewNode(pid, pid, node_status(pid, blocked, aborted), (pid,)) for pid in graph]
+    edges = [(pid, dep) for pid, deps in graph.items() for dep in deps]
+    return GraphView(nodes, edges, "Grafo de Espera (Wait-For Graph) - En Tiempo Real")
+
+
+def condensed_view(graph: Dict[str, list], blocked, aborted, components: List[List[str]],
+                   max_components: int = LOD_MAX_COMPONENTS) -> GraphView:
+    """
+    Vista general de un grafo grande (grafo de condensación): cada
+    componente con ciclo es un supernodo y el resto de los procesos se
+    agrupa por estado. Tiene a lo sumo max_components + 4 nodos, sin
+    importar cuántos procesos haya.
+    """
+    cycles = sorted((c for c in components if len(c) > 1), key=len, reverse=True)
+    group_of: Dict[str, str] = {}
+    nodes: List[ViewNode] = []
+
+    for comp in cycles[:max_components]:
+        # La clave es el menor id: sigue igual mientras el ciclo exista
+        name = "ciclo:" + min(comp)
+        nodes.append(ViewNode(name, f"Ciclo\n({len(comp)})", "blocked", tuple(sorted(comp))))
+        group_of.update(dict.fromkeys(comp, name))
+    rest = [pid for comp in cycles[max_components:] for pid in comp]
+    if rest:
+        nodes.append(ViewNode("ciclos:otros", f"Ciclos\n({len(rest)})", "blocked", tuple(sorted(rest))))
+        group_of.update(dict.fromkeys(rest, "ciclos:otros"))
+
+    by_status: Dict[str, List[str]] = {"blocked": [], "active": [], "aborted": []}
+    for pid in graph:
+        if pid not in group_of:
+            by_status[node_status(pid, blocked, aborted)].append(pid)
+    for status, label in (("blocked", "Bloq."), ("active", "Activos"), ("aborted", "Abort.")):
+        members = by_status[status]
+        if members:
+            name = "grupo:" + status
+            nodes.append(ViewNode(name, f"{label}\n({len(members)})", status, tuple(members)))
+            group_of.update(dict.fromkeys(members, name))
+
+    edges = set()
+    for pid, deps in graph.items():
+        source = group_of[pid]
+        for dep in deps:
+            target = group_of[dep]
+            if target != source:
+                edges.add((source, target))
+    return GraphView(nodes, sorted(edges),
+                     f"Grafo de Espera - Vista general ({len(graph)} procesos)",
+                     "Clic en un grupo para ver sus procesos")
+
+
+def neighbourhood_view(graph: Dict[str, list], focus: Sequence[str], blocked, aborted,
+                       max_nodes: int = LOD_MAX_NODES) -> GraphView:
+    """
+    Vista de detalle: los procesos de `focus` y sus vecinos inmediatos
+    en el grafo de espera (a quién esperan y quién los espera), hasta
+    max_nodes procesos en total.
+    """
+    shown = [pid for pid in focus if pid in graph][:max_nodes]
+    keep = set(shown)
+    hidden = len([pid for pid in focus if pid in graph]) - len(shown)
+
+    # A quién esperan
+    for pid in list(shown):
+        for dep in graph[pid]:
+            if dep not in keep:
+                if len(shown) < max_nodes:
+                    keep.add(dep)
+                    shown.append(dep)
+                else:
+                    hidden += 1
+    # Quién los espera (el grafo solo tiene aristas hacia adelante)
+    core = set(focus)
+    for pid, deps in graph.items():
+        if pid not in keep and any(dep in core for dep in deps):
+            if len(shown) < max_nodes:
+                keep.add(pid)
+                shown.append(pid)
+            else:
+                hidden += 1
+
+    nodes = [ViewNode(pid, pid, node_status(pid, blocked, aborted), (pid,)) for pid in shown]
+    edges = [(pid, dep) for pid in shown for dep in graph[pid] if dep in keep]
+    note = "Clic en el fondo para volver a la vista general"
+    if hidden:
+        note = f"{hidden} procesos más sin mostrar · " + note
+    return GraphView(nodes, edges, f"Grafo de Espera - Detalle ({len(core)} procesos)", note)
@@ -1,172 +1,288 @@
 import sys
-import io
 import contextlib
-import json
-import csv
-import random
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional
-import networkx as nx
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Qt5Agg')
-
-# Importaciones CORREGIDAS de matplotlib
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 
+# Matplotlib, NumPy y NetworkX se importan con charts.py, después de
+# mostrar la ventana (ver DeadlockGUI.init_charts)
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
     QLabel, QFileDialog, QTableWidget, QTableWidgetItem,
     QMessageBox, QTextEdit, QFrame, QGridLayout, QGroupBox,
     QSplitter, QProgressBar, QComboBox, QLineEdit, QCheckBox,
     QStackedWidget, QListWidget, QListWidgetItem, QTabWidget,
-    QDialog, QFormLayout, QSpinBox, QDialogButtonBox, QScrollArea,
+    QDialog, QFormLayout, QSpinBox, QDoubleSpinBox, QDialogButtonBox, QScrollArea,
     QToolButton, QMenu, QAction, QSizePolicy, QMainWindow, QToolBar,
-    QStatusBar
+    QStatusBar, QToolTip, QTableView, QHeaderView, QAbstractItemView, QSlider
 )
 from PyQt5.QtGui import (
-    QColor, QFont, QPalette, QIcon, QPixmap, QCursor
+    QColor, QFont, QFontMetrics, QPalette, QIcon, QPixmap, QCursor
 )
 from PyQt5.QtCore import (
     Qt, QSize, QPropertyAnimation, QEasingCurve, 
-    pyqtProperty, QTimer, QPoint
+    pyqtProperty, QTimer, QPoint, QThread, pyqtSignal,
+    QAbstractListModel, QModelIndex
 )
 
-# Simulamos los módulos que no están presentes
-class Process:
-    def __init__(self, pid, priority=1):
-        self.pid = pid
-        self.priority = priority
-        self.work_done = 0
+from io_utils import load_config, load_events
+from sim import step, show_summary
+from event_log import LogStore
+from scenario_gen import PATTERNS, ScenarioSpec, random_spec, write_scenario
+from timeline import RunTimeline
+from tracelog import TeeTracer
+
+
+# Intervalo mínimo entre actualizaciones de la interfaz durante una ejecución (s)
+UI_UPDATE_INTERVAL = 0.25
+
+# Espera tras la última tecla antes de aplicar la búsqueda en el registro (ms)
+SEARCH_DEBOUNCE_MS = 250
+
+# Cada cuánto se vuelcan al registro las líneas recibidas del hilo de simulación (ms)
+LOG_FLUSH_MS = 100
+
+# Intervalo mínimo entre redibujos al arrastrar la línea de tiempo (ms)
+TIMELINE_REDRAW_MS = 40
+
+# Eventos máximos de un escenario generado desde la GUI: se cargan todos en
+# memoria (~72 bytes por evento, unos 360 MB en el máximo). Para escenarios
+# más grandes: scenario_gen.py y main.py/follow.py, que leen en streaming.
+GUI_MAX_GENERATED_EVENTS = 5_000_000
 
-class Resource:
-    def __init__(self, rid, total_instances):
-        self.rid = rid
-        self.total_instances = total_instances
-        self.available_instances = total_instances
 
-class SystemState:
+class _LineCollector:
+    """Destino de stdout que junta el texto del motor en líneas completas."""
     def __init__(self):
-        self.processes = {}
-        self.resources = {}
-        self.allocation = {}
-        self.requests = {}
-        self.blocked_processes = set()
-        self.aborted_processes = set()
-        self.tick = 0
-        self.event_history = []
-
-def load_config(path):
-    """Simula la carga de configuración"""
-    with open(path, 'r') as f:
-        config = json.load(f)
-    
-    state = SystemState()
-    
-    # Crear procesos
-    for proc_config in config.get('processes', []):
-        pid = proc_config['pid']
-        priority = proc_config.get('priority', 1)
-        state.processes[pid] = Process(pid, priority)
-    
-    # Crear recursos
-    for res_config in config.get('resources', []):
-        rid = res_config['rid']
-        instances = res_config['instances']
-        state.resources[rid] = Resource(rid, instances)
-    
-    return state
-
-def load_events(path):
-    """Simula la carga de eventos"""
-    events = []
-    with open(path, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            events.append(row)
-    return events
-
-def build_wait_for_graph(state):
-    """Simula la construcción del grafo de espera"""
-    graph = {}
-    for pid in state.processes:
-        graph[pid] = []
-        
-        # Simular algunas dependencias para demostración
-        if pid == "P1":
-            graph[pid] = ["P2"]
-        elif pid == "P2":
-            graph[pid] = ["P1"]
-    
-    return graph
+        self.lines = []
+        self._partial = ""
 
-def run_simulation(state, events):
-    """Simula la ejecución de la simulación"""
-    print("INICIO DE LA SIMULACIÓN")
-    
-    for i, event in enumerate(events):
-        state.tick = i + 1
-        event_type = event['type']
-        process = event['process']
-        resource = event.get('resource', '')
-        amount = int(event.get('amount_or_time', 1))
-        
-        print(f"Tick {state.tick} | Evento {i}: {event_type}")
-        
-        if event_type == "REQUEST":
-            print(f"{process} {resource} {amount}")
-            if resource in state.resources:
-                resource_obj = state.resources[resource]
-                if resource_obj.available_instances >= amount:
-                    resource_obj.available_instances -= amount
-                    state.allocation[(process, resource)] = amount
-                    print(f"{process} obtiene {amount} instancia(s) de {resource}.")
-                else:
-                    state.blocked_processes.add(process)
-                    print(f"{process} no puede obtener {resource}. Bloqueado.")
-        
-        elif event_type == "RELEASE":
-            print(f"{process} {resource} {amount}")
-            if (process, resource) in state.allocation:
-                allocated = state.allocation[(process, resource)]
-                if resource in state.resources:
-                    state.resources[resource].available_instances += allocated
-                    del state.allocation[(process, resource)]
-                    print(f"{process} libera {allocated} instancia(s) de {resource}.")
-        
-        elif event_type == "COMPUTE":
-            print(f"{process} ejecuta {amount} ciclos.")
-            if process in state.processes:
-                state.processes[process].work_done += amount
-        
-        # Simular detección de interbloqueo ocasional
-        if state.tick % 3 == 0 and len(state.blocked_processes) > 1:
-            print(f"[DEBUG] Tick {state.tick}: analizando interbloqueo...")
-            graph = build_wait_for_graph(state)
-            print(f"[DEBUG] Wait-for graph: {graph}")
-            
-            # Detectar ciclo simple
-            if "P1" in graph and "P2" in graph.get("P1", []) and "P1" in graph.get("P2", []):
-                print("¡INTERBLOQUEO DETECTADO! Ciclo P1<->P2")
-                # Elegir víctima (P2 como ejemplo)
-                victim = "P2"
-                state.aborted_processes.add(victim)
-                if victim in state.blocked_processes:
-                    state.blocked_processes.remove(victim)
-                print(f"Proceso {victim} abortado para resolver interbloqueo.")
-        
-        # Registrar evento en historial
-        state.event_history.append(f"Tick {state.tick}: {event_type} {process} {resource if resource else ''}")
-        
-        print(f"Estado actual:")
-        for rid, resource_obj in state.resources.items():
-            print(f"{rid}: disp={resource_obj.available_instances}/{resource_obj.total_instances}")
-        print(f"Procesos bloqueados: {state.blocked_processes if state.blocked_processes else 'ninguno'}")
-        print("......")
-    
-    print("FIN DE LA SIMULACIÓN")
+    def write(self, text):
+        text = self._partial + text
+        parts = text.split("\n")
+        self._partial = parts.pop()
+        self.lines.extend(parts)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        lines, self.lines = self.lines, []
+        return lines
+
+
+class SimulationWorker(QThread):
+    """
+    Ejecuta el motor real (sim.step) en un hilo aparte para no congelar la
+    ventana. Emite el registro por lotes (ya clasificado para los índices
+    del LogStore), el progreso y copias del estado
+    como mucho cada UI_UPDATE_INTERVAL segundos, y se puede cancelar
+    entre eventos. Solo hay una copia del estado en vuelo a la vez: la
+    siguiente se envía cuando la interfaz llama a snapshot_consumed(), así
+    una interfaz lenta no acumula actualizaciones atrasadas.
+    """
+    progress = pyqtSignal(int, int)         # eventos procesados, total
+    log_batch = pyqtSignal(list, list)      # líneas nuevas del registro y su clasificación
+    snapshot_ready = pyqtSignal(object)     # SystemState.snapshot()
+    finished_run = pyqtSignal(bool, int)    # cancelada, índice del siguiente evento
+    failed = pyqtSignal(str)
+
+    def __init__(self, state, events, classifier, start_index=0, parent=None, tracer=None):
+        super().__init__(parent)
+        self.state = state
+        self.events = events
+        self.classifier = classifier
+        self.start_index = start_index
+        self.tracer = tracer if tracer is not None else state.entity_history
+        self._cancel = threading.Event()
+        self._snapshot_free = threading.Event()
+        self._snapshot_free.set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def snapshot_consumed(self):
+        self._snapshot_free.set()
+
+    def _emit_log(self, out):
+        lines = out.take()
+        if lines:
+            self.log_batch.emit(lines, self.classifier.classify(lines))
+
+    def run(self):
+        state = self.state
+        events = self.events
+        tracer = self.tracer
+        total = len(events)
+        out = _LineCollector()
+        index = self.start_index
+        last_update = time.monotonic()
+        try:
+            with contextlib.redirect_stdout(out):
+                if index == 0:
+                    print("\n=== INICIO DE LA SIMULACIÓN ===\n")
+                while index < total and not self._cancel.is_set():
+                    event = events[index]
+                    result = step(state, event, index, tracer)
+                    state.event_history.record(state.tick, event, result)
+                    index += 1
+
+                    now = time.monotonic()
+                    if now - last_update >= UI_UPDATE_INTERVAL:
+                        last_update = now
+                        self._emit_log(out)
+                        self.progress.emit(index, total)
+                        if self._snapshot_free.is_set():
+                            self._snapshot_free.clear()
+                            self.snapshot_ready.emit(state.snapshot())
+
+                if index >= total:
+                    print("\n=== FIN DE LA SIMULACIÓN ===")
+                    show_summary(state)
+        except Exception as e:
+            self._emit_log(out)
+            self.failed.emit(f"Error en el tick {state.tick}: {e}")
+            self.finished_run.emit(True, index)
+            return
+
+        self._emit_log(out)
+        self.progress.emit(index, total)
+        self.finished_run.emit(self._cancel.is_set(), index)
+
+
+class LogListModel(QAbstractListModel):
+    """
+    Vista virtual del LogStore: la lista solo pide las filas visibles.
+    `rows` son las posiciones (absolutas) que pasan el filtro; sin filtro
+    (rows = None) las filas son las líneas [first, count) del almacén.
+    """
+
+    def __init__(self, store, parent=None):
+        super().__init__(parent)
+        self.store = store
+        self.kind = None
+        self.text = ""
+        self.rows = None
+        self.first = 0
+        self.count = 0
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return self.count - self.first if self.rows is None else len(self.rows)
+
+    def line_at(self, row):
+        """Posición en el LogStore de la fila `row` de la vista."""
+        return self.first + row if self.rows is None else self.rows[row]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.store.line(self.line_at(index.row()))
+        return None
+
+    def set_filter(self, kind, text):
+        self.beginResetModel()
+        self.kind = kind
+        self.text = text
+        self.rows = self.store.query(kind, text)
+        self.first = self.store.first
+        self.count = len(self.store)
+        self.endResetModel()
+
+    def reset(self):
+        self.set_filter(self.kind, self.text)
+
+    def lines_added(self, start, end):
+        """
+        Avisa a la vista de las líneas [start, end) recién agregadas al
+        almacén y quita las filas cuyas líneas ya salieron de memoria.
+        """
+        store_first = self.store.first
+        if self.rows is None:
+            drop = min(store_first, self.count) - self.first
+            if drop > 0:
+                self.beginRemoveRows(QModelIndex(), 0, drop - 1)
+                self.first += drop
+                self.endRemoveRows()
+            if self.count < store_first:
+                # Líneas que entraron y salieron de memoria sin mostrarse
+                self.first = self.count = store_first
+            if end > self.count:
+                self.beginInsertRows(QModelIndex(), self.count - self.first, end - self.first - 1)
+                self.count = end
+                self.endInsertRows()
+            return
+
+        drop = bisect_left(self.rows, store_first)
+        if drop:
+            self.beginRemoveRows(QModelIndex(), 0, drop - 1)
+            del self.rows[:drop]
+            self.endRemoveRows()
+        self.first = store_first
+        self.count = end
+        new = self.store.filter_range(start, end, self.kind, self.text)
+        if new:
+            first = len(self.rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(new) - 1)
+            self.rows.extend(new)
+            self.endInsertRows()
+
+
+class ScenarioWorker(QThread):
+    """
+    Genera un escenario (scenario_gen.write_scenario) en `directory` y
+    carga sus eventos en un hilo aparte: con millones de eventos la
+    ventana sigue respondiendo. Se puede cancelar entre lotes de filas.
+    Los eventos quedan todos en memoria (ver GUI_MAX_GENERATED_EVENTS).
+    """
+    progress = pyqtSignal(int, int)  # filas escritas, total
+    generated = pyqtSignal(object)   # (config, eventos, spec, lista de Event), o None si se canceló o falló
+    failed = pyqtSignal(str)
+
+    def __init__(self, spec, directory, parent=None):
+        super().__init__(parent)
+        self.spec = spec
+        self.directory = directory
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def run(self):
+        total = self.spec.events
+        result = None
+        try:
+            result = write_scenario(self.spec, self.directory,
+                                    progress=lambda done: self.progress.emit(done, total),
+                                    cancel=self._cancel)
+            if result is None:
+                self.generated.emit(None)
+                return
+            config_path, events_path, spec = result
+            events = load_events(events_path, load_config(config_path))
+        except Exception as e:
+            if result is not None:
+                remove_files(result[:2])
+            self.failed.emit(f"Error generando escenario: {e}")
+            self.generated.emit(None)
+            return
+        self.generated.emit((config_path, events_path, spec, events))
+
+
+def remove_files(paths):
+    """Borra archivos generados; los que ya no existen se ignoran."""
+    for path in paths:
+        with contextlib.suppress(OSError):
+            os.remove(path)
 
 
 class ConfigurationDialog(QDialog):
@@ -201,17 +317,34 @@ class ConfigurationDialog(QDialog):
         manual_widget = QWidget()
         manual_layout = QFormLayout()
         self.process_count = QSpinBox()
-        self.process_count.setRange(1, 20)
+        self.process_count.setRange(1, 10_000)
         self.process_count.setValue(3)
         self.resource_count = QSpinBox()
-        self.resource_count.setRange(1, 10)
+        self.resource_count.setRange(1, 1_000)
         self.resource_count.setValue(2)
         self.event_count = QSpinBox()
-        self.event_count.setRange(5, 100)
+        self.event_count.setRange(5, GUI_MAX_GENERATED_EVENTS)
+        self.event_count.setToolTip("Los eventos generados se cargan en memoria (~72 bytes cada uno); "
+                                    "para escenarios más grandes use scenario_gen.py")
         self.event_count.setValue(10)
+        self.event_count.setGroupSeparatorShown(True)
+        self.pattern_combo = QComboBox()
+        self.pattern_combo.addItems(PATTERNS)
+        self.deadlock_prob = QDoubleSpinBox()
+        self.deadlock_prob.setRange(0.0, 1.0)
+        self.deadlock_prob.setSingleStep(0.05)
+        self.deadlock_prob.setValue(0.5)
+        self.deadlock_prob.setToolTip("Probabilidad de que cada ronda termine en interbloqueo "
+                                      "(no aplica al patrón aleatorio)")
+        self.seed_edit = QLineEdit()
+        self.seed_edit.setPlaceholderText("al azar")
+        self.seed_edit.setToolTip("Con la misma semilla se genera el mismo escenario")
+        manual_layout.addRow("Patrón:", self.pattern_combo)
         manual_layout.addRow("Número de procesos:", self.process_count)
         manual_layout.addRow("Número de recursos:", self.resource_count)
         manual_layout.addRow("Número de eventos:", self.event_count)
+        manual_layout.addRow("Prob. de interbloqueo:", self.deadlock_prob)
+        manual_layout.addRow("Semilla:", self.seed_edit)
         manual_widget.setLayout(manual_layout)
         
         # Modo automático
@@ -243,13 +376,15 @@ class ConfigurationDialog(QDialog):
         self.events_path = ""
         
     def select_config_file(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Seleccionar config.json", "", "JSON (*.json)")
+        path, _ = QFileDialog.getOpenFileName(self, "Seleccionar config.json", "",
+                                              "JSON (*.json *.json.gz *.json.bz2 *.json.xz)")
         if path:
             self.config_path = path
             self.config_file_btn.setText(f"📁 {Path(path).name}")
             
     def select_events_file(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Seleccionar events.csv", "", "CSV (*.csv)")
+        path, _ = QFileDialog.getOpenFileName(self, "Seleccionar events.csv", "",
+                                              "CSV (*.csv *.csv.gz *.csv.bz2 *.csv.xz)")
         if path:
             self.events_path = path
             self.events_file_btn.setText(f"📊 {Path(path).name}")
@@ -303,12 +438,21 @@ class DetailsPanel(QWidget):
         self.setLayout(layout)
         
     def show_process_details(self, process, state):
-        """Muestra detalles de un proceso"""
+        """
+        Muestra detalles de un proceso. Asignaciones, historial y tiempo
+        bloqueado salen de state.entity_history: el costo depende de lo
+        que se muestra, no del largo de la corrida.
+        """
         self.header_label.setText(f"Proceso: {process.pid}")
+        history = state.entity_history
+        pid = process.pid
+        related = history.related_resources(pid)
+        held = [(rid, state.allocation.get((pid, rid), 0)) for rid in related]
+        waiting = [(rid, state.requests.get((pid, rid), 0)) for rid in related]
         
         # Información general
         info_html = f"""
-        <h3>Proceso {process.pid}</h3>
+        <h3>Proceso {pid}</h3>
         <p><b>Prioridad:</b> {process.priority}</p>
         <p><b>Trabajo realizado:</b> {process.work_done} unidades</p>
         <p><b>Estado:</b> {self.get_process_status(process, state)}</p>
@@ -318,38 +462,34 @@ class DetailsPanel(QWidget):
         """
         
         # Recursos asignados
-        for (pid, rid), amount in state.allocation.items():
-            if pid == process.pid and amount > 0:
+        for rid, amount in held:
+            if amount > 0:
                 info_html += f"<li>{rid}: {amount} instancias</li>"
         
         info_html += "</ul><h4>Solicitudes pendientes:</h4><ul>"
         
         # Solicitudes pendientes
-        for (pid, rid), amount in state.requests.items():
-            if pid == process.pid and amount > 0:
+        for rid, amount in waiting:
+            if amount > 0:
                 info_html += f"<li>{rid}: {amount} instancias</li>"
                 
         info_html += "</ul>"
         self.info_text.setHtml(info_html)
         
-        # Historial del proceso
+        # Historial del proceso (últimos 10 registros)
         self.history_list.clear()
-        if hasattr(state, 'event_history'):
-            process_events = [event for event in state.event_history if process.pid in event]
-            for event in process_events[-10:]:  # Últimos 10 eventos
-                self.history_list.addItem(f"• {event}")
-        else:
-            events = ["Inicio del proceso", "Solicitud de recursos", "Ejecución", "Liberación"]
-            for event in events:
-                self.history_list.addItem(f"• {event}")
+        for entry in history.process_history(pid, 10):
+            self.history_list.addItem(f"• {entry.describe()}")
             
         # Estadísticas
-        blocked_time = len([t for t in range(state.tick) if process.pid in state.blocked_processes])
+        blocked_time = history.blocked_ticks(pid, state.tick)
+        if pid in state.aborted_processes:
+            blocked_time = f"{blocked_time} (hasta el aborto)"
         efficiency = (process.work_done / max(1, state.tick)) * 100
-        resources_used = sum(amount for (pid, rid), amount in state.allocation.items() if pid == process.pid)
+        resources_used = sum(amount for _, amount in held)
         
         stats_html = f"""
-        <h3>Estadísticas de {process.pid}</h3>
+        <h3>Estadísticas de {pid}</h3>
         <p><b>Eficiencia:</b> {efficiency:.1f}%</p>
         <p><b>Ticks bloqueado:</b> {blocked_time}</p>
         <p><b>Recursos utilizados:</b> {resources_used}</p>
@@ -359,13 +499,16 @@ class DetailsPanel(QWidget):
         self.stats_text.setHtml(stats_html)
         
     def show_resource_details(self, resource, state):
-        """Muestra detalles de un recurso"""
+        """Muestra detalles de un recurso (ver show_process_details)"""
         self.header_label.setText(f"Recurso: {resource.rid}")
+        history = state.entity_history
+        rid = resource.rid
+        related = history.related_processes(rid)
         
         usage_rate = ((resource.total_instances - resource.available_instances) / resource.total_instances) * 100
         
         info_html = f"""
-        <h3>Recurso {resource.rid}</h3>
+        <h3>Recurso {rid}</h3>
         <p><b>Instancias totales:</b> {resource.total_instances}</p>
         <p><b>Disponibles:</b> {resource.available_instances}</p>
         <p><b>En uso:</b> {resource.total_instances - resource.available_instances}</p>
@@ -375,8 +518,9 @@ class DetailsPanel(QWidget):
         <ul>
         """
         
-        for (pid, rid), amount in state.allocation.items():
-            if rid == resource.rid and amount > 0:
+        for pid in related:
+            amount = state.allocation.get((pid, rid), 0)
+            if amount > 0:
                 info_html += f"<li>{pid}: {amount} instancias</li>"
                 
         info_html += "</ul>"
@@ -384,18 +528,17 @@ class DetailsPanel(QWidget):
         
         # Historial del recurso
         self.history_list.clear()
-        if hasattr(state, 'event_history'):
-            resource_events = [event for event in state.event_history if resource.rid in event]
-            for event in resource_events[-10:]:
-                self.history_list.addItem(f"• {event}")
+        for entry in history.resource_history(rid, 10):
+            self.history_list.addItem(f"• {entry.describe()}")
                 
         # Estadísticas del recurso
+        waiting = sum(1 for pid in related if state.requests.get((pid, rid), 0) > 0)
         stats_html = f"""
-        <h3>Estadísticas de {resource.rid}</h3>
+        <h3>Estadísticas de {rid}</h3>
         <p><b>Disponibilidad:</b> {resource.available_instances}/{resource.total_instances}</p>
         <p><b>Tasa de uso:</b> {usage_rate:.1f}%</p>
-        <p><b>Procesos en espera:</b> {len([pid for pid in state.blocked_processes])}</p>
-        <p><b>Conflictos detectados:</b> {len([e for e in state.event_history if 'interbloqueo' in e.lower()])}</p>
+        <p><b>Procesos en espera:</b> {waiting}</p>
+        <p><b>Conflictos detectados:</b> {history.count("DETECT")}</p>
         """
         self.stats_text.setHtml(stats_html)
         
@@ -405,7 +548,7 @@ class DetailsPanel(QWidget):
         
         # Calcular métricas
         total_processes = len(state.processes)
-        blocked_processes = len(state.blocked_processes)
+        blocked_processes = len(state.waiting_processes())
         aborted_processes = len(getattr(state, 'aborted_processes', set()))
         
         # Calcular uso de recursos
@@ -441,17 +584,18 @@ class DetailsPanel(QWidget):
         
         # Actualizar historial con eventos recientes
         self.history_list.clear()
-        if hasattr(state, 'event_history'):
-            for event in state.event_history[-15:]:  # Últimos 15 eventos
-                self.history_list.addItem(f"• {event}")
-        else:
+        recent = state.event_history.recent(15)  # Últimos 15 eventos
+        for event in recent:
+            self.history_list.addItem(f"• {event}")
+        if not recent:
             self.history_list.addItem("• Sistema iniciado")
             self.history_list.addItem("• Esperando eventos...")
             
         # Mostrar estadísticas del sistema
-        deadlock_count = len([e for e in state.event_history if 'interbloqueo' in e.lower()])
-        requests_count = len([e for e in state.event_history if 'REQUEST' in e])
-        compute_count = len([e for e in state.event_history if 'COMPUTE' in e])
+        history = state.entity_history
+        deadlock_count = history.count("DETECT")
+        requests_count = history.count("GRANT", "BLOCK")
+        compute_count = history.count("COMPUTE")
         
         stats_html = f"""
         <h3>Métricas del Sistema</h3>
@@ -474,112 +618,6 @@ class DetailsPanel(QWidget):
             return "✅ Activo"
 
 
-class AnimatedGraph(FigureCanvas):
-    """Canvas de gráfico con animaciones simplificadas"""
-    def __init__(self, parent=None):
-        self.fig = Figure(figsize=(8, 6))
-        super().__init__(self.fig)
-        self.setParent(parent)
-        
-        self.ax = self.fig.add_subplot(111)
-        self.animation_timer = QTimer()
-        self.animation_timer.timeout.connect(self.update_animation)
-        self.animation_phase = 0
-        self.current_state = None
-        
-    def update_animation(self):
-        """Actualiza la animación"""
-        self.animation_phase += 0.1
-        self.draw_graph(self.current_state)
-        
-    def start_animation(self):
-        """Inicia la animación"""
-        self.animation_timer.start(100)  # 10 FPS
-        
-    def stop_animation(self):
-        """Detiene la animación"""
-        self.animation_timer.stop()
-        
-    def draw_graph(self, state=None):
-        """Dibuja el grafo con animaciones simples"""
-        self.ax.clear()
-        
-        if not state:
-            self.ax.text(0.5, 0.5, 'Cargue la configuración\npara ver el grafo', 
-                        ha='center', va='center', transform=self.ax.transAxes, fontsize=12)
-            self.ax.set_title('Grafo de Espera')
-            self.draw()
-            return
-            
-        graph = build_wait_for_graph(state)
-        self.current_state = state
-        
-        G = nx.DiGraph()
-        for pid in state.processes.keys():
-            G.add_node(pid)
-            
-        # Construir aristas del grafo
-        for pid, deps in graph.items():
-            for dep in deps:
-                G.add_edge(pid, dep)
-                
-        if len(G.nodes()) == 0:
-            self.ax.text(0.5, 0.5, 'No hay procesos en el sistema', 
-                        ha='center', va='center', transform=self.ax.transAxes)
-            self.draw()
-            return
-            
-        pos = nx.spring_layout(G, seed=42, k=2, iterations=50)
-        
-        # Dibujar nodos con animación simple
-        node_colors = []
-        node_sizes = []
-        
-        for node_id in G.nodes():
-            # Efecto de pulso para nodos bloqueados
-            pulse = 1.0
-            if node_id in state.blocked_processes:
-                pulse = 1.2 + 0.3 * abs(self.animation_phase % 1 - 0.5)  # Pulso entre 1.2 y 1.5
-                color = "#dc3545"  # Rojo para bloqueados
-            elif hasattr(state, 'aborted_processes') and node_id in state.aborted_processes:
-                color = "#6c757d"  # Gris para abortados
-            else:
-                color = "#28a745"  # Verde para activos
-                
-            node_colors.append(color)
-            node_sizes.append(2000 * pulse)
-                
-        nx.draw_networkx_nodes(G, pos, node_color=node_colors, 
-                              node_size=node_sizes, alpha=0.9,
-                              edgecolors="black", linewidths=2, ax=self.ax)
-        
-        # Dibujar etiquetas de nodos
-        nx.draw_networkx_labels(G, pos, font_size=10, font_weight="bold", 
-                               font_color="white", ax=self.ax)
-        
-        # Dibujar aristas con efecto de flujo
-        edge_colors = []
-        for edge in G.edges():
-            # Efecto de flujo en las aristas
-            alpha = 0.5 + 0.5 * abs(self.animation_phase % 1 - 0.5)
-            edge_colors.append((0.4, 0.4, 0.4, alpha))
-        
-        nx.draw_networkx_edges(G, pos, arrows=True, arrowstyle='->',
-                              arrowsize=20, edge_color="#6c757d", width=2,
-                              connectionstyle="arc3,rad=0.1", ax=self.ax)
-        
-        self.ax.set_title("Grafo de Espera (Wait-For Graph) - En Tiempo Real", 
-                         fontweight='bold', pad=20)
-        self.ax.axis("off")
-        
-        # Añadir leyenda de estados
-        legend_text = "🟢 Activo  🟡 Bloqueado  🔴 Crítico"
-        self.ax.text(0.02, 0.02, legend_text, transform=self.ax.transAxes,
-                    bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8))
-        
-        self.draw()
-
-
 class DeadlockGUI(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -587,12 +625,40 @@ class DeadlockGUI(QMainWindow):
         self.resize(1400, 900)
         
         # Estado del sistema
+        # Durante una ejecución self.state apunta a la última copia recibida
+        # del hilo de simulación; el estado vivo lo tiene self.worker.
         self.state = None
         self.events = []
+        self.config_path = ""
+        self.event_index = 0
+        self.worker = None
+        self.generator = None
+        # Escenarios generados: carpeta temporal de la sesión (se borra al
+        # cerrar) y el par config/eventos cargado, que se borra al generar otro
+        self.scenario_dir = None
+        self.generated_files = ()
+        # Grabación de la corrida para la línea de tiempo. Mientras se mira
+        # un tick anterior, self.state es una copia y el estado vivo queda
+        # en self.live_state.
+        self.timeline = None
+        self.live_state = None
+        self.log_store = LogStore()
+        self.pending_log = []
+        self.log_flush_timer = QTimer(self)
+        self.log_flush_timer.setSingleShot(True)
+        self.log_flush_timer.setInterval(LOG_FLUSH_MS)
+        self.log_flush_timer.timeout.connect(self.flush_log)
+        self.timeline_timer = QTimer(self)
+        self.timeline_timer.setSingleShot(True)
+        self.timeline_timer.setInterval(TIMELINE_REDRAW_MS)
+        self.timeline_timer.timeout.connect(self.show_timeline_tick)
+        self.hover_node = None
         self.current_theme = "light"
         self.details_panel_visible = True
         self.animation_enabled = True
-        self.full_log_text = ""
+        # Se crean en init_charts, después del primer pintado de la ventana
+        self.states_chart = self.usage_chart = self.graph_canvas = None
+        self.charts_scheduled = False
         
         # Configurar interfaz
         self.setup_ui()
@@ -634,6 +700,13 @@ class DeadlockGUI(QMainWindow):
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Listo")
+
+        # Progreso de la simulación en segundo plano
+        self.run_progress = QProgressBar()
+        self.run_progress.setMaximumWidth(250)
+        self.run_progress.setFormat("%v / %m eventos")
+        self.run_progress.setVisible(False)
+        self.status_bar.addPermanentWidget(self.run_progress)
         
     def setup_toolbar(self):
         """Configura la barra de herramientas"""
@@ -653,6 +726,11 @@ class DeadlockGUI(QMainWindow):
         self.step_btn.clicked.connect(self.step_simulation)
         toolbar.addWidget(self.step_btn)
 
+        self.stop_btn = QPushButton("⏹ Detener")
+        self.stop_btn.clicked.connect(self.stop_simulation)
+        self.stop_btn.setEnabled(False)
+        toolbar.addWidget(self.stop_btn)
+
         self.reset_btn = QPushButton("🔄 Reiniciar")
         self.reset_btn.clicked.connect(self.reset_simulation)
         toolbar.addWidget(self.reset_btn)
@@ -678,47 +756,32 @@ class DeadlockGUI(QMainWindow):
         
     def setup_interactive_elements(self):
         """Conecta elementos interactivos para el panel de detalles"""
-        # Conectar clics en el grafo
-        self.graph_canvas.mpl_connect('button_press_event', self.on_graph_click)
+        # Los clics en el grafo se conectan en init_charts
         
         # Conectar doble clic en el registro de eventos
-        self.log_box.mouseDoubleClickEvent = self.on_log_double_click
+        self.log_box.doubleClicked.connect(self.on_log_double_click)
 
     def setup_event_filters(self):
-        """Configura los filtros de eventos"""
+        """Configura los filtros de eventos (la búsqueda espera a que se deje de escribir)"""
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.filter_events)
         self.event_filter.currentTextChanged.connect(self.filter_events)
-        self.search_box.textChanged.connect(self.filter_events)
+        self.search_box.textChanged.connect(self.search_timer.start)
         
     def on_graph_click(self, event):
         """Maneja clics en el grafo para mostrar detalles"""
         if not self.state or not event.inaxes:
             return
             
-        # Buscar el nodo más cercano al clic
-        graph = build_wait_for_graph(self.state)
-        G = nx.DiGraph()
-        
-        for pid in self.state.processes.keys():
-            G.add_node(pid)
-            
-        for pid, deps in graph.items():
-            for dep in deps:
-                G.add_edge(pid, dep)
-                
-        if len(G.nodes()) == 0:
+        # Buscar el nodo bajo el clic en el índice del grafo ya dibujado
+        selected_node = self.graph_canvas.node_at(event.x, event.y)
+
+        # Grafo grande: abrir un grupo o volver a la vista general
+        if self.graph_canvas.drill_down(selected_node):
+            self.graph_canvas.draw_graph(self.state)
             return
-            
-        pos = nx.spring_layout(G, seed=42, k=2, iterations=50)
-        
-        # Encontrar el nodo más cercano
-        min_dist = float('inf')
-        selected_node = None
-        
-        for node, (x, y) in pos.items():
-            dist = ((x - event.xdata) ** 2 + (y - event.ydata) ** 2) ** 0.5
-            if dist < min_dist and dist < 0.1:  # Umbral de selección
-                min_dist = dist
-                selected_node = node
                 
         if selected_node:
             # Mostrar detalles del proceso seleccionado
@@ -727,85 +790,91 @@ class DeadlockGUI(QMainWindow):
                 self.details_panel.show_process_details(process, self.state)
                 self.status_bar.showMessage(f"Mostrando detalles de {selected_node}", 3000)
 
-    def on_log_double_click(self, event):
-        """Maneja doble clic en el registro para buscar detalles"""
-        # Buscar nombres de procesos o recursos en el texto seleccionado
-        cursor = self.log_box.textCursor()
-        selected_text = cursor.selectedText().strip()
-        
-        if not selected_text:
+    def on_graph_hover(self, event):
+        """Muestra un tooltip con el resumen del proceso bajo el mouse"""
+        node = None
+        if self.state and event.inaxes:
+            node = self.graph_canvas.node_at(event.x, event.y)
+        if node == self.hover_node:
             return
-            
-        # Buscar si es un proceso
-        if selected_text.startswith('P') and selected_text[1:].isdigit():
-            process_id = selected_text
-            process = self.state.processes.get(process_id)
+        self.hover_node = node
+        process = self.state.processes.get(node) if node else None
+        group = self.graph_canvas.view_node(node)
+        if process is None and group is not None and group.is_group:
+            title = group.label.replace("\n", " ")
+            QToolTip.showText(QCursor.pos(), f"<b>{title}</b><br>Clic para ver sus procesos",
+                              self.graph_canvas)
+            return
+        if process is None:
+            QToolTip.hideText()
+            return
+        status = self.details_panel.get_process_status(process, self.state)
+        QToolTip.showText(
+            QCursor.pos(),
+            f"<b>{process.pid}</b> {status}<br>Prioridad: {process.priority}"
+            f" · Trabajo: {process.work_done}",
+            self.graph_canvas,
+        )
+
+    def on_log_double_click(self, index):
+        """Muestra los detalles del primer proceso (o recurso) que menciona la línea"""
+        if not self.state or not index.isValid():
+            return
+        entities = self.log_store.entities_of(self.log_model.line_at(index.row()))
+        for entity in entities:
+            process = self.state.processes.get(entity)
             if process:
                 self.details_panel.show_process_details(process, self.state)
-                self.status_bar.showMessage(f"Mostrando detalles de {process_id}", 3000)
+                self.status_bar.showMessage(f"Mostrando detalles de {entity}", 3000)
                 return
-                
-        # Buscar si es un recurso  
-        if selected_text.startswith('R') and selected_text[1:].isdigit():
-            resource_id = selected_text
-            resource = self.state.resources.get(resource_id)
+        for entity in entities:
+            resource = self.state.resources.get(entity)
             if resource:
                 self.details_panel.show_resource_details(resource, self.state)
-                self.status_bar.showMessage(f"Mostrando detalles de {resource_id}", 3000)
+                self.status_bar.showMessage(f"Mostrando detalles de {entity}", 3000)
                 return
-                
-        # Si no se encontró un proceso o recurso específico, buscar en el texto
-        words = selected_text.split()
-        for word in words:
-            if word.startswith('P') and word[1:].isdigit():
-                process = self.state.processes.get(word)
-                if process:
-                    self.details_panel.show_process_details(process, self.state)
-                    self.status_bar.showMessage(f"Mostrando detalles de {word}", 3000)
-                    return
-            elif word.startswith('R') and word[1:].isdigit():
-                resource = self.state.resources.get(word)
-                if resource:
-                    self.details_panel.show_resource_details(resource, self.state)
-                    self.status_bar.showMessage(f"Mostrando detalles de {word}", 3000)
-                    return
+
+    def save_log(self):
+        """Guarda el registro completo de la ejecución"""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Guardar registro", "registro.log",
+            "Registro (*.log *.txt *.log.gz *.log.xz);;Todos los archivos (*)")
+        if not path:
+            return
+        self.flush_log()
+        try:
+            self.log_store.save(path)
+            self.status_bar.showMessage(f"💾 Registro guardado en {path}", 3000)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Error guardando el registro: {str(e)}")
+
+    def fit_log_width(self):
+        """Ajusta el ancho de la columna a la línea más larga (scroll horizontal)"""
+        metrics = QFontMetrics(self.log_box.font())
+        width = max(self.log_box.viewport().width(),
+                    metrics.averageCharWidth() * (self.log_store.longest + 2))
+        if width != self.log_box.columnWidth(0):
+            self.log_box.setColumnWidth(0, width)
 
     def filter_events(self):
         """Filtra el registro de eventos según los criterios seleccionados"""
-        if not self.full_log_text:
-            return
-            
+        self.search_timer.stop()
         filter_type = self.event_filter.currentText()
-        search_text = self.search_box.text().lower()
-        
-        lines = self.full_log_text.split('\n')
-        filtered_lines = []
-        
-        for line in lines:
-            include_line = True
-            
-            # Filtrar por tipo
-            if filter_type != "Todos":
-                if filter_type == "REQUEST" and "REQUEST" not in line:
-                    include_line = False
-                elif filter_type == "RELEASE" and "RELEASE" not in line:
-                    include_line = False
-                elif filter_type == "COMPUTE" and "COMPUTE" not in line:
-                    include_line = False
-                elif filter_type == "DEADLOCK" and "interbloqueo" not in line.lower():
-                    include_line = False
-                elif filter_type == "ABORT" and "abort" not in line.lower():
-                    include_line = False
-                    
-            # Filtrar por texto de búsqueda
-            if include_line and search_text:
-                if search_text not in line.lower():
-                    include_line = False
-                    
-            if include_line:
-                filtered_lines.append(line)
-                
-        self.log_box.setPlainText('\n'.join(filtered_lines))
+        kind = None if filter_type == "Todos" else filter_type
+        self.log_model.set_filter(kind, self.search_box.text())
+        self.fit_log_width()
+
+    def append_log(self, lines, classified=None):
+        """Agrega líneas al registro; si la vista estaba al final, la sigue."""
+        if not lines:
+            return
+        bar = self.log_box.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum()
+        start = self.log_store.extend(lines, classified)
+        self.log_model.lines_added(start, len(self.log_store))
+        self.fit_log_width()
+        if at_bottom:
+            self.log_box.scrollToBottom()
         
     def create_left_panel(self):
         """Crea el panel izquierdo con controles y visualizaciones"""
@@ -816,6 +885,9 @@ class DeadlockGUI(QMainWindow):
         control_panel = self.create_control_panel()
         layout.addWidget(control_panel)
         
+        # Línea de tiempo de la corrida
+        layout.addWidget(self.create_timeline_bar())
+        
         # Splitter para visualizaciones
         vis_splitter = QSplitter(Qt.Vertical)
         
@@ -869,6 +941,25 @@ class DeadlockGUI(QMainWindow):
         
         return panel
         
+    def create_timeline_bar(self):
+        """Crea el control deslizante para recorrer la corrida tick por tick"""
+        panel = QWidget()
+        layout = QHBoxLayout(panel)
+        layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.timeline_slider = QSlider(Qt.Horizontal)
+        self.timeline_slider.setRange(0, 0)
+        self.timeline_slider.setEnabled(False)
+        self.timeline_slider.valueChanged.connect(self.on_timeline_moved)
+        self.timeline_label = QLabel("Tick 0 / 0")
+        self.timeline_label.setMinimumWidth(120)
+        
+        layout.addWidget(QLabel("⏱ Línea de tiempo:"))
+        layout.addWidget(self.timeline_slider, 1)
+        layout.addWidget(self.timeline_label)
+        
+        return panel
+        
     def create_top_charts(self):
         """Crea los gráficos superiores"""
         panel = QWidget()
@@ -876,23 +967,59 @@ class DeadlockGUI(QMainWindow):
         
         # Gráfico de estados
         states_group = QGroupBox("📈 Distribución de Estados")
-        states_layout = QVBoxLayout()
-        self.states_canvas = FigureCanvas(Figure(figsize=(6, 4)))
-        states_layout.addWidget(self.states_canvas)
-        states_group.setLayout(states_layout)
+        self.states_layout = QVBoxLayout()
+        self.states_layout.addWidget(self.chart_placeholder())
+        states_group.setLayout(self.states_layout)
         
         # Gráfico de recursos
         usage_group = QGroupBox("📊 Uso de Recursos")
-        usage_layout = QVBoxLayout()
-        self.usage_canvas = FigureCanvas(Figure(figsize=(6, 4)))
-        usage_layout.addWidget(self.usage_canvas)
-        usage_group.setLayout(usage_layout)
+        self.usage_layout = QVBoxLayout()
+        self.usage_layout.addWidget(self.chart_placeholder())
+        usage_group.setLayout(self.usage_layout)
         
         layout.addWidget(states_group)
         layout.addWidget(usage_group)
         
         return panel
         
+    def chart_placeholder(self):
+        """Etiqueta que ocupa el lugar de un gráfico hasta que se carga Matplotlib"""
+        label = QLabel("Cargando gráficos...")
+        label.setAlignment(Qt.AlignCenter)
+        label.setMinimumHeight(200)
+        return label
+        
+    def init_charts(self):
+        """
+        Crea los gráficos y el grafo (importa Matplotlib la primera vez).
+        Se llama después del primer pintado de la ventana y, por las dudas,
+        antes de cualquier uso de los gráficos; las llamadas siguientes no
+        hacen nada.
+        """
+        if self.graph_canvas is not None:
+            return
+        import charts
+        
+        self.states_chart = charts.StatesChart()
+        self.usage_chart = charts.UsageChart()
+        self.graph_canvas = charts.AnimatedGraph()
+        for layout, canvas in ((self.states_layout, self.states_chart.canvas),
+                               (self.usage_layout, self.usage_chart.canvas),
+                               (self.graph_layout, self.graph_canvas)):
+            placeholder = layout.takeAt(0).widget()
+            placeholder.deleteLater()
+            layout.addWidget(canvas)
+        
+        # Conectar clics en el grafo
+        self.graph_canvas.mpl_connect('button_press_event', self.on_graph_click)
+        self.graph_canvas.mpl_connect('motion_notify_event', self.on_graph_hover)
+        
+        self.states_chart.update(self.state)
+        self.usage_chart.update(self.state)
+        self.graph_canvas.draw_graph(self.state)
+        if self.state and self.animation_enabled:
+            self.graph_canvas.start_animation()
+        
     def create_bottom_panel(self):
         """Crea el panel inferior con grafo y registro"""
         panel = QWidget()
@@ -900,10 +1027,9 @@ class DeadlockGUI(QMainWindow):
         
         # Grafo animado
         graph_group = QGroupBox("🕸️ Grafo de Espera en Tiempo Real")
-        graph_layout = QVBoxLayout()
-        self.graph_canvas = AnimatedGraph()
-        graph_layout.addWidget(self.graph_canvas)
-        graph_group.setLayout(graph_layout)
+        self.graph_layout = QVBoxLayout()
+        self.graph_layout.addWidget(self.chart_placeholder())
+        graph_group.setLayout(self.graph_layout)
         
         # Registro con filtros
         log_group = QGroupBox("📝 Registro de Eventos")
@@ -914,17 +1040,37 @@ class DeadlockGUI(QMainWindow):
         self.event_filter = QComboBox()
         self.event_filter.addItems(["Todos", "REQUEST", "RELEASE", "COMPUTE", "DEADLOCK", "ABORT"])
         self.search_box = QLineEdit()
-        self.search_box.setPlaceholderText("Buscar en registro...")
+        self.search_box.setPlaceholderText("Buscar en registro (texto o id exacto)...")
         
         filter_layout.addWidget(QLabel("Filtrar:"))
         filter_layout.addWidget(self.event_filter)
         filter_layout.addWidget(self.search_box)
         filter_layout.addStretch()
+        self.save_log_btn = QPushButton("💾 Guardar")
+        self.save_log_btn.setToolTip("Guardar el registro completo (la vista muestra solo las líneas más recientes)")
+        self.save_log_btn.clicked.connect(self.save_log)
+        filter_layout.addWidget(self.save_log_btn)
         
         log_layout.addLayout(filter_layout)
         
-        self.log_box = QTextEdit()
+        # Lista virtual: solo se dibujan las líneas visibles. Se usa una tabla
+        # de una columna con filas de alto fijo porque, a diferencia de
+        # QListView, no recalcula la posición de cada fila al agregar líneas.
+        self.log_model = LogListModel(self.log_store, self)
+        self.log_box = QTableView()
+        self.log_box.setModel(self.log_model)
         self.log_box.setFont(QFont("Consolas", 9))
+        self.log_box.setShowGrid(False)
+        self.log_box.setWordWrap(False)
+        self.log_box.setTextElideMode(Qt.ElideNone)
+        self.log_box.setHorizontalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.log_box.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.log_box.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.log_box.horizontalHeader().hide()
+        rows_header = self.log_box.verticalHeader()
+        rows_header.hide()
+        rows_header.setSectionResizeMode(QHeaderView.Fixed)
+        rows_header.setDefaultSectionSize(QFontMetrics(self.log_box.font()).height() + 2)
         log_layout.addWidget(self.log_box)
         
         log_group.setLayout(log_layout)
@@ -944,76 +1090,95 @@ class DeadlockGUI(QMainWindow):
                     self.load_config_file(dialog.config_path)
                     self.load_events_file(dialog.events_path)
             elif mode_index == 1:  # Manual
+                seed = dialog.seed_edit.text().strip()
+                if seed and not seed.isdigit():
+                    QMessageBox.warning(self, "Advertencia", "La semilla debe ser un número entero.")
+                    return
                 self.generate_manual_config(
                     dialog.process_count.value(),
                     dialog.resource_count.value(),
-                    dialog.event_count.value()
+                    dialog.event_count.value(),
+                    dialog.pattern_combo.currentText(),
+                    int(seed) if seed else None,
+                    dialog.deadlock_prob.value(),
                 )
             else:  # Automático
                 self.generate_auto_config()
                 
-    def generate_manual_config(self, process_count, resource_count, event_count):
-        """Genera configuración manual"""
-        # Crear configuración básica
-        config = {
-            "mode": "deteccion",
-            "victim_policy": "menor_trabajo_hecho",
-            "detection_interval": 1,
-            "processes": [],
-            "resources": []
-        }
-        
-        # Generar procesos
-        for i in range(process_count):
-            config["processes"].append({"pid": f"P{i+1}", "priority": random.randint(1, 3)})
-            
-        # Generar recursos
-        for i in range(resource_count):
-            config["resources"].append({"rid": f"R{i+1}", "instances": random.randint(1, 3)})
-            
-        # Guardar configuración temporal
-        with open("temp_config.json", "w") as f:
-            json.dump(config, f, indent=2)
-            
-        self.load_config_file("temp_config.json")
-        
-        # Generar eventos aleatorios
-        events = []
-        event_types = ["REQUEST", "RELEASE", "COMPUTE"]
-        
-        for i in range(event_count):
-            event_type = random.choice(event_types)
-            process = random.choice(config["processes"])["pid"]
-            resource = random.choice(config["resources"])["rid"] if event_type != "COMPUTE" else ""
-            amount = random.randint(1, 2) if event_type != "COMPUTE" else random.randint(1, 3)
-            
-            events.append({
-                "type": event_type,
-                "process": process,
-                "resource": resource,
-                "amount_or_time": amount
-            })
-            
-        # Guardar eventos temporales
-        with open("temp_events.csv", "w", newline='') as f:
-            writer = csv.DictWriter(f, fieldnames=["type", "process", "resource", "amount_or_time"])
-            writer.writeheader()
-            writer.writerows(events)
-            
-        self.load_events_file("temp_events.csv")
+    def generate_manual_config(self, process_count, resource_count, event_count,
+                               pattern="aleatorio", seed=None, deadlock_probability=0.5):
+        """Genera un escenario con los parámetros del diálogo"""
+        self.start_generation(ScenarioSpec(
+            pattern=pattern,
+            processes=process_count,
+            resources=resource_count,
+            events=event_count,
+            seed=seed,
+            deadlock_probability=deadlock_probability,
+        ))
         
     def generate_auto_config(self):
         """Genera configuración automática"""
-        self.generate_manual_config(
-            random.randint(3, 6),
-            random.randint(2, 4),
-            random.randint(10, 20)
-        )
+        self.start_generation(random_spec())
+
+    def start_generation(self, spec):
+        """Genera el escenario en un hilo de trabajo (ver ScenarioWorker)"""
+        if self.is_running():
+            return
+        try:
+            spec.validate()
+        except ValueError as e:
+            QMessageBox.warning(self, "Advertencia", str(e))
+            return
+        if self.scenario_dir is None:
+            self.scenario_dir = tempfile.TemporaryDirectory(prefix="interbloqueos_")
+        self.generator = ScenarioWorker(spec, self.scenario_dir.name, self)
+        self.generator.progress.connect(self.on_run_progress)
+        self.generator.failed.connect(self.on_run_failed)
+        self.generator.generated.connect(self.on_scenario_generated)
+        self.set_running(True)
+        self.run_progress.setMaximum(max(1, spec.events))
+        self.run_progress.setValue(0)
+        self.status_bar.showMessage("⚙ Generando escenario...")
+        self.generator.start()
+
+    def on_scenario_generated(self, result):
+        generator = self.generator
+        self.generator = None
+        generator.wait()
+        self.set_running(False)
+        if result is None:
+            if generator.cancelled():
+                self.status_bar.showMessage("⏹ Generación cancelada", 5000)
+            return
+        config_path, events_path, spec, events = result
+        self.load_config_file(config_path)
+        if self.config_path != config_path:
+            remove_files((config_path, events_path))
+            return  # la configuración no se pudo cargar (ya se mostró el error)
+        remove_files(self.generated_files)
+        self.generated_files = (config_path, events_path)
+        self.events = events
+        self.event_index = 0
+        self.status_bar.showMessage(
+            f"✅ Escenario {spec.pattern} (semilla {spec.seed}): {len(events)} eventos en "
+            f"{Path(events_path).name}", 10000)
         
     def load_config_file(self, path):
         """Carga archivo de configuración"""
+        if self.is_running():
+            return
         try:
-            self.state = load_config(path)
+            state = load_config(path)
+            self.close_event_history()
+            self.state = state
+            self.config_path = path
+            self.event_index = 0
+            self.start_timeline()
+            self.init_charts()
+            self.graph_canvas.reset_view()
+            self.log_store.set_known_ids(list(self.state.processes) + list(self.state.resources))
+            self.clear_log()
             self.show_state()
             self.update_visualizations()
             if self.animation_enabled:
@@ -1026,55 +1191,179 @@ class DeadlockGUI(QMainWindow):
             QMessageBox.critical(self, "Error", f"Error cargando configuración: {str(e)}")
             
     def load_events_file(self, path):
-        """Carga archivo de eventos"""
+        """Carga archivo de eventos (validados contra la configuración cargada)"""
+        if self.is_running():
+            return
         try:
-            self.events = load_events(path)
+            self.events = load_events(path, self.state)
+            self.event_index = 0
             self.status_bar.showMessage("✅ Eventos cargados correctamente", 3000)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error cargando eventos: {str(e)}")
+
+    def is_running(self):
+        return any(worker is not None and worker.isRunning()
+                   for worker in (self.worker, self.generator))
+
+    def clear_log(self):
+        self.pending_log = []
+        self.log_store.clear()
+        self.log_model.reset()
+        self.fit_log_width()
+
+    def restart_state(self):
+        """Vuelve al estado inicial de la configuración cargada."""
+        if self.config_path:
+            self.close_event_history()
+            self.state = load_config(self.config_path)
+        self.event_index = 0
+        self.start_timeline()
+        self.clear_log()
             
     def run_sim(self):
-        """Ejecuta la simulación"""
+        """Ejecuta la simulación en un hilo de trabajo"""
         if not self.state or not self.events:
             QMessageBox.warning(self, "Advertencia", "Debe cargar configuración y eventos primero.")
             return
-            
-        # Limpiar registro anterior
-        self.log_box.clear()
-        
-        # Ejecutar simulación
-        buffer = io.StringIO()
-        with contextlib.redirect_stdout(buffer):
-            run_simulation(self.state, self.events)
-            
-        result = buffer.getvalue()
-        self.full_log_text = result.strip()
-        self.log_box.setPlainText(self.full_log_text)
+        if self.is_running():
+            return
+        self.leave_timeline()
+
+        # Si ya se consumieron todos los eventos, se vuelve a empezar
+        if self.event_index >= len(self.events):
+            self.restart_state()
+
+        self.worker = SimulationWorker(self.state, self.events, self.log_store.classifier,
+                                       self.event_index, self,
+                                       TeeTracer(self.state.entity_history, self.timeline))
+        self.worker.log_batch.connect(self.on_log_batch)
+        self.worker.progress.connect(self.on_run_progress)
+        self.worker.snapshot_ready.connect(self.on_snapshot)
+        self.worker.failed.connect(self.on_run_failed)
+        self.worker.finished_run.connect(self.on_run_finished)
+
+        self.set_running(True)
+        self.run_progress.setMaximum(len(self.events))
+        self.run_progress.setValue(self.event_index)
+        self.status_bar.showMessage("▶ Simulación en curso...")
+        self.worker.start()
+
+    def set_running(self, running):
+        self.run_btn.setEnabled(not running)
+        self.step_btn.setEnabled(not running)
+        self.load_config_btn.setEnabled(not running)
+        self.reset_btn.setEnabled(not running)
+        self.stop_btn.setEnabled(running)
+        self.run_progress.setVisible(running)
+        self.timeline_slider.setEnabled(
+            not running and self.timeline_slider.maximum() > self.timeline_slider.minimum())
+
+    def stop_simulation(self):
+        """Cancela la ejecución en curso (se detiene entre eventos)"""
+        if self.generator is not None:
+            self.generator.cancel()
+        elif self.is_running():
+            self.worker.cancel()
+            self.status_bar.showMessage("Deteniendo simulación...")
+
+    def on_log_batch(self, lines, classified):
+        # Se acumula y se vuelca con el temporizador: un solo append por intervalo
+        self.pending_log.append((lines, classified))
+        if not self.log_flush_timer.isActive():
+            self.log_flush_timer.start()
+
+    def flush_log(self):
+        """Vuelca al registro los lotes pendientes del hilo de simulación"""
+        self.log_flush_timer.stop()
+        if not self.pending_log:
+            return
+        batches, self.pending_log = self.pending_log, []
+        if len(batches) == 1:
+            lines, classified = batches[0]
+        else:
+            lines = [line for batch, _ in batches for line in batch]
+            classified = [c for _, batch in batches for c in batch]
+        self.append_log(lines, classified)
+
+    def on_run_progress(self, done, total):
+        self.run_progress.setValue(done)
+
+    def on_snapshot(self, snapshot):
+        """Actualización periódica con una copia del estado del hilo de trabajo"""
+        self.state = snapshot
+        self.show_state()
+        self.update_visualizations()
+        if self.worker is not None:
+            self.worker.snapshot_consumed()
+
+    def on_run_failed(self, message):
+        QMessageBox.critical(self, "Error", message)
+
+    def on_run_finished(self, cancelled, next_index):
+        worker = self.worker
+        self.worker = None
+        worker.wait()
+        self.state = worker.state
+        self.event_index = next_index
+        if next_index >= len(self.events):
+            self.state.event_history.close()
+        else:
+            self.state.event_history.flush()
+        self.update_timeline_range()
+        self.set_running(False)
+
+        self.flush_log()
         self.show_state()
         self.update_visualizations()
         self.update_system_health()
         
         # Actualizar panel de detalles
         self.details_panel.show_system_overview(self.state)
+        if cancelled:
+            self.status_bar.showMessage(
+                f"⏹ Simulación detenida en el evento {next_index}/{len(self.events)}", 5000)
+        else:
+            self.status_bar.showMessage("✅ Simulación completada", 3000)
         
     def step_simulation(self):
-        """Ejecuta un solo paso de la simulación"""
+        """Ejecuta un solo evento de la simulación"""
         if not self.state or not self.events:
             QMessageBox.warning(self, "Advertencia", "Debe cargar configuración y eventos primero.")
             return
-            
-        # Implementación básica de paso a paso
-        # En una implementación real, esto ejecutaría solo un evento a la vez
-        self.status_bar.showMessage("Modo paso a paso: ejecutando siguiente evento...")
-        # Por ahora, simplemente ejecutamos la simulación completa
-        self.run_sim()
+        if self.is_running():
+            return
+        if self.event_index >= len(self.events):
+            self.status_bar.showMessage("No quedan eventos: use Reiniciar o Ejecutar", 3000)
+            return
+        self.leave_timeline()
+
+        # Un solo evento es barato: se ejecuta en el hilo de la interfaz
+        out = _LineCollector()
+        event = self.events[self.event_index]
+        with contextlib.redirect_stdout(out):
+            if self.event_index == 0:
+                print("\n=== INICIO DE LA SIMULACIÓN ===\n")
+            result = step(self.state, event, self.event_index,
+                          TeeTracer(self.state.entity_history, self.timeline))
+            self.state.event_history.record(self.state.tick, event, result)
+            self.event_index += 1
+            if self.event_index >= len(self.events):
+                print("\n=== FIN DE LA SIMULACIÓN ===")
+                show_summary(self.state)
+                self.state.event_history.close()
+        self.update_timeline_range()
+        self.append_log(out.take())
+        self.show_state()
+        self.update_visualizations()
+        self.details_panel.show_system_overview(self.state)
+        self.status_bar.showMessage(
+            f"Paso a paso: evento {self.event_index}/{len(self.events)}", 3000)
 
     def reset_simulation(self):
-        """Reinicia la simulación"""
-        self.state = None
-        self.events = []
-        self.log_box.clear()
-        self.full_log_text = ""
+        """Reinicia la simulación al estado inicial de la configuración"""
+        if self.is_running():
+            return
+        self.restart_state()
         self.update_visualizations()
         self.status_bar.showMessage("Simulación reiniciada")
         
@@ -1083,6 +1372,82 @@ class DeadlockGUI(QMainWindow):
         self.details_panel.info_text.clear()
         self.details_panel.history_list.clear()
         self.details_panel.stats_text.clear()
+        if self.state:
+            self.show_state()
+            self.details_panel.show_system_overview(self.state)
+
+    def start_timeline(self):
+        """Empieza a grabar la corrida desde el estado recién cargado"""
+        self.timeline_timer.stop()
+        self.live_state = None
+        self.timeline = RunTimeline(self.state) if self.state else None
+        self.update_timeline_range()
+
+    def update_timeline_range(self):
+        """Extiende el deslizador hasta el último tick y lo deja en el presente"""
+        first = self.timeline.first_tick if self.timeline else 0
+        last = self.state.tick if self.state else 0
+        self.timeline_slider.blockSignals(True)
+        self.timeline_slider.setRange(first, last)
+        self.timeline_slider.setValue(last)
+        self.timeline_slider.blockSignals(False)
+        self.timeline_slider.setEnabled(last > first and not self.is_running())
+        self.timeline_label.setText(f"Tick {last} / {last}")
+
+    def on_timeline_moved(self, tick):
+        # Al arrastrar llegan muchos valores: se redibuja como mucho cada
+        # TIMELINE_REDRAW_MS con el último
+        self.timeline_label.setText(f"Tick {tick} / {self.timeline_slider.maximum()}")
+        if not self.timeline_timer.isActive():
+            self.timeline_timer.start()
+
+    def show_timeline_tick(self):
+        """Muestra el estado del tick elegido en la línea de tiempo (sin volver a simular)"""
+        if self.timeline is None or self.is_running():
+            return
+        tick = self.timeline_slider.value()
+        if self.live_state is None:
+            self.live_state = self.state
+        if tick >= self.timeline_slider.maximum():
+            self.state, self.live_state = self.live_state, None
+        else:
+            self.state = self.timeline.state_at(tick)
+        self.show_state()
+        self.update_visualizations()
+
+    def leave_timeline(self):
+        """Vuelve al estado vivo si se estaba mirando un tick anterior"""
+        self.timeline_timer.stop()
+        if self.live_state is not None:
+            self.state, self.live_state = self.live_state, None
+        self.update_timeline_range()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.charts_scheduled:
+            # La ventana ya se pintó: Matplotlib se carga en la próxima vuelta del bucle
+            self.charts_scheduled = True
+            QTimer.singleShot(0, self.init_charts)
+
+    def closeEvent(self, event):
+        """Detiene el hilo de simulación antes de cerrar"""
+        for worker in (self.worker, self.generator):
+            if worker is not None and worker.isRunning():
+                worker.cancel()
+                worker.wait()
+        self.log_store.close()
+        self.close_event_history()
+        if self.scenario_dir is not None:
+            self.scenario_dir.cleanup()
+            self.scenario_dir = None
+        super().closeEvent(event)
+
+    def close_event_history(self):
+        """Cierra el archivo del historial general del escenario actual (si tiene)"""
+        # Los estados de la línea de tiempo y el vivo comparten el mismo historial
+        state = self.live_state or self.state
+        if state is not None:
+            state.event_history.close()
         
     def show_default_overview(self):
         """Muestra la visión general por defecto"""
@@ -1108,7 +1473,7 @@ class DeadlockGUI(QMainWindow):
             
         # Actualizar badges
         total_processes = len(self.state.processes)
-        blocked = len(self.state.blocked_processes)
+        blocked = len(self.state.waiting_processes())
         aborted = len(getattr(self.state, 'aborted_processes', set()))
         
         self.processes_badge.setText(f"Procesos: {total_processes}")
@@ -1123,7 +1488,7 @@ class DeadlockGUI(QMainWindow):
         if not self.state:
             return
             
-        blocked = len(self.state.blocked_processes)
+        blocked = len(self.state.waiting_processes())
         aborted = len(getattr(self.state, 'aborted_processes', set()))
         
         # Colores según el estado
@@ -1137,106 +1502,20 @@ class DeadlockGUI(QMainWindow):
         """Actualiza todas las visualizaciones"""
         if not self.state:
             return
+        self.init_charts()
             
-        self.update_states_chart()
-        self.update_usage_chart()
+        self.states_chart.update(self.state)
+        self.usage_chart.update(self.state)
         self.graph_canvas.draw_graph(self.state)
         self.update_system_health()
         
-    def update_states_chart(self):
-        """Actualiza el gráfico de estados"""
-        fig = self.states_canvas.figure
-        fig.clear()
-        
-        if not self.state:
-            ax = fig.add_subplot(111)
-            ax.text(0.5, 0.5, 'Cargue la configuración\npara ver los datos', 
-                   ha='center', va='center', transform=ax.transAxes, fontsize=12)
-            ax.set_title('Distribución de Estados de Procesos')
-            self.states_canvas.draw()
-            return
-            
-        # Calcular conteos de estados
-        active = 0
-        blocked = 0
-        aborted = 0
-        
-        for proc in self.state.processes.values():
-            if hasattr(self.state, 'aborted_processes') and proc.pid in self.state.aborted_processes:
-                aborted += 1
-            elif proc.pid in self.state.blocked_processes:
-                blocked += 1
-            else:
-                active += 1
-                
-        # Crear gráfico
-        ax = fig.add_subplot(111)
-        labels = ['Activos', 'Bloqueados', 'Abortados']
-        sizes = [active, blocked, aborted]
-        colors = ['#28a745', '#ffc107', '#dc3545']
-        
-        if sum(sizes) > 0:
-            wedges, texts, autotexts = ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
-                                            startangle=90, shadow=True)
-            for autotext in autotexts:
-                autotext.set_color('white')
-                autotext.set_fontweight('bold')
-        else:
-            ax.text(0.5, 0.5, 'No hay procesos', ha='center', va='center', transform=ax.transAxes)
-            
-        ax.set_title('Distribución de Estados de Procesos', fontweight='bold')
-        self.states_canvas.draw()
-        
-    def update_usage_chart(self):
-        """Actualiza el gráfico de uso de recursos"""
-        fig = self.usage_canvas.figure
-        fig.clear()
-        
-        if not self.state or not self.state.resources:
-            ax = fig.add_subplot(111)
-            ax.text(0.5, 0.5, 'Cargue la configuración\npara ver los datos', 
-                   ha='center', va='center', transform=ax.transAxes, fontsize=12)
-            ax.set_title('Uso de Recursos del Sistema')
-            self.usage_canvas.draw()
-            return
-            
-        # Preparar datos
-        resources = list(self.state.resources.keys())
-        total_instances = [r.total_instances for r in self.state.resources.values()]
-        available_instances = [r.available_instances for r in self.state.resources.values()]
-        used_instances = [total - available for total, available in zip(total_instances, available_instances)]
-        
-        ax = fig.add_subplot(111)
-        x = range(len(resources))
-        
-        # Barras
-        bars_used = ax.bar(x, used_instances, label='En Uso', color='#dc3545', alpha=0.8)
-        bars_avail = ax.bar(x, available_instances, bottom=used_instances, label='Disponibles', color='#28a745', alpha=0.8)
-        
-        # Personalización
-        ax.set_xlabel('Recursos')
-        ax.set_ylabel('Instancias')
-        ax.set_title('Uso de Recursos del Sistema', fontweight='bold')
-        ax.set_xticks(x)
-        ax.set_xticklabels(resources)
-        ax.legend()
-        
-        # Añadir valores en las barras
-        for i, (avail, used) in enumerate(zip(available_instances, used_instances)):
-            if used > 0:
-                ax.text(i, used/2, str(used), ha='center', va='center', fontweight='bold', color='white')
-            if avail > 0:
-                ax.text(i, used + avail/2, str(avail), ha='center', va='center', fontweight='bold', color='white')
-                
-        self.usage_canvas.draw()
-        
     def update_system_health(self):
         """Actualiza la salud del sistema"""
         if not self.state:
             return
             
         total_processes = len(self.state.processes)
-        blocked = len(self.state.blocked_processes)
+        blocked = len(self.state.waiting_processes())
         aborted = len(getattr(self.state, 'aborted_processes', set()))
         
         # Calcular salud del sistema (0-100%)
@@ -1313,7 +1592,7 @@ class DeadlockGUI(QMainWindow):
                 left: 10px;
                 padding: 0 5px 0 5px;
             }
-            QTextEdit, QTableWidget {
+            QTextEdit, QTableWidget, QTableView {
                 border: 1px solid #ced4da;
                 border-radius: 4px;
                 background-color: white;
@@ -1358,7 +1637,7 @@ class DeadlockGUI(QMainWindow):
                 padding: 0 5px 0 5px;
                 color: #adb5bd;
             }
-            QTextEdit, QTableWidget {
+            QTextEdit, QTableWidget, QTableView {
                 border: 1px solid #444c56;
                 border-radius: 4px;
                 background-color: #2d333b;
@@ -1404,7 +1683,7 @@ class DeadlockGUI(QMainWindow):
                 padding: 0 5px 0 5px;
                 color: #4b6584;
             }
-            QTextEdit, QTableWidget {
+            QTextEdit, QTableWidget, QTableView {
                 border: 1px solid #ced4da;
                 border-radius: 4px;
                 background-color: white;
@@ -1433,10 +1712,12 @@ class DeadlockGUI(QMainWindow):
         """Activa/desactiva las animaciones"""
         self.animation_enabled = not self.animation_enabled
         if self.animation_enabled:
-            self.graph_canvas.start_animation()
+            if self.graph_canvas is not None:
+                self.graph_canvas.start_animation()
             self.toggle_animation_btn.setText("✨ Animaciones: ON")
         else:
-            self.graph_canvas.stop_animation()
+            if self.graph_canvas is not None:
+                self.graph_canvas.stop_animation()
             self.toggle_animation_btn.setText("✨ Animaciones: OFF")
 
 
@@ -0,0 +1,247 @@
+"""
+Historial estructurado por proceso y por recurso, independiente de Qt.
+
+EntityHistory recibe las decisiones del motor con la misma interfaz que
+tracelog.TraceWriter (emit(kind, tick, pid, rid, amount, detail)), así
+que se pasa como `tracer` a sim.step. Por cada entidad guarda:
+
+    un anillo con sus últimos HISTORY_PER_ENTITY registros
+    los recursos (o procesos) con los que se cruzó, para leer de la
+    matriz de asignación/solicitudes solo esas claves
+    el tiempo bloqueado acumulado (ticks), para procesos
+
+Además cuenta los registros por tipo. Abrir los detalles de una entidad
+cuesta lo que se muestra, no lo que lleva la corrida: no hace falta
+recorrer el historial completo ni las matrices enteras.
+
+EventHistory es el historial general de eventos aplicados (el que muestra
+el panel de detalles): un anillo de EventRecord de tamaño fijo. Los
+registros que salen del anillo se descartan o, si se indica un archivo,
+se escriben en él como CSV; la memoria no crece con el largo de la
+corrida.
+"""
+import csv
+from collections import deque
+from typing import Deque, Dict, IO, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+
+# Registros que se guardan por entidad
+HISTORY_PER_ENTITY = 64
+
+# Eventos que conserva en memoria el historial general
+EVENT_HISTORY_SIZE = 10_000
+
+# Registros desalojados que se juntan antes de escribirlos al archivo
+SPILL_BATCH = 4096
+
+
+class HistoryEntry(NamedTuple):
+    tick: int
+    kind: str  # los tipos de tracelog: GRANT, BLOCK, RELEASE, DENY, COMPUTE, DETECT, ABORT
+    pid: Optional[str]
+    rid: Optional[str]
+    amount: int
+    detail: Optional[str]
+
+    def describe(self) -> str:
+        """Texto para mostrar en la GUI."""
+        kind, pid, rid, amount = self.kind, self.pid, self.rid, self.amount
+        if kind == "GRANT":
+            text = f"{pid} obtiene {amount} de {rid}"
+        elif kind == "BLOCK":
+            text = f"{pid} bloqueado esperando {amount} de {rid}"
+        elif kind == "RELEASE":
+            text = f"{pid} libera {amount} de {rid}"
+        elif kind == "DENY":
+            text = f"{pid} intentó liberar {amount} de {rid} (tenía {self.detail})"
+        elif kind == "COMPUTE":
+            text = f"{pid} trabaja {amount} unidad(es)"
+        elif kind == "DETECT":
+            text = f"interbloqueo entre {', '.join((self.detail or '').split())}"
+        elif kind == "ABORT":
+            text = f"{pid} abortado" + (f", libera {amount} de {rid}" if rid else "")
+        else:
+            text = f"{kind} {pid or ''} {rid or ''} {amount}"
+        return f"Tick {self.tick}: {text}"
+
+
+class EntityHistory:
+    """
+    Historial acotado por entidad más contadores. Lo llena el hilo que
+    ejecuta el motor y lo lee la GUI: las lecturas devuelven copias.
+    """
+
+    def __init__(self, per_entity: int = HISTORY_PER_ENTITY):
+        self.per_entity = per_entity
+        self.by_process: Dict[str, Deque[HistoryEntry]] = {}
+        self.by_resource: Dict[str, Deque[HistoryEntry]] = {}
+        # pid -> recursos que pidió alguna vez, y rid -> procesos que lo pidieron
+        self.resources_of: Dict[str, Set[str]] = {}
+        self.processes_of: Dict[str, Set[str]] = {}
+        self.counts: Dict[str, int] = {}
+        self._blocked_ticks: Dict[str, int] = {}
+        self._blocked_since: Dict[str, int] = {}
+
+    def _ring(self, rings: Dict[str, Deque[HistoryEntry]], key: str) -> Deque[HistoryEntry]:
+        ring = rings.get(key)
+        if ring is None:
+            ring = rings[key] = deque(maxlen=self.per_entity)
+        return ring
+
+    def emit(self, kind: str, tick: int, pid: Optional[str], rid: Optional[str] = None,
+             amount: int = 0, detail: Optional[str] = None) -> None:
+        entry = HistoryEntry(tick, kind, pid, rid, amount, detail)
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+
+        if kind == "DETECT":
+            # Sin pid: el registro va a cada proceso del ciclo
+            for member in (detail or "").split():
+                self._ring(self.by_process, member).append(entry)
+            return
+
+        if pid is not None:
+            self._ring(self.by_process, pid).append(entry)
+        if rid is not None:
+            self._ring(self.by_resource, rid).append(entry)
+            if pid is not None and kind in ("GRANT", "BLOCK"):
+                self.resources_of.setdefault(pid, set()).add(rid)
+                self.processes_of.setdefault(rid, set()).add(pid)
+
+        # Tiempo bloqueado: una asignación desbloquea (sim.handle_request) y
+        # un aborto también, aunque la víctima siga en blocked_processes
+        # (ver SystemState.waiting_processes)
+        if kind == "BLOCK":
+            self._blocked_since.setdefault(pid, tick)
+        elif kind in ("GRANT", "ABORT"):
+            since = self._blocked_since.pop(pid, None)
+            if since is not None:
+                self._blocked_ticks[pid] = self._blocked_ticks.get(pid, 0) + tick - since
+
+    def process_history(self, pid: str, limit: Optional[int] = None) -> List[HistoryEntry]:
+        """Últimos registros del proceso, del más viejo al más nuevo."""
+        return _tail(self.by_process.get(pid), limit)
+
+    def resource_history(self, rid: str, limit: Optional[int] = None) -> List[HistoryEntry]:
+        return _tail(self.by_resource.get(rid), limit)
+
+    def related_resources(self, pid: str) -> List[str]:
+        """Recursos que el proceso pidió alguna vez (ordenados)."""
+        return sorted(self.resources_of.get(pid, ()))
+
+    def related_processes(self, rid: str) -> List[str]:
+        return sorted(self.processes_of.get(rid, ()))
+
+    def blocked_ticks(self, pid: str, now: int) -> int:
+        """Ticks que el proceso pasó bloqueado hasta `now` (incluye el bloqueo en curso)."""
+        total = self._blocked_ticks.get(pid, 0)
+        since = self._blocked_since.get(pid)
+        if since is not None:
+            total += max(0, now - since)
+        return total
+
+    def count(self, *kinds: str) -> int:
+        return sum(self.counts.get(kind, 0) for kind in kinds)
+
+
+class EventRecord(NamedTuple):
+    tick: int
+    type: str  # REQUEST, RELEASE o COMPUTE
+    pid: str
+    rid: Optional[str]
+    amount: int
+    cycle: Tuple[str, ...] = ()  # procesos del interbloqueo detectado tras el evento
+    victim: Optional[str] = None
+
+    def __str__(self) -> str:
+        text = f"Tick {self.tick}: {self.type} {self.pid} {self.rid or ''}"
+        if self.victim is not None:
+            text += f" | interbloqueo entre {', '.join(self.cycle)}; {self.victim} abortado"
+        return text
+
+
+class EventHistory:
+    """
+    Últimos `capacity` eventos aplicados. Con `spill_path` los que salen
+    del anillo se agregan a ese archivo (CSV; .gz/.bz2/.xz se comprimen,
+    ver io_utils.open_output) en lotes de SPILL_BATCH; `close()` escribe
+    los desalojados que quedaban pendientes (los que siguen en el anillo
+    no van al archivo). Se configura desde config.json con
+    "event_history_size" y "event_history_spill".
+
+    Lo llena el hilo que ejecuta el motor y lo lee la GUI: las lecturas
+    devuelven copias.
+    """
+
+    SPILL_FIELDS = ("tick", "type", "process", "resource", "amount", "cycle", "victim")
+
+    def __init__(self, capacity: int = EVENT_HISTORY_SIZE, spill_path: Optional[str] = None):
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self.total = 0  # eventos registrados, incluidos los desalojados
+        self._ring: Deque[EventRecord] = deque(maxlen=capacity)
+        self._pending: List[EventRecord] = []
+        self._spill: Optional[IO[str]] = None
+        self._writer = None
+
+    def record(self, tick: int, event, result=None) -> EventRecord:
+        """
+        Registra `event` (models.Event) aplicado en `tick`; `result` es lo
+        que devuelve sim.step: (ciclo, víctima) o None.
+        """
+        cycle, victim = result if result else ((), None)
+        entry = EventRecord(tick, event.type, event.process_id, event.resource_id,
+                            event.amount_or_time, tuple(cycle), victim)
+        ring = self._ring
+        if self.spill_path is not None and len(ring) == self.capacity:
+            self._pending.append(ring[0])
+            if len(self._pending) >= SPILL_BATCH:
+                self.flush()
+        ring.append(entry)
+        self.total += 1
+        return entry
+
+    def __len__(self) -> int:
+        return len(self._ring)
+
+    def __iter__(self) -> Iterator[EventRecord]:
+        return iter(list(self._ring))
+
+    def recent(self, limit: Optional[int] = None) -> List[EventRecord]:
+        """Últimos registros en memoria, del más viejo al más nuevo."""
+        return _tail(self._ring, limit)
+
+    @property
+    def dropped(self) -> int:
+        """Registros que ya no están en memoria (descartados o en el archivo)."""
+        return self.total - len(self._ring)
+
+    def flush(self) -> None:
+        """Escribe al archivo los registros desalojados pendientes."""
+        if not self._pending:
+            return
+        if self._spill is None:
+            from io_utils import open_output  # io_utils importa models, que importa este módulo
+            self._spill = open_output(self.spill_path)
+            self._writer = csv.writer(self._spill)
+            self._writer.writerow(self.SPILL_FIELDS)
+        self._writer.writerows(
+            (r.tick, r.type, r.pid, r.rid or "", r.amount, " ".join(r.cycle), r.victim or "")
+            for r in self._pending
+        )
+        self._pending.clear()
+
+    def close(self) -> None:
+        """Escribe los desalojados pendientes y cierra el archivo."""
+        self.flush()
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+            self._writer = None
+
+
+def _tail(ring: Optional[Deque], limit: Optional[int]) -> list:
+    if not ring:
+        return []
+    # list() de un deque se hace de una vez: es seguro aunque el motor siga agregando
+    entries = list(ring)
+    return entries if limit is None else entries[-limit:]
@@ -1,16 +1,107 @@
+import bz2
+import gzip
+import io
 import json
 import csv
-from pathlib import Path
-from typing import List
+import lzma
+import os
+import sys
+from typing import Callable, Dict, IO, Iterable, Iterator, List, Optional, Tuple
+from detection import POLICIES, AdaptiveDetection, DEFAULT_MAX_INTERVAL, DEFAULT_MIN_INTERVAL
+from history import EVENT_HISTORY_SIZE, EventHistory
 from models import SystemState, Mode, Process, ResourceType, Event
 
 
+EVENT_TYPES = ("REQUEST", "RELEASE", "COMPUTE")
+
+# Tamaño de bloque para la lectura masiva de events.csv
+CHUNK_SIZE = 1 << 20
+
+# Máximo de filas distintas cuyo resultado se memoriza durante el parseo
+ROW_CACHE_SIZE = 1 << 16
+
+# Máximo de filas erróneas que se detallan en el mensaje de error
+MAX_REPORTED_ERRORS = 20
+
+
+# Buffer del lado comprimido: la descompresión trabaja con bloques grandes
+# y el parser recibe texto ya decodificado.
+COMPRESSED_BUFFER_SIZE = 1 << 20
+
+# Compresores soportados: extensión -> (módulo, firma al inicio del archivo)
+COMPRESSORS = {
+    ".gz": (gzip, b"\x1f\x8b"),
+    ".bz2": (bz2, b"BZh"),
+    ".xz": (lzma, b"\xfd7zXZ\x00"),
+    ".lzma": (lzma, b"\x5d\x00\x00"),
+}
+
+
+def detect_compression(path: str, sniff: bool):
+    """
+    Devuelve el módulo de compresión de `path` (gzip, bz2, lzma) o None.
+    Primero mira la extensión; si `sniff` es True y no coincide, revisa
+    los primeros bytes del archivo.
+    """
+    lower = str(path).lower()
+    for ext, (module, _) in COMPRESSORS.items():
+        if lower.endswith(ext):
+            return module
+    if sniff:
+        with open(path, "rb") as f:
+            head = f.read(6)
+        for module, magic in COMPRESSORS.values():
+            if head.startswith(magic):
+                return module
+    return None
+
+
+def open_text(path: str, encoding: str = "utf-8") -> IO[str]:
+    """
+    Abre `path` para lectura de texto, descomprimiendo en streaming si el
+    archivo es gzip, bz2 o lzma/xz (detectado por extensión o firma).
+    """
+    module = detect_compression(path, sniff=True)
+    if module is None:
+        return open(path, "r", newline="", encoding=encoding)
+    raw = io.BufferedReader(module.open(path, "rb"), COMPRESSED_BUFFER_SIZE)
+    return io.TextIOWrapper(raw, encoding=encoding, newline="")
+
+
+def open_output(path: str, encoding: str = "utf-8") -> IO[str]:
+    """
+    Abre `path` para escritura de texto; si la extensión es .gz, .bz2,
+    .xz o .lzma, la salida se comprime al vuelo con el formato
+    correspondiente.
+    """
+    module = detect_compression(path, sniff=False)
+    if module is None:
+        return open(path, "w", newline="", encoding=encoding)
+    raw = io.BufferedWriter(module.open(path, "wb"), COMPRESSED_BUFFER_SIZE)
+    return io.TextIOWrapper(raw, encoding=encoding, newline="")
+
+
+class EventFormatError(ValueError):
+    """
+    Error de formato o de referencias en events.csv.
+    `errors` contiene tuplas (número de línea, descripción); con
+    unit="evento" el número es el índice del evento (bintrace.write_trace).
+    """
+
+    def __init__(self, path: str, errors: List[Tuple[int, str]], unit: str = "línea"):
+        self.path = path
+        self.errors = errors
+        lines = [f"  {unit} {lineno}: {msg}" for lineno, msg in errors[:MAX_REPORTED_ERRORS]]
+        if len(errors) > MAX_REPORTED_ERRORS:
+            lines.append(f"  ... y {len(errors) - MAX_REPORTED_ERRORS} error(es) más")
+        super().__init__(f"{path}: {len(errors)} fila(s) inválida(s)\n" + "\n".join(lines))
+
+
 def load_config(path: str) -> SystemState:
     """
-    Lee config.json y construye un SystemState inicial.
+    Lee config.json (opcionalmente comprimido) y construye un SystemState inicial.
     """
-    p = Path(path)
-    with p.open("r", encoding="utf-8") as f:
+    with open_text(path) as f:
         raw = json.load(f)
 
     mode: Mode = raw.get("mode", "deteccion")
@@ -22,6 +113,7 @@ def load_config(path: str) -> SystemState:
         victim_policy=victim_policy,
         detection_interval=detection_interval,
     )
+    configure_runtime(state, path, raw)
 
     # Procesos
     for proc in raw.get("processes", []):
@@ -42,25 +134,222 @@ def load_config(path: str) -> SystemState:
     return state
 
 
-def load_events(path: str) -> List[Event]:
+def configure_runtime(state: SystemState, path: str, raw: Optional[dict] = None) -> None:
     """
-    Carga la lista de eventos desde events.csv
+    Arma la política de detección y el historial de eventos de `state`
+    según la configuración `path` (`raw` si ya se leyó). Son estado de la
+    ejecución, no del escenario: scenario_cache no los guarda y los vuelve
+    a armar con esta función.
+    """
+    if raw is None:
+        with open_text(path) as f:
+            raw = json.load(f)
+
+    detection_policy = raw.get("detection_policy", "fija")
+    if detection_policy not in POLICIES:
+        raise ValueError(f"detection_policy desconocida: {detection_policy!r} (opciones: {', '.join(POLICIES)})")
+
+    history_size = int(raw.get("event_history_size", EVENT_HISTORY_SIZE))
+    if history_size < 1:
+        raise ValueError("event_history_size debe ser positivo")
+    spill_path = raw.get("event_history_spill")
+    if spill_path:
+        # Relativo a la carpeta del archivo de configuración
+        spill_path = os.path.join(os.path.dirname(os.path.abspath(path)), os.path.expanduser(spill_path))
+
+    state.event_history = EventHistory(history_size, spill_path or None)
+    state.detection_policy = None
+    if detection_policy == "adaptativa":
+        state.detection_policy = AdaptiveDetection(
+            state.detection_interval,
+            int(raw.get("detection_min_interval", DEFAULT_MIN_INTERVAL)),
+            int(raw.get("detection_max_interval", DEFAULT_MAX_INTERVAL)),
+        )
+
+
+def _iter_line_blocks(f) -> Iterator[List[str]]:
+    """
+    Lee el archivo en bloques y produce listas de líneas completas.
+    El primer bloque es pequeño para que la primera fila llegue enseguida;
+    luego crece hasta CHUNK_SIZE.
+    """
+    size = 1 << 14
+    tail = ""
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            break
+        lines = (tail + chunk).split("\n")
+        tail = lines.pop()
+        yield lines
+        size = min(size * 2, CHUNK_SIZE)
+    if tail:
+        yield [tail]
+
+
+def _split_row(line: str) -> List[str]:
+    # División posicional; solo las filas con comillas pasan por el módulo
+    # csv (los campos con saltos de línea no están soportados).
+    if '"' in line:
+        return next(csv.reader([line]))
+    return line.rstrip("\r").split(",")
+
+
+def parse_event_lines(
+    blocks: Iterable[List[str]],
+    source: str,
+    state: Optional[SystemState] = None,
+    on_error: Optional[Callable[[int, str], None]] = None,
+) -> Iterator[Event]:
+    """
+    Núcleo del parser de events.csv. `blocks` produce listas de líneas sin
+    el salto de línea final (la primera línea es la cabecera); así el
+    mismo parser sirve para archivos y para flujos en vivo. Si `state` no
+    es None, valida que los procesos y recursos referenciados existan en
+    la configuración. Cada fila inválida se informa a `on_error(línea,
+    descripción)` y se descarta; sin `on_error` se lanza EventFormatError
+    en la primera.
+    """
+    # Cachés: cada texto distinto se normaliza/convierte una sola vez y
+    # todos los eventos comparten el mismo objeto str (ids internados).
+    types: Dict[str, str] = {}
+    pids: Dict[str, str] = {}
+    rids: Dict[str, Optional[str]] = {"": None}
+    amounts: Dict[str, int] = {"": 0}
+    # Las trazas repiten mucho las mismas filas: se memoriza la fila ya
+    # validada completa para saltarse la división y las conversiones.
+    parsed_rows: Dict[str, Tuple[str, str, Optional[str], int]] = {}
+    processes = state.processes if state is not None else None
+    resources = state.resources if state is not None else None
+
+    def fail(lineno: int, msg: str) -> None:
+        if on_error is None:
+            raise EventFormatError(source, [(lineno, msg)])
+        on_error(lineno, msg)
+
+    blocks = iter(blocks)
+    lines: List[str] = []
+    for lines in blocks:
+        if lines:
+            break
+    if not lines:
+        return
+    columns = [name.strip() for name in _split_row(lines[0])]
+    try:
+        i_type = columns.index("type")
+        i_proc = columns.index("process")
+    except ValueError:
+        fail(1, "la cabecera debe incluir las columnas 'type' y 'process'")
+        return
+    i_res = columns.index("resource") if "resource" in columns else None
+    i_amount = columns.index("amount_or_time") if "amount_or_time" in columns else None
+    width = len(columns)
+
+    lineno = 1
+    block = lines[1:]
+    while True:
+        for line in block:
+            lineno += 1
+            row = parsed_rows.get(line)
+            if row is not None:
+                yield Event(*row)
+                continue
+
+            fields = _split_row(line)
+            if len(fields) < width:
+                if fields == [""]:
+                    continue  # línea vacía
+                fields += [""] * (width - len(fields))
+
+            raw = fields[i_type]
+            etype = types.get(raw)
+            if etype is None:
+                etype = raw.strip().upper()
+                if etype not in EVENT_TYPES:
+                    fail(lineno, f"tipo de evento desconocido {raw!r}")
+                    continue
+                types[raw] = etype
+
+            raw = fields[i_proc]
+            pid = pids.get(raw)
+            if pid is None:
+                pid = sys.intern(raw.strip())
+                if not pid:
+                    fail(lineno, "falta el proceso")
+                    continue
+                if processes is not None and pid not in processes:
+                    fail(lineno, f"proceso {pid!r} no definido en la configuración")
+                    continue
+                pids[raw] = pid
+
+            raw = fields[i_res] if i_res is not None else ""
+            if raw in rids:
+                rid = rids[raw]
+            else:
+                rid = sys.intern(raw.strip()) or None
+                rids[raw] = rid
+            if etype != "COMPUTE":
+                if rid is None:
+                    fail(lineno, f"{etype} sin recurso")
+                    continue
+                if resources is not None and rid not in resources:
+                    fail(lineno, f"recurso {rid!r} no definido en la configuración")
+                    continue
+
+            raw = fields[i_amount] if i_amount is not None else ""
+            amount = amounts.get(raw)
+            if amount is None:
+                try:
+                    amount = int(raw)
+                except ValueError:
+                    fail(lineno, f"cantidad no entera {raw!r}")
+                    continue
+                if amount < 0:
+                    fail(lineno, f"cantidad negativa {amount}")
+                    continue
+                amounts[raw] = amount
+
+            if len(parsed_rows) < ROW_CACHE_SIZE:
+                parsed_rows[line] = (etype, pid, rid, amount)
+            yield Event(etype, pid, rid, amount)
+
+        block = next(blocks, None)
+        if block is None:
+            break
+
+
+def _parse_events(
+    path: str,
+    state: Optional[SystemState],
+    on_error: Optional[Callable[[int, str], None]],
+) -> Iterator[Event]:
+    with open_text(path, encoding="utf-8-sig") as f:
+        yield from parse_event_lines(_iter_line_blocks(f), path, state, on_error)
+
+
+def iter_events(path: str, state: Optional[SystemState] = None) -> Iterator[Event]:
+    """
+    Lee events.csv de forma perezosa, produciendo un Event por fila.
+    La memoria usada no depende del largo del archivo y la simulación
+    puede empezar en cuanto se lee la primera fila.
     Columnas esperadas: type, process, resource, amount_or_time
+    El archivo puede estar comprimido con gzip, bz2 o lzma/xz.
+    Si se pasa `state`, valida los ids contra la configuración y lanza
+    EventFormatError (con el número de línea) al llegar a la primera fila
+    inválida.
+    """
+    return _parse_events(path, state, None)
+
+
+def load_events(path: str, state: Optional[SystemState] = None) -> List[Event]:
+    """
+    Carga la lista completa de eventos desde events.csv
+    (para trazas grandes usar iter_events).
+    Valida todo el archivo en una pasada y, si hay filas inválidas, lanza
+    un único EventFormatError que las enumera con su número de línea.
     """
-    events: List[Event] = []
-    with open(path, newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            etype = row["type"].strip().upper()
-            pid = row["process"].strip()
-            rid = row.get("resource", "") or None
-            amount_or_time = int(row.get("amount_or_time", "0") or "0")
-            events.append(
-                Event(
-                    type=etype,
-                    process_id=pid,
-                    resource_id=rid,
-                    amount_or_time=amount_or_time,
-                )
-            )
+    errors: List[Tuple[int, str]] = []
+    events = list(_parse_events(path, state, lambda lineno, msg: errors.append((lineno, msg))))
+    if errors:
+        raise EventFormatError(path, errors)
     return events
@@ -0,0 +1,195 @@
+"""
+Generador de carga local para server.py.
+
+Abre `clientes` conexiones concurrentes; cada una maneja su propio
+subconjunto de procesos de la configuración y manda lotes sin esperar
+respuesta (pipelining), espera las respuestas del lote y sigue hasta
+completar `mensajes`. Cada lote lleva a lo sumo un mensaje por proceso
+(la respuesta a un REQUEST decide si el proceso queda esperando), así que
+tiene min(`lote`, procesos del cliente) mensajes.
+
+Los mensajes son aleatorios pero reproducibles con `--semilla`: pide una
+unidad de un recurso que no tiene, libera algo que el servidor le haya
+asignado o computa; con `MAX_HELD` unidades asignadas libera antes de
+pedir más. Un proceso bloqueado reintenta el pedido que lo bloqueó o
+cede lo que tiene. Como los procesos compiten por los mismos recursos
+aparecen bloqueos e interbloqueos, y los avisos ABORT del servidor
+liberan la contabilidad local del proceso.
+
+Al final informa mensajes por segundo junto con la proporción de cada
+tipo de respuesta (GRANT/BLOCK/...) y los abortos recibidos, y la
+latencia de ida y vuelta de cada lote.
+
+Uso:
+    python server.py config2.json &
+    python loadgen.py config2.json --clientes 50 --mensajes 200000
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from follow import LatencyStats
+from io_utils import load_config
+from server import DEFAULT_PORT
+
+
+# Mensajes que cada cliente manda antes de esperar respuestas
+DEFAULT_BATCH = 256
+
+# Unidades que un proceso acumula antes de empezar a liberar
+MAX_HELD = 2
+
+# Orden de los tipos de respuesta en el reporte
+REPLY_KINDS = ("GRANT", "BLOCK", "RELEASE", "DENY", "COMPUTE", "ERROR")
+
+
+class _Client:
+    """Una conexión y los procesos que maneja."""
+
+    def __init__(self, pids: List[str], rids: List[str], rng: random.Random):
+        self.pids = pids
+        self.rids = rids
+        self.rng = rng
+        self.held: Dict[str, Counter] = {pid: Counter() for pid in pids}
+        self.waiting: Dict[str, str] = {}  # pid -> recurso que lo bloqueó
+        self.replies: Counter = Counter()
+        self.aborts = 0
+
+    def make_batch(self, size: int) -> bytes:
+        rng = self.rng
+        lines = []
+        for pid in rng.sample(self.pids, min(size, len(self.pids))):
+            roll = rng.random()
+            held = self.held[pid]
+            if held and (roll < 0.35 or sum(held.values()) >= MAX_HELD):
+                # También un proceso bloqueado puede ceder lo que tiene
+                rid = rng.choice(list(held))
+                held[rid] -= 1
+                if not held[rid]:
+                    del held[rid]
+                lines.append(f"RELEASE,{pid},{rid},1\n")
+            elif pid in self.waiting:
+                lines.append(f"REQUEST,{pid},{self.waiting[pid]},1\n")
+            elif roll < 0.9 and len(held) < len(self.rids):
+                rid = rng.choice(self.rids)
+                while rid in held:
+                    rid = rng.choice(self.rids)
+                lines.append(f"REQUEST,{pid},{rid},1\n")
+            else:
+                lines.append(f"COMPUTE,{pid},,{rng.randint(1, 5)}\n")
+        return "".join(lines).encode()
+
+    def on_reply(self, line: str) -> bool:
+        """Procesa una línea del servidor; devuelve False si fue un aviso ABORT."""
+        kind, _, rest = line.partition(",")
+        if kind == "ABORT":
+            self.aborts += 1
+            pid = rest.split(",", 1)[0]
+            if pid in self.held:
+                self.held[pid].clear()
+                self.waiting.pop(pid, None)
+            return False
+        self.replies[kind] += 1
+        if kind == "BLOCK":
+            pid, rid, _ = rest.split(",")
+            self.waiting[pid] = rid
+        elif kind == "GRANT":
+            # Las liberaciones se descuentan al armar el lote
+            pid, rid, amount = rest.split(",")
+            if self.waiting.get(pid) == rid:
+                del self.waiting[pid]
+            self.held[pid][rid] += int(amount)
+        return True
+
+
+async def run_client(client: _Client, messages: int, batch: int, latency: LatencyStats,
+                     host: str, port: int, unix_path: Optional[str]) -> None:
+    if unix_path:
+        reader, writer = await asyncio.open_unix_connection(unix_path)
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        sent = 0
+        while sent < messages:
+            start = time.perf_counter()
+            data = client.make_batch(min(batch, messages - sent))
+            size = data.count(b"\n")
+            writer.write(data)
+            await writer.drain()
+            pending = size
+            while pending:
+                line = await reader.readline()
+                if not line:
+                    raise ConnectionError("el servidor cerró la conexión")
+                if client.on_reply(line.decode().rstrip("\n")):
+                    pending -= 1
+            latency.add(time.perf_counter() - start)
+            sent += size
+    finally:
+        writer.close()
+
+
+async def run_load(pids: List[str], rids: List[str], clients: int, messages: int, batch: int,
+                   seed: int, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                   unix_path: Optional[str] = None):
+    clients = max(1, min(clients, len(pids)))
+    workers = [
+        _Client(pids[i::clients], rids, random.Random(seed * 1000003 + i))
+        for i in range(clients)
+    ]
+    # Reparto de los mensajes: los primeros clientes reciben el resto
+    share, extra = divmod(messages, clients)
+    latency = LatencyStats()
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(w, share + (i < extra), batch, latency, host, port, unix_path)
+        for i, w in enumerate(workers)
+    ))
+    return workers, latency, time.perf_counter() - start
+
+
+def reply_mix(replies: Counter, aborts: int) -> str:
+    """Proporción de cada tipo de respuesta y abortos, para el reporte."""
+    total = sum(replies.values()) or 1
+    parts = [f"{kind} {replies[kind] / total:.1%}" for kind in REPLY_KINDS if replies[kind]]
+    return ", ".join(parts) + f"; {aborts} ABORT"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generador de carga para server.py")
+    parser.add_argument("config", help="la misma configuración que usa el servidor")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="RUTA", help="conectarse a un socket Unix")
+    parser.add_argument("--clientes", type=int, default=10, help="conexiones concurrentes")
+    parser.add_argument("--mensajes", type=int, default=100000, help="mensajes en total")
+    parser.add_argument("--lote", type=int, default=DEFAULT_BATCH,
+                        help="mensajes por lote sin esperar respuesta")
+    parser.add_argument("--semilla", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.clientes < 1 or args.mensajes < 1 or args.lote < 1:
+        parser.error("--clientes, --mensajes y --lote deben ser positivos")
+
+    state = load_config(args.config)
+    try:
+        workers, latency, elapsed = asyncio.run(run_load(
+            sorted(state.processes), sorted(state.resources), args.clientes, args.mensajes,
+            args.lote, args.semilla, args.host, args.port, args.unix))
+    except (ConnectionError, OSError) as exc:
+        print(f"[CARGA] Error de conexión: {exc}", file=sys.stderr)
+        return 1
+
+    replies = sum((w.replies for w in workers), Counter())
+    total = sum(replies.values())
+    print(f"[CARGA] {len(workers)} clientes, {total} mensajes en {elapsed:.2f} s "
+          f"({total / elapsed:,.0f} msg/s): {reply_mix(replies, sum(w.aborts for w in workers))}")
+    print(f"[CARGA] Latencia por lote de hasta {args.lote}: {latency.summary()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,481 @@
+"""
+Monitor de orden de locks: el detector del simulador sobre hilos reales.
+
+Los locks de threading se reemplazan por proxies instrumentados (Lock,
+RLock, Semaphore, BoundedSemaphore) y cada hilo pasa a ser un proceso y
+cada lock un recurso. Un hilo de fondo arma periódicamente un
+SystemState con los hilos que están esperando un lock, los locks que
+esperan y sus dueños, y le aplica build_wait_for_graph/detect_cycle. Si
+hay ciclo, informa los hilos y locks involucrados con la pila de cada
+hilo. A diferencia del simulador no se aborta a nadie: solo se informa.
+
+El camino rápido (lock libre) cuesta el acquire real más anotar el dueño
+en el proxy; el estado compartido del monitor solo se toca cuando un hilo
+tiene que esperar. Como un ciclo está formado solo por hilos en espera,
+la pasada del detector recorre esas esperas y no todos los locks.
+
+Uso:
+    python lockmon.py programa.py [argumentos...]
+
+o desde código:
+    monitor = LockMonitor()
+    with monitor.installed():   # threading.Lock() & cía. devuelven proxies
+        ...
+"""
+import _thread
+import argparse
+import contextlib
+import os
+import runpy
+import sys
+import textwrap
+import threading
+import traceback
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from deadlock import build_wait_for_graph, detect_cycle, strongly_connected_components
+from models import Process, ResourceType, SystemState
+
+
+# Segundos entre pasadas del detector
+CHECK_INTERVAL = 1.0
+
+# Constructores de threading que install() reemplaza
+PATCHED = ("Lock", "RLock", "Semaphore", "BoundedSemaphore")
+
+_get_ident = _thread.get_ident
+_allocate_lock = _thread.allocate_lock
+
+
+def _site(depth: int) -> str:
+    """archivo:línea de quien creó el lock."""
+    frame = sys._getframe(depth)
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno}"
+
+
+class DeadlockReport(NamedTuple):
+    threads: List[str]                       # hilos del ciclo
+    waits: List[Tuple[str, str, List[str]]]  # (hilo, lock que espera, dueños de ese lock)
+    stacks: Dict[str, str]                   # hilo -> pila formateada
+
+    def format(self) -> str:
+        lines = [f"Interbloqueo entre hilos: {', '.join(self.threads)}"]
+        for thread, lock, holders in self.waits:
+            lines.append(f"  {thread} espera {lock} (tomado por {', '.join(holders)})")
+        for thread in self.threads:
+            lines.append(f"\n  Pila de {thread}:")
+            lines.append(self.stacks.get(thread, "    (no disponible)\n").rstrip("\n"))
+        return "\n".join(lines)
+
+
+class MonitoredLock:
+    """threading.Lock que anota su dueño y avisa al monitor si hay que esperar."""
+    __slots__ = ("_lock", "_owner", "name", "_monitor", "__weakref__")
+    kind = "Lock"
+    instances = 1
+
+    def __init__(self, monitor: "LockMonitor", name: Optional[str] = None, _depth: int = 2):
+        self._lock = _allocate_lock()
+        self._owner = None
+        self._monitor = monitor
+        self.name = name or f"{self.kind}@{_site(_depth)}"
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(False):
+            self._owner = _get_ident()
+            return True
+        if not blocking:
+            return False
+        with self._monitor.waiting(self):
+            acquired = self._lock.acquire(True, timeout)
+        if acquired:
+            self._owner = _get_ident()
+        return acquired
+
+    __enter__ = acquire
+
+    def release(self) -> None:
+        self._owner = None
+        self._lock.release()
+
+    def __exit__(self, *exc) -> None:
+        self._owner = None
+        self._lock.release()
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def holders(self) -> Dict[int, int]:
+        owner = self._owner
+        return {owner: 1} if owner is not None else {}
+
+    def _at_fork_reinit(self) -> None:
+        # os.register_at_fork de la biblioteca estándar (p. ej. concurrent.futures)
+        self._lock._at_fork_reinit()
+        self._owner = None
+
+    def __repr__(self) -> str:
+        return f"<{self.name} {'tomado' if self._lock.locked() else 'libre'}>"
+
+
+class MonitoredRLock(MonitoredLock):
+    """threading.RLock instrumentado; admite el protocolo que usa threading.Condition."""
+    __slots__ = ("_count",)
+    kind = "RLock"
+
+    def __init__(self, monitor: "LockMonitor", name: Optional[str] = None, _depth: int = 2):
+        super().__init__(monitor, name, _depth + 1)
+        self._lock = _thread.RLock()
+        self._count = 0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(False):
+            self._owner = _get_ident()
+            self._count += 1
+            return True
+        if not blocking:
+            return False
+        with self._monitor.waiting(self):
+            acquired = self._lock.acquire(True, timeout)
+        if acquired:
+            self._owner = _get_ident()
+            self._count += 1
+        return acquired
+
+    __enter__ = acquire
+
+    def release(self) -> None:
+        if self._owner == _get_ident():
+            self._count -= 1
+            if not self._count:
+                self._owner = None
+        self._lock.release()  # si no es el dueño, el RLock real lanza el error
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    def locked(self) -> bool:
+        return self._owner is not None
+
+    def _at_fork_reinit(self) -> None:
+        super()._at_fork_reinit()
+        self._count = 0
+
+    # Condition.wait libera el lock por completo y lo vuelve a tomar
+    def _is_owned(self) -> bool:
+        return self._lock._is_owned()
+
+    def _release_save(self):
+        saved = self._lock._release_save()
+        count, self._count, self._owner = self._count, 0, None
+        return saved, count
+
+    def _acquire_restore(self, saved) -> None:
+        state, count = saved
+        with self._monitor.waiting(self):
+            self._lock._acquire_restore(state)
+        self._owner = _get_ident()
+        self._count = count
+
+
+class MonitoredSemaphore:
+    """
+    threading.Semaphore instrumentado. Los dueños son los hilos que
+    adquirieron y no liberaron; si libera otro hilo (productor y
+    consumidor), se descuenta de cualquiera de ellos.
+    """
+    __slots__ = ("_cond", "_value", "_holders", "name", "_monitor", "__weakref__")
+    kind = "Semaphore"
+
+    def __init__(self, monitor: "LockMonitor", value: int = 1, name: Optional[str] = None,
+                 _depth: int = 2):
+        if value < 0:
+            raise ValueError("semaphore initial value must be >= 0")
+        # Condition sobre un lock sin instrumentar (threading.Lock puede estar reemplazado)
+        self._cond = threading.Condition(_allocate_lock())
+        self._value = value
+        self._holders: Dict[int, int] = {}
+        self._monitor = monitor
+        self.name = name or f"{self.kind}@{_site(_depth)}"
+
+    @property
+    def instances(self) -> int:
+        return self._value + sum(self._holders.values())
+
+    def _take(self) -> None:
+        self._value -= 1
+        ident = _get_ident()
+        self._holders[ident] = self._holders.get(ident, 0) + 1
+
+    def acquire(self, blocking: bool = True, timeout: Optional[float] = None) -> bool:
+        if not blocking and timeout is not None:
+            raise ValueError("can't specify timeout for non-blocking acquire")
+        with self._cond:
+            if self._value > 0:
+                self._take()
+                return True
+            if not blocking:
+                return False
+            with self._monitor.waiting(self):
+                if not self._cond.wait_for(lambda: self._value > 0, timeout):
+                    return False
+            self._take()
+            return True
+
+    __enter__ = acquire
+
+    def release(self, n: int = 1) -> None:
+        if n < 1:
+            raise ValueError("n must be one or more")
+        with self._cond:
+            self._give(n)
+            self._cond.notify(n)
+
+    def _give(self, n: int) -> None:
+        self._value += n
+        holders = self._holders
+        for _ in range(n):
+            ident = _get_ident()
+            if ident not in holders:
+                if not holders:
+                    break
+                ident = next(iter(holders))
+            if holders[ident] > 1:
+                holders[ident] -= 1
+            else:
+                del holders[ident]
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    def holders(self) -> Dict[int, int]:
+        return dict(self._holders)
+
+    def _at_fork_reinit(self) -> None:
+        self._cond._at_fork_reinit()
+        self._holders.clear()
+
+    def __repr__(self) -> str:
+        return f"<{self.name} valor={self._value}>"
+
+
+class MonitoredBoundedSemaphore(MonitoredSemaphore):
+    __slots__ = ("_initial_value",)
+    kind = "BoundedSemaphore"
+
+    def __init__(self, monitor: "LockMonitor", value: int = 1, name: Optional[str] = None,
+                 _depth: int = 2):
+        super().__init__(monitor, value, name, _depth + 1)
+        self._initial_value = value
+
+    def release(self, n: int = 1) -> None:
+        if n < 1:
+            raise ValueError("n must be one or more")
+        with self._cond:
+            if self._value + n > self._initial_value:
+                raise ValueError("Semaphore released too many times")
+            self._give(n)
+            self._cond.notify(n)
+
+
+class LockMonitor:
+    """
+    Registro de esperas y detector en segundo plano. `on_deadlock` recibe
+    cada DeadlockReport (por defecto se imprime en stderr); un mismo ciclo
+    se informa una sola vez mientras dure.
+    """
+
+    def __init__(self, interval: float = CHECK_INTERVAL,
+                 on_deadlock: Optional[Callable[[DeadlockReport], None]] = None):
+        self.interval = interval
+        self.on_deadlock = on_deadlock or self._print_report
+        self.state: Optional[SystemState] = None  # el de la última pasada
+        self.reports: List[DeadlockReport] = []
+        self._mutex = _allocate_lock()
+        self._waiting: Dict[int, object] = {}  # ident del hilo -> lock que espera
+        self._reported = set()
+        self._originals: Dict[str, object] = {}
+        self._stop = None
+        self._thread = None
+
+    # Fábricas con la firma de threading
+    def Lock(self, name: Optional[str] = None) -> MonitoredLock:
+        return MonitoredLock(self, name, 3)
+
+    def RLock(self, name: Optional[str] = None) -> MonitoredRLock:
+        return MonitoredRLock(self, name, 3)
+
+    def Semaphore(self, value: int = 1, name: Optional[str] = None) -> MonitoredSemaphore:
+        return MonitoredSemaphore(self, value, name, 3)
+
+    def BoundedSemaphore(self, value: int = 1, name: Optional[str] = None) -> MonitoredBoundedSemaphore:
+        return MonitoredBoundedSemaphore(self, value, name, 3)
+
+    @contextlib.contextmanager
+    def waiting(self, lock):
+        """El hilo actual espera `lock` mientras dura el bloque."""
+        ident = _get_ident()
+        with self._mutex:
+            self._waiting[ident] = lock
+        try:
+            yield
+        finally:
+            with self._mutex:
+                self._waiting.pop(ident, None)
+
+    # ───────────────────────────────────────────────
+    # Instalación en threading
+    # ───────────────────────────────────────────────
+
+    def install(self) -> None:
+        """
+        Reemplaza los constructores de threading. Solo afecta a los locks
+        creados después (y a los módulos que los buscan como threading.Lock,
+        no a los que ya hicieron `from threading import Lock`).
+        """
+        if self._originals:
+            return
+        for name in PATCHED:
+            self._originals[name] = getattr(threading, name)
+            setattr(threading, name, getattr(self, name))
+
+    def uninstall(self) -> None:
+        for name, original in self._originals.items():
+            setattr(threading, name, original)
+        self._originals.clear()
+
+    @contextlib.contextmanager
+    def installed(self):
+        """install() + start() durante el bloque."""
+        self.install()
+        self.start()
+        try:
+            yield self
+        finally:
+            self.stop()
+            self.uninstall()
+
+    # ───────────────────────────────────────────────
+    # Detector
+    # ───────────────────────────────────────────────
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop = _allocate_lock()
+        self._stop.acquire()
+        # Hilo de bajo nivel: un threading.Thread crearía locks instrumentados
+        self._thread = _thread.start_new_thread(self._run, ())
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._stop.release()
+            self._thread = None
+
+    def _run(self) -> None:
+        stop = self._stop
+        while not stop.acquire(True, self.interval):
+            try:
+                self.check()
+            except Exception:
+                traceback.print_exc()
+
+    def snapshot(self) -> Tuple[SystemState, Dict[str, object], Dict[str, List[str]]]:
+        """
+        SystemState con los hilos en espera (solicitudes) y los dueños de
+        los locks que esperan (asignaciones). Devuelve además rid -> lock
+        y rid -> dueños, para el reporte.
+        """
+        with self._mutex:
+            waiting = list(self._waiting.items())
+        names = {t.ident: t.name for t in threading.enumerate()}
+
+        def pid_of(ident):
+            return f"{names.get(ident, 'hilo')}({ident})"
+
+        state = SystemState(mode="deteccion", victim_policy="menor_trabajo_hecho")
+        locks: Dict[str, object] = {}
+        owners: Dict[str, List[str]] = {}
+        for ident, lock in waiting:
+            rid = f"{lock.name}#{id(lock):x}"
+            pid = pid_of(ident)
+            state.processes.setdefault(pid, Process(pid))
+            state.requests[(pid, rid)] = 1
+            if rid in locks:
+                continue
+            locks[rid] = lock
+            holders = lock.holders()
+            owners[rid] = []
+            for holder, units in holders.items():
+                holder_pid = pid_of(holder)
+                owners[rid].append(holder_pid)
+                state.processes.setdefault(holder_pid, Process(holder_pid))
+                state.allocation[(holder_pid, rid)] = units
+            total = max(lock.instances, sum(holders.values()))
+            state.resources[rid] = ResourceType(rid, total, total - sum(holders.values()))
+        return state, locks, owners
+
+    def check(self) -> List[DeadlockReport]:
+        """Una pasada del detector; devuelve los reportes de los ciclos nuevos."""
+        state, locks, owners = self.snapshot()
+        self.state = state
+        cycles = []
+        if state.requests:
+            # Un hilo que espera un Lock que ya tiene no aparece en el grafo (no hay aristas a sí mismo)
+            cycles = [[pid] for (pid, rid) in state.requests if (pid, rid) in state.allocation]
+            graph = build_wait_for_graph(state, verbose=False)
+            if detect_cycle(graph):
+                # detect_cycle da un ciclo (con la pila del DFS); las componentes los dan todos
+                cycles += [c for c in strongly_connected_components(graph) if len(c) > 1]
+
+        current = {frozenset(cycle) for cycle in cycles}
+        new = [cycle for cycle in cycles if frozenset(cycle) not in self._reported]
+        self._reported = current
+        if not new:
+            return []
+
+        frames = sys._current_frames()
+        reports = []
+        for cycle in new:
+            waits = []
+            stacks = {}
+            for pid in sorted(cycle):
+                for (waiter, rid) in state.requests:
+                    if waiter == pid:
+                        waits.append((pid, locks[rid].name, owners[rid]))
+                frame = frames.get(int(pid[pid.rindex("(") + 1:-1]))
+                if frame is not None:
+                    # Sin los marcos de este módulo: la pila termina en el acquire del programa
+                    entries = [e for e in traceback.extract_stack(frame) if e.filename != __file__]
+                    stacks[pid] = textwrap.indent("".join(traceback.format_list(entries)), "    ")
+            report = DeadlockReport(sorted(cycle), waits, stacks)
+            self.reports.append(report)
+            self.on_deadlock(report)
+            reports.append(report)
+        return reports
+
+    @staticmethod
+    def _print_report(report: DeadlockReport) -> None:
+        print(f"[LOCKMON] {report.format()}", file=sys.stderr, flush=True)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Ejecuta un programa con los locks de threading instrumentados y "
+                    "detecta interbloqueos entre sus hilos")
+    parser.add_argument("--intervalo", type=float, default=CHECK_INTERVAL,
+                        help="segundos entre pasadas del detector")
+    parser.add_argument("script", help="programa a ejecutar")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="argumentos del programa")
+    args = parser.parse_args(argv)
+
+    sys.argv = [args.script] + args.args
+    sys.path.insert(0, os.path.dirname(os.path.abspath(args.script)))
+    monitor = LockMonitor(args.intervalo)
+    with monitor.installed():
+        runpy.run_path(args.script, run_name="__main__")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
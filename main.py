@@ -1,15 +1,47 @@
-from io_utils import load_config, load_events
+import argparse
+import contextlib
+
+from io_utils import load_config, iter_events, open_output
+from scenario_cache import ScenarioCache, load_scenario
 from sim import run_simulation
+from tracelog import TraceWriter
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simulador de interbloqueos (modo consola)")
+    parser.add_argument("config", nargs="?", default="config.json",
+                        help="archivo de configuración (admite .gz/.bz2/.xz)")
+    parser.add_argument("events", nargs="?", default="events.csv",
+                        help="archivo de eventos (admite .gz/.bz2/.xz)")
+    parser.add_argument("--log", metavar="ARCHIVO",
+                        help="escribir el registro de la ejecución en ARCHIVO en lugar de la consola "
+                             "(se comprime si termina en .gz, .bz2, .xz o .lzma)")
+    parser.add_argument("--trace", metavar="ARCHIVO",
+                        help="exportar cada decisión del motor a ARCHIVO (.jsonl o .csv, "
+                             "opcionalmente comprimido)")
+    parser.add_argument("--cache", nargs="?", const="", metavar="DIR",
+                        help="usar la caché de escenarios parseados (opcionalmente en DIR)")
+    return parser.parse_args(argv)
+
 
+def main(argv=None):
+    args = parse_args(argv)
 
-def main():
-    # Cargar configuración y eventos
-    state = load_config("config.json")
-    events = load_events("events.csv")
+    # Cargar configuración; los eventos se leen bajo demanda y se validan contra ella
+    if args.cache is not None:
+        state, events = load_scenario(args.config, args.events, ScenarioCache(args.cache or None))
+    else:
+        state = load_config(args.config)
+        events = iter_events(args.events, state)
 
     # Ejecutar simulación
-    run_simulation(state, events)
+    with contextlib.ExitStack() as stack:
+        tracer = stack.enter_context(TraceWriter(args.trace)) if args.trace else None
+        if args.log:
+            out = stack.enter_context(open_output(args.log))
+            stack.enter_context(contextlib.redirect_stdout(out))
+        run_simulation(state, events, tracer)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,25 +1,54 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Literal, Tuple, Set
+from typing import Dict, Optional, Literal, Tuple, Set
+
+from detection import AdaptiveDetection
+from history import EntityHistory, EventHistory
 
 # Modo de trabajo del sistema
 Mode = Literal["prevencion", "deteccion"]
 
 
-@dataclass
+# Las clases de modelo usan __slots__ en lugar de @dataclass para no cargar
+# un __dict__ por objeto: con cientos de miles de procesos/eventos la
+# diferencia de memoria es considerable y el acceso a atributos es más rápido.
+# (dataclass(slots=True) requiere Python 3.10; el proyecto soporta 3.8+.)
+
 class Process:
-    pid: str
-    priority: int = 1  # menor número = mayor prioridad (por ejemplo)
-    work_done: int = 0  # ticks de CPU completados (para políticas de víctima)
+    __slots__ = ("pid", "priority", "work_done")
+
+    def __init__(self, pid: str, priority: int = 1, work_done: int = 0):
+        self.pid = pid
+        self.priority = priority  # menor número = mayor prioridad (por ejemplo)
+        self.work_done = work_done  # ticks de CPU completados (para políticas de víctima)
+
+    def __repr__(self) -> str:
+        return f"Process(pid={self.pid!r}, priority={self.priority!r}, work_done={self.work_done!r})"
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.pid, self.priority, self.work_done) == (other.pid, other.priority, other.work_done)
 
 
-@dataclass
 class ResourceType:
-    rid: str
-    total_instances: int
-    available_instances: int
+    __slots__ = ("rid", "total_instances", "available_instances")
+
+    def __init__(self, rid: str, total_instances: int, available_instances: int):
+        self.rid = rid
+        self.total_instances = total_instances
+        self.available_instances = available_instances
+
+    def __repr__(self) -> str:
+        return (f"ResourceType(rid={self.rid!r}, total_instances={self.total_instances!r}, "
+                f"available_instances={self.available_instances!r})")
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return ((self.rid, self.total_instances, self.available_instances) ==
+                (other.rid, other.total_instances, other.available_instances))
 
 
-@dataclass
 class Event:
     """
     type: REQUEST, RELEASE o COMPUTE
@@ -27,10 +56,29 @@ class Event:
     resource_id: recurso (solo para REQUEST/RELEASE)
     amount_or_time: unidades a pedir/liberar o tiempo de COMPUTE
     """
-    type: Literal["REQUEST", "RELEASE", "COMPUTE"]
-    process_id: str
-    resource_id: Optional[str] = None
-    amount_or_time: int = 0
+    __slots__ = ("type", "process_id", "resource_id", "amount_or_time")
+
+    def __init__(
+        self,
+        type: Literal["REQUEST", "RELEASE", "COMPUTE"],
+        process_id: str,
+        resource_id: Optional[str] = None,
+        amount_or_time: int = 0,
+    ):
+        self.type = type
+        self.process_id = process_id
+        self.resource_id = resource_id
+        self.amount_or_time = amount_or_time
+
+    def __repr__(self) -> str:
+        return (f"Event(type={self.type!r}, process_id={self.process_id!r}, "
+                f"resource_id={self.resource_id!r}, amount_or_time={self.amount_or_time!r})")
+
+    def __eq__(self, other) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return ((self.type, self.process_id, self.resource_id, self.amount_or_time) ==
+                (other.type, other.process_id, other.resource_id, other.amount_or_time))
 
 
 @dataclass
@@ -41,6 +89,8 @@ class SystemState:
     mode: Mode
     victim_policy: str
     detection_interval: int = 1
+    # None = intervalo fijo; si no, decide cuándo detectar (ver detection.py)
+    detection_policy: Optional[AdaptiveDetection] = field(default=None, compare=False, repr=False)
 
     processes: Dict[str, Process] = field(default_factory=dict)
     resources: Dict[str, ResourceType] = field(default_factory=dict)
@@ -50,8 +100,56 @@ class SystemState:
     requests: Dict[Tuple[str, str], int] = field(default_factory=dict)
 
     blocked_processes: Set[str] = field(default_factory=set)
+    aborted_processes: Set[str] = field(default_factory=set)
     tick: int = 0
 
+    # Últimos eventos aplicados, acotado (lo llena la GUI; el motor no lo usa)
+    event_history: EventHistory = field(default_factory=EventHistory, compare=False, repr=False)
+
+    # Historial por proceso/recurso y tiempos bloqueados: la GUI lo pasa
+    # como tracer a sim.step
+    entity_history: EntityHistory = field(default_factory=EntityHistory, compare=False, repr=False)
+
+    # Estado de la ejecución que no se serializa (scenario_cache): el
+    # historial guarda la ruta de volcado de la configuración y la política
+    # adaptativa lo observado hasta ahora. io_utils.configure_runtime los rehace.
+    RUNTIME_FIELDS = ("detection_policy", "event_history", "entity_history")
+
+    def __getstate__(self) -> dict:
+        data = self.__dict__.copy()
+        for name in self.RUNTIME_FIELDS:
+            del data[name]
+        return data
+
+    def __setstate__(self, data: dict) -> None:
+        self.__dict__.update(data)
+        self.detection_policy = None
+        self.event_history = EventHistory()
+        self.entity_history = EntityHistory()
+
+    def snapshot(self) -> "SystemState":
+        """
+        Copia para lectura desde otro hilo mientras el motor sigue
+        avanzando: se copian los contenedores que el motor modifica y los
+        recursos; los Process y los historiales se comparten.
+        """
+        return SystemState(
+            mode=self.mode,
+            victim_policy=self.victim_policy,
+            detection_interval=self.detection_interval,
+            detection_policy=self.detection_policy,
+            processes=dict(self.processes),
+            resources={rid: ResourceType(r.rid, r.total_instances, r.available_instances)
+                       for rid, r in list(self.resources.items())},
+            allocation=dict(self.allocation),
+            requests=dict(self.requests),
+            blocked_processes=set(self.blocked_processes),
+            aborted_processes=set(self.aborted_processes),
+            tick=self.tick,
+            event_history=self.event_history,
+            entity_history=self.entity_history,
+        )
+
     # Helpers para leer/escribir matriz de asignación
     def get_allocation(self, pid: str, rid: str) -> int:
         return self.allocation.get((pid, rid), 0)
@@ -71,3 +169,12 @@ class SystemState:
             self.requests.pop((pid, rid), None)
         else:
             self.requests[(pid, rid)] = units
+
+    def waiting_processes(self) -> Set[str]:
+        """
+        Procesos bloqueados que no fueron abortados. resolve_deadlock no
+        saca a la víctima de blocked_processes, pero un abortado ya no
+        espera: se cuenta como abortado (igual que EntityHistory, que cierra
+        su tiempo bloqueado en el ABORT).
+        """
+        return self.blocked_processes - self.aborted_processes
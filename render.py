@@ -0,0 +1,356 @@
+"""
+Dibujo del grafo de espera con Matplotlib y renderizado por lotes sin Qt.
+
+draw_view arma los artistas de una vista (graph_view.GraphView) con el
+mismo estilo que la GUI: AnimatedGraph los crea animados y los pinta con
+blitting; aquí se dibujan una vez sobre un lienzo Agg y se guardan en un
+archivo.
+
+El renderizado por lotes ejecuta la simulación una sola vez y toma un
+cuadro en cada interbloqueo detectado (antes de abortar a la víctima,
+así se ve el ciclo) y/o cada N ticks. Las posiciones salen de un
+GraphLayout compartido por todos los cuadros (los nodos no saltan de un
+cuadro al siguiente); el dibujo, que es lo caro, se reparte en un pool
+de procesos. Cada proceso reutiliza una sola figura para todos sus
+cuadros.
+
+Uso:
+    python render.py config.json events.csv cuadros/ --every 100
+    python render.py config.json events.csv cuadros/ --format svg --workers 8
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection, PathCollection
+from matplotlib.figure import Figure
+from matplotlib.path import Path as MplPath
+from matplotlib.transforms import Affine2D, IdentityTransform
+
+from deadlock import build_wait_for_graph, strongly_connected_components
+from graph_view import (LOD_THRESHOLD, GraphLayout, GraphView, Position, condensed_view,
+                        edge_geometry, full_view)
+from io_utils import iter_events, load_config
+from models import Event, SystemState
+from sim import step
+
+
+NODE_SIZE = 2000
+ARROW_SIZE = 12  # largo de la punta de flecha en puntos
+
+NODE_COLORS = {
+    "active": "#28a745",   # Verde para activos
+    "blocked": "#dc3545",  # Rojo para bloqueados
+    "aborted": "#6c757d",  # Gris para abortados
+}
+
+LEGEND_TEXT = "🟢 Activo  🟡 Bloqueado  🔴 Crítico"
+
+# Punta de flecha unitaria apuntando hacia +x, con el vértice en el origen
+ARROW_HEAD = MplPath([(0.0, 0.0), (-1.0, 0.4), (-1.0, -0.4), (0.0, 0.0)],
+                     [MplPath.MOVETO, MplPath.LINETO, MplPath.LINETO, MplPath.CLOSEPOLY])
+
+# Fase fija de los cuadros estáticos (la GUI la hace oscilar entre 0 y 0.5)
+STATIC_PHASE = 0.5
+
+# Formatos vectoriales: Matplotlib los dibuja siempre a 72 dpi
+VECTOR_FORMATS = ("svg", "pdf")
+
+# Cuadros enviados al pool sin terminar, por proceso
+FRAMES_IN_FLIGHT = 4
+
+
+class GraphArtists(NamedTuple):
+    """Artistas de un grafo dibujado que cambian con la animación."""
+    edges: LineCollection
+    arrows: PathCollection
+    nodes: PathCollection  # procesos bloqueados (pulsan)
+    labels: list           # etiquetas de los bloqueados
+    edge_list: List[Tuple[str, str]]
+
+    def animated(self) -> list:
+        return [self.edges, self.arrows, self.nodes] + self.labels
+
+
+def node_radius_px(dpi: float) -> float:
+    """Radio en píxeles de un nodo sin pulso."""
+    return (NODE_SIZE ** 0.5) / 2 * dpi / 72
+
+
+def draw_view(ax, view: GraphView, pos: Dict[str, Position], animated: bool = False,
+              title: Optional[str] = None) -> GraphArtists:
+    """
+    Limpia `ax` y dibuja la vista. Los nodos bloqueados, sus etiquetas y
+    las aristas se devuelven aparte (con `animated` la GUI los pinta en
+    cada cuadro); su geometría se completa con update_edge_geometry una
+    vez fijada la transformación de pantalla.
+    """
+    nodes = [node.name for node in view.nodes]
+    pulsing = [node for node in view.nodes if node.status == "blocked"]
+    still = [node for node in view.nodes if node.status != "blocked"]
+
+    ax.clear()
+    xy = np.array([pos[n] for n in nodes], dtype=float)
+    still_xy = np.array([pos[node.name] for node in still], dtype=float).reshape(-1, 2)
+    pulsing_xy = np.array([pos[node.name] for node in pulsing], dtype=float).reshape(-1, 2)
+
+    # Aristas: una colección de segmentos y otra de puntas de flecha
+    edge_artist = LineCollection([], linewidths=2, animated=animated, zorder=1)
+    arrow_artist = PathCollection([], sizes=[ARROW_SIZE ** 2], offsets=np.empty((0, 2)),
+                                  offset_transform=ax.transData,
+                                  transform=IdentityTransform(),
+                                  animated=animated, zorder=1)
+    ax.add_collection(edge_artist)
+    ax.add_collection(arrow_artist)
+
+    ax.scatter(still_xy[:, 0], still_xy[:, 1], s=NODE_SIZE,
+               c=[NODE_COLORS[node.status] for node in still],
+               alpha=0.9, edgecolors="black", linewidths=2, zorder=2)
+    node_artist = ax.scatter(pulsing_xy[:, 0], pulsing_xy[:, 1], s=NODE_SIZE,
+                             c=NODE_COLORS["blocked"],
+                             alpha=0.9, edgecolors="black", linewidths=2,
+                             animated=animated, zorder=2)
+    label_style = dict(fontweight="bold", color="white", ha="center", va="center", zorder=3)
+    for node, (x, y) in zip(still, still_xy):
+        ax.text(x, y, node.label, fontsize=8 if node.is_group else 10, **label_style)
+    labels = [
+        ax.text(x, y, node.label, animated=animated, fontsize=8 if node.is_group else 10,
+                **label_style)
+        for node, (x, y) in zip(pulsing, pulsing_xy)
+    ]
+
+    # Márgenes como los de networkx para que los nodos no queden cortados
+    margin = 0.15
+    xmin, ymin = xy.min(axis=0)
+    xmax, ymax = xy.max(axis=0)
+    dx = (xmax - xmin) or 1.0
+    dy = (ymax - ymin) or 1.0
+    ax.set_xlim(xmin - margin * dx, xmax + margin * dx)
+    ax.set_ylim(ymin - margin * dy, ymax + margin * dy)
+
+    ax.set_title(title or view.title, fontweight='bold', pad=20)
+    ax.axis("off")
+
+    # Leyenda de estados
+    ax.text(0.02, 0.02, LEGEND_TEXT, transform=ax.transAxes,
+            bbox=dict(boxstyle="round,pad=0.3", facecolor="white", alpha=0.8))
+    if view.note:
+        # Debajo del título, en el espacio de su separación
+        ax.text(0.5, 1.01, view.note, transform=ax.transAxes,
+                ha="center", va="bottom", fontsize=8, color="#6c757d")
+    return GraphArtists(edge_artist, arrow_artist, node_artist, labels, list(view.edges))
+
+
+def update_edge_geometry(artists: GraphArtists, pos: Dict[str, Position], transform,
+                         inset_px: float) -> None:
+    """Recorta las aristas al borde de los nodos; depende de la transformación de pantalla."""
+    segments, tips, angles = edge_geometry(pos, artists.edge_list, transform, inset_px)
+    artists.edges.set_segments(segments)
+    artists.arrows.set_offsets(tips)
+    artists.arrows.set_paths([ARROW_HEAD.transformed(Affine2D().rotate(a)) for a in angles])
+
+
+def apply_phase(artists: GraphArtists, phase: float) -> None:
+    """Pulso de los bloqueados y transparencia de las aristas para una fase entre 0 y 0.5."""
+    pulse = 1.2 + 0.3 * phase  # Pulso entre 1.2 y 1.5
+    artists.nodes.set_sizes([NODE_SIZE * pulse])
+    if artists.edge_list:
+        alpha = 0.5 + 0.5 * phase
+        edge_colors = np.tile((0.4, 0.4, 0.4, alpha), (len(artists.edge_list), 1))
+        artists.edges.set_color(edge_colors)
+        artists.arrows.set_facecolor(edge_colors)
+        artists.arrows.set_edgecolor(edge_colors)
+
+
+# ───────────────────────────────────────────────
+# Renderizado por lotes
+# ───────────────────────────────────────────────
+
+class Frame(NamedTuple):
+    """Un cuadro listo para dibujar: no lleva el estado, solo la vista y las posiciones."""
+    path: str
+    tick: int
+    view: GraphView
+    positions: Dict[str, Position]
+    title: str
+
+
+class FrameRenderer:
+    """Una figura Agg reutilizada para dibujar muchos cuadros."""
+
+    def __init__(self, size: Tuple[float, float] = (8, 6), dpi: float = 100, fmt: str = "png"):
+        self.format = fmt
+        self.dpi = 72 if fmt in VECTOR_FORMATS else dpi
+        self.fig = Figure(figsize=size, dpi=self.dpi)
+        FigureCanvasAgg(self.fig)
+        self.ax = self.fig.add_subplot(111)
+
+    def render(self, frame: Frame) -> str:
+        artists = draw_view(self.ax, frame.view, frame.positions, title=frame.title)
+        update_edge_geometry(artists, frame.positions, self.ax.transData, node_radius_px(self.dpi))
+        apply_phase(artists, STATIC_PHASE)
+        self.fig.savefig(frame.path, format=self.format, dpi=self.dpi)
+        return frame.path
+
+
+class FrameCollector:
+    """
+    Tracer para sim.step que arma los cuadros. En DETECT el motor todavía
+    no abortó a la víctima, así que el cuadro muestra el ciclo completo.
+    """
+
+    def __init__(self, state: SystemState, out_dir: str, fmt: str = "png", deadlocks: bool = True):
+        self.state = state
+        self.out_dir = out_dir
+        self.format = fmt
+        self.deadlocks = deadlocks
+        self.frames: List[Frame] = []
+        self.count = 0
+        # Vista completa y vista general usan layouts separados (como la GUI)
+        self.layout = GraphLayout()
+        self.lod_layout = GraphLayout()
+
+    def emit(self, kind: str, tick: int, pid: Optional[str], rid: Optional[str] = None,
+             amount: int = 0, detail: Optional[str] = None) -> None:
+        if kind == "DETECT" and self.deadlocks:
+            cycle = ", ".join((detail or "").split())
+            self.capture(f"Tick {tick}: interbloqueo entre {cycle}", "ciclo")
+
+    def capture(self, title: str, suffix: str = "") -> None:
+        """Toma un cuadro del estado actual."""
+        state = self.state
+        graph = build_wait_for_graph(state, verbose=False)
+        if not graph:
+            return
+        blocked, aborted = state.blocked_processes, state.aborted_processes
+        if len(graph) <= LOD_THRESHOLD:
+            view, layout = full_view(graph, blocked, aborted), self.layout
+        else:
+            view = condensed_view(graph, blocked, aborted, strongly_connected_components(graph))
+            # La indicación de clic no tiene sentido en una imagen
+            view, layout = view._replace(note=""), self.lod_layout
+        view_edges: Dict[str, list] = {}
+        for a, b in view.edges:
+            view_edges.setdefault(a, []).append(b)
+        pos = layout.update([node.name for node in view.nodes], view_edges)
+
+        self.count += 1
+        name = f"frame_{self.count:06d}_t{state.tick}{'_' + suffix if suffix else ''}.{self.format}"
+        self.frames.append(Frame(os.path.join(self.out_dir, name), state.tick, view,
+                                 {node.name: pos[node.name] for node in view.nodes}, title))
+
+    def take(self) -> List[Frame]:
+        frames, self.frames = self.frames, []
+        return frames
+
+
+def iter_frames(state: SystemState, events: Iterable[Event], collector: FrameCollector,
+                every: int = 0) -> Iterator[Frame]:
+    """Ejecuta la simulación una vez y devuelve los cuadros a medida que aparecen."""
+    for index, event in enumerate(events):
+        step(state, event, index, collector)
+        if every and state.tick % every == 0:
+            collector.capture(f"Grafo de Espera - Tick {state.tick}")
+        yield from collector.take()
+
+
+# Un renderer por proceso del pool (se crea en _init_worker)
+_renderer: Optional[FrameRenderer] = None
+
+
+def _init_worker(size: Tuple[float, float], dpi: float, fmt: str) -> None:
+    global _renderer
+    _renderer = FrameRenderer(size, dpi, fmt)
+
+
+def _render_in_worker(frame: Frame) -> str:
+    return _renderer.render(frame)
+
+
+def render_frames(frames: Iterable[Frame], workers: int = 0, size: Tuple[float, float] = (8, 6),
+                  dpi: float = 100, fmt: str = "png", progress=None) -> int:
+    """
+    Dibuja los cuadros en `workers` procesos (0 = uno por CPU, 1 = en
+    este proceso). Los cuadros se envían a medida que el iterable los
+    produce, con a lo sumo FRAMES_IN_FLIGHT por proceso pendientes, así
+    la simulación y el dibujo avanzan a la par sin juntar todos los
+    cuadros en memoria. Devuelve la cantidad de cuadros escritos.
+    """
+    workers = workers or os.cpu_count() or 1
+    done = 0
+    if workers == 1:
+        renderer = FrameRenderer(size, dpi, fmt)
+        for frame in frames:
+            renderer.render(frame)
+            done += 1
+            if progress:
+                progress(done)
+        return done
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(size, dpi, fmt)) as pool:
+        pending = deque()
+        for frame in frames:
+            pending.append(pool.submit(_render_in_worker, frame))
+            if len(pending) >= workers * FRAMES_IN_FLIGHT:
+                pending.popleft().result()
+                done += 1
+                if progress:
+                    progress(done)
+        while pending:
+            pending.popleft().result()
+            done += 1
+            if progress:
+                progress(done)
+    return done
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Renderiza el grafo de espera a imágenes sin abrir la GUI")
+    parser.add_argument("config", help="archivo de configuración (admite .gz/.bz2/.xz)")
+    parser.add_argument("events", help="archivo de eventos (admite .gz/.bz2/.xz)")
+    parser.add_argument("out_dir", help="directorio donde se escriben los cuadros")
+    parser.add_argument("--every", type=int, default=0, metavar="N",
+                        help="un cuadro cada N ticks (además de los interbloqueos)")
+    parser.add_argument("--no-deadlocks", action="store_true",
+                        help="no generar un cuadro en cada interbloqueo detectado")
+    parser.add_argument("--format", default="png", choices=("png", "svg", "pdf", "jpg"),
+                        help="formato de las imágenes (por defecto png)")
+    parser.add_argument("--dpi", type=float, default=100, help="resolución de los formatos raster")
+    parser.add_argument("--size", type=float, nargs=2, default=(8, 6), metavar=("ANCHO", "ALTO"),
+                        help="tamaño de la figura en pulgadas (por defecto 8 6)")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="procesos de dibujo (por defecto uno por CPU; 1 = sin pool)")
+    args = parser.parse_args(argv)
+    if args.every <= 0 and args.no_deadlocks:
+        parser.error("no hay cuadros que generar: use --every N o quite --no-deadlocks")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    state = load_config(args.config)
+    events = iter_events(args.events, state)
+    collector = FrameCollector(state, args.out_dir, args.format, not args.no_deadlocks)
+    out = sys.stdout
+
+    def progress(done):
+        if done % 100 == 0:
+            print(f"[RENDER] {done} cuadros", file=out, flush=True)
+
+    start = time.perf_counter()
+    # La salida por tick del motor no interesa aquí
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        done = render_frames(iter_frames(state, events, collector, args.every), args.workers,
+                             tuple(args.size), args.dpi, args.format, progress)
+    elapsed = time.perf_counter() - start
+    print(f"[RENDER] {done} cuadros en {args.out_dir} ({elapsed:.1f} s, "
+          f"{done / elapsed if elapsed else 0:.1f} cuadros/s)", file=out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
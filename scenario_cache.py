@@ -0,0 +1,164 @@
+"""
+Caché en disco de escenarios ya parseados.
+
+Cada par (config, eventos) se identifica por el hash del contenido de
+ambos archivos. La entrada guarda el SystemState inicial (pickle) y los
+eventos ya validados en formato binario .evb, que se leen con mmap sin
+volver a parsear el CSV. Si cualquiera de los archivos cambia, su hash
+cambia y la entrada vieja simplemente deja de usarse; la poda LRU por
+tamaño total la elimina después.
+
+El pickle no incluye el historial de eventos ni la política de detección
+(SystemState.RUNTIME_FIELDS): la ruta de volcado del historial es relativa
+a la carpeta de la configuración, y la misma entrada sirve para copias
+idénticas en otras carpetas. Se rehacen desde la configuración pedida en
+cada carga.
+
+Uso:
+    state, events = load_scenario("config2.json", "events2.csv")
+    run_simulation(state, events)
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+from bintrace import iter_bin_events, write_trace
+from io_utils import configure_runtime, load_config, iter_events
+from models import Event, SystemState
+
+
+# Se incrementa cuando cambia el contenido de las entradas
+CACHE_VERSION = 6
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "INTERBLOQUEOS_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "interbloqueos"),
+)
+
+# Tamaño máximo total de la caché (bytes)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+STATE_SUFFIX = ".state"
+EVENTS_SUFFIX = ".evb"
+
+
+def scenario_key(config_path: str, events_path: str) -> str:
+    """Hash del contenido de ambos archivos (más la versión del formato)."""
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"v{CACHE_VERSION}".encode())
+    for path in (config_path, events_path):
+        h.update(b"\0")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    return h.hexdigest()
+
+
+class ScenarioCache:
+    """Directorio de entradas <clave>.state + <clave>.evb con poda LRU."""
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, key: str) -> Tuple[str, str]:
+        base = os.path.join(self.directory, key)
+        return base + STATE_SUFFIX, base + EVENTS_SUFFIX
+
+    def get(self, key: str) -> Optional[Tuple[SystemState, Iterator[Event]]]:
+        """Devuelve (estado, iterador de eventos) o None si no hay entrada."""
+        state_path, events_path = self._paths(key)
+        try:
+            with open(state_path, "rb") as f:
+                state = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if not os.path.exists(events_path):
+            return None
+        # Marca de uso para la política LRU
+        for path in (state_path, events_path):
+            os.utime(path)
+        return state, iter_bin_events(events_path)
+
+    def put(self, key: str, state: SystemState, events) -> None:
+        """
+        Guarda el estado inicial y los eventos. Se escribe primero a
+        archivos temporales y se renombran al final, así una entrada
+        nunca queda a medio escribir.
+        """
+        state_path, events_path = self._paths(key)
+        fd, tmp_events = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(fd)
+        fd, tmp_state = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            write_trace(events, tmp_events)
+            os.replace(tmp_events, events_path)
+            os.replace(tmp_state, state_path)
+        finally:
+            for tmp in (tmp_events, tmp_state):
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        self.evict()
+
+    def evict(self) -> None:
+        """Borra las entradas menos usadas hasta quedar bajo max_bytes."""
+        entries = {}
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                key, ext = os.path.splitext(entry.name)
+                if ext not in (STATE_SUFFIX, EVENTS_SUFFIX):
+                    continue
+                st = entry.stat()
+                size, last = entries.get(key, (0, 0.0))
+                entries[key] = (size + st.st_size, max(last, st.st_mtime))
+                total += st.st_size
+
+        for key, (size, _) in sorted(entries.items(), key=lambda kv: kv[1][1]):
+            if total <= self.max_bytes:
+                break
+            for path in self._paths(key):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+
+    def clear(self) -> None:
+        """Vacía la caché."""
+        max_bytes, self.max_bytes = self.max_bytes, -1
+        try:
+            self.evict()
+        finally:
+            self.max_bytes = max_bytes
+
+
+def load_scenario(
+    config_path: str,
+    events_path: str,
+    cache: Optional[ScenarioCache] = None,
+) -> Tuple[SystemState, Iterator[Event]]:
+    """
+    Carga config + eventos pasando por la caché. En un acierto no se
+    parsean los eventos (solo las opciones de ejecución de la
+    configuración); en un fallo se parsea y valida una vez, se guarda la
+    entrada y los eventos se leen desde ella.
+    """
+    cache = cache or ScenarioCache()
+    key = scenario_key(config_path, events_path)
+    hit = cache.get(key)
+    if hit is not None:
+        configure_runtime(hit[0], config_path)
+        return hit
+
+    state = load_config(config_path)
+    cache.put(key, state, iter_events(events_path, state))
+    hit = cache.get(key)
+    if hit is None:  # la entrada no cabe en la caché: se lee directo
+        return state, iter_events(events_path, state)
+    return state, hit[1]
@@ -0,0 +1,309 @@
+"""
+Generador reproducible de escenarios (config.json + events.csv).
+
+Con la misma semilla y los mismos parámetros produce siempre los mismos
+archivos. Los eventos se escriben en streaming, así que el tamaño del
+escenario solo lo limita el disco, y cada escenario va a un par de
+archivos de nombre único: dos generaciones en paralelo no se pisan.
+
+Patrones:
+    aleatorio        REQUEST/RELEASE/COMPUTE al azar (el generador original de la GUI)
+    anillo           rondas de k procesos; cada uno retiene un recurso y pide el del siguiente
+    punto_caliente   todos compiten por R1; el interbloqueo cruza R1 con otro recurso
+    filosofos        cena de los filósofos: P_i usa los tenedores R_i y R_(i+1)
+
+En los patrones estructurados cada ronda termina en interbloqueo con
+probabilidad `deadlock_probability`; si no, los mismos procesos esperan
+en cadena sin cerrar el ciclo. Los pedidos toman todas las instancias
+del recurso. Al cerrar una ronda todos liberan lo que retienen y vuelven
+a pedir (y liberar) lo que esperaban: la asignación y las solicitudes
+quedan vacías sin importar qué víctima se abortó (su RELEASE se rechaza),
+así que las rondas son independientes.
+
+Uso:
+    python scenario_gen.py --patron anillo --procesos 200 --recursos 50 \\
+        --eventos 2000000 --semilla 7 --prob 0.3 --dir escenarios/
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass, replace
+from itertools import islice
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from io_utils import open_output
+
+
+PATTERNS = ("aleatorio", "anillo", "punto_caliente", "filosofos")
+
+# Filas que se escriben (y se informan como progreso) de una vez
+WRITE_BATCH = 1 << 16
+
+Row = Tuple[str, str, str, int]  # type, process, resource, amount_or_time
+
+
+@dataclass
+class ScenarioSpec:
+    """Parámetros de un escenario. Sin semilla se elige una al generar."""
+    pattern: str = "aleatorio"
+    processes: int = 3
+    resources: int = 2
+    events: int = 10
+    seed: Optional[int] = None
+    deadlock_probability: float = 0.5
+    ring_size: int = 3  # procesos por ronda en "anillo"
+    detection_interval: int = 1
+    victim_policy: str = "menor_trabajo_hecho"
+
+    def validate(self) -> None:
+        if self.pattern not in PATTERNS:
+            raise ValueError(f"Patrón desconocido: {self.pattern}. Opciones: {', '.join(PATTERNS)}")
+        if self.processes < 1 or self.resources < 1 or self.events < 0:
+            raise ValueError("Se necesita al menos un proceso y un recurso")
+        if self.pattern != "aleatorio" and self.processes < 2:
+            raise ValueError(f"El patrón {self.pattern} necesita al menos 2 procesos")
+        if self.pattern in ("anillo", "punto_caliente") and self.resources < 2:
+            raise ValueError(f"El patrón {self.pattern} necesita al menos 2 recursos")
+        if self.pattern == "anillo" and self.ring_size < 2:
+            raise ValueError("Un anillo necesita al menos 2 procesos")
+        if not 0.0 <= self.deadlock_probability <= 1.0:
+            raise ValueError("La probabilidad de interbloqueo debe estar entre 0 y 1")
+        if self.detection_interval < 1:
+            raise ValueError("El intervalo de detección debe ser al menos 1")
+
+
+def random_spec(seed: Optional[int] = None) -> ScenarioSpec:
+    """Escenario chico al azar (el modo "Generar automáticamente" de la GUI)."""
+    if seed is None:
+        seed = random.randrange(1 << 32)
+    rng = random.Random(seed)
+    return ScenarioSpec(
+        processes=rng.randint(3, 6),
+        resources=rng.randint(2, 4),
+        events=rng.randint(10, 20),
+        seed=seed,
+    )
+
+
+def build_config(spec: ScenarioSpec, rng: random.Random) -> dict:
+    """Configuración del escenario; guarda también los parámetros usados."""
+    resources = spec.processes if spec.pattern == "filosofos" else spec.resources
+    return {
+        "mode": "deteccion",
+        "victim_policy": spec.victim_policy,
+        "detection_interval": spec.detection_interval,
+        "processes": [{"pid": f"P{i + 1}", "priority": rng.randint(1, 3)}
+                      for i in range(spec.processes)],
+        # Un tenedor es de uso exclusivo
+        "resources": [{"rid": f"R{i + 1}",
+                       "instances": 1 if spec.pattern == "filosofos" else rng.randint(1, 3)}
+                      for i in range(resources)],
+        # load_config ignora esta clave: sirve para reproducir el escenario
+        "generator": asdict(spec),
+    }
+
+
+# ───────────────────────────────────────────────
+# Patrones (generadores infinitos de filas)
+# ───────────────────────────────────────────────
+
+def _random_rows(config: dict, spec: ScenarioSpec, rng: random.Random) -> Iterator[Row]:
+    pids = [p["pid"] for p in config["processes"]]
+    rids = [r["rid"] for r in config["resources"]]
+    kinds = ("REQUEST", "RELEASE", "COMPUTE")
+    while True:
+        kind = rng.choice(kinds)
+        pid = rng.choice(pids)
+        if kind == "COMPUTE":
+            yield kind, pid, "", rng.randint(1, 3)
+        else:
+            yield kind, pid, rng.choice(rids), rng.randint(1, 2)
+
+
+def _wait_round(procs: List[str], res: List[str], units: dict, deadlock: bool,
+                spec: ScenarioSpec, rng: random.Random) -> Iterator[Row]:
+    """
+    Ronda en la que procs[i] retiene res[i] y pide res[i + 1]. Con
+    `deadlock` el último pide res[0] y cierra el ciclo; si no, trabaja y
+    libera, y la cadena se deshace hacia atrás.
+    """
+    k = len(procs)
+    for pid, rid in zip(procs, res):
+        yield "REQUEST", pid, rid, units[rid]
+    for i in range(k - 1):
+        yield "REQUEST", procs[i], res[i + 1], units[res[i + 1]]
+    last = procs[-1]
+    if deadlock:
+        yield "REQUEST", last, res[0], units[res[0]]
+        # Que algún tick de detección caiga con el ciclo cerrado
+        for _ in range(spec.detection_interval - 1):
+            yield "COMPUTE", last, "", 1
+        # Limpieza: liberar lo retenido y volver a pedir lo esperado
+        for pid, rid in zip(procs, res):
+            yield "RELEASE", pid, rid, units[rid]
+        for i, pid in enumerate(procs):
+            rid = res[(i + 1) % k]
+            yield "REQUEST", pid, rid, units[rid]
+            yield "RELEASE", pid, rid, units[rid]
+    else:
+        yield "COMPUTE", last, "", rng.randint(1, 3)
+        yield "RELEASE", last, res[-1], units[res[-1]]
+        for i in range(k - 2, -1, -1):
+            pid, held, wanted = procs[i], res[i], res[i + 1]
+            yield "REQUEST", pid, wanted, units[wanted]
+            yield "COMPUTE", pid, "", rng.randint(1, 3)
+            yield "RELEASE", pid, wanted, units[wanted]
+            yield "RELEASE", pid, held, units[held]
+
+
+def _ring_rows(config: dict, spec: ScenarioSpec, rng: random.Random) -> Iterator[Row]:
+    pids = [p["pid"] for p in config["processes"]]
+    units = {r["rid"]: r["instances"] for r in config["resources"]}
+    rids = list(units)
+    k = min(spec.ring_size, len(pids), len(rids))
+    while True:
+        deadlock = rng.random() < spec.deadlock_probability
+        yield from _wait_round(rng.sample(pids, k), rng.sample(rids, k), units, deadlock, spec, rng)
+
+
+def _philosophers_rows(config: dict, spec: ScenarioSpec, rng: random.Random) -> Iterator[Row]:
+    pids = [p["pid"] for p in config["processes"]]
+    units = {r["rid"]: r["instances"] for r in config["resources"]}
+    forks = list(units)
+    while True:
+        deadlock = rng.random() < spec.deadlock_probability
+        # Empieza a comer un filósofo distinto en cada ronda
+        start = rng.randrange(len(pids))
+        procs = pids[start:] + pids[:start]
+        res = forks[start:] + forks[:start]
+        yield from _wait_round(procs, res, units, deadlock, spec, rng)
+
+
+def _hotspot_rows(config: dict, spec: ScenarioSpec, rng: random.Random) -> Iterator[Row]:
+    pids = [p["pid"] for p in config["processes"]]
+    units = {r["rid"]: r["instances"] for r in config["resources"]}
+    hot, others = config["resources"][0]["rid"], list(units)[1:]
+    while True:
+        if rng.random() < spec.deadlock_probability:
+            a, b = rng.sample(pids, 2)
+            x = rng.choice(others)
+            yield "REQUEST", a, hot, units[hot]
+            yield "REQUEST", b, x, units[x]
+            yield "REQUEST", a, x, units[x]
+            yield "REQUEST", b, hot, units[hot]
+            for _ in range(spec.detection_interval - 1):
+                yield "COMPUTE", b, "", 1
+            yield "RELEASE", a, hot, units[hot]
+            yield "RELEASE", b, x, units[x]
+            for pid, rid in ((a, x), (b, hot)):
+                yield "REQUEST", pid, rid, units[rid]
+                yield "RELEASE", pid, rid, units[rid]
+        else:
+            # Cola sobre el recurso caliente: bloqueos sin ciclo
+            queue = rng.sample(pids, rng.randint(2, min(len(pids), 5)))
+            for pid in queue:
+                yield "REQUEST", pid, hot, units[hot]
+            for i, pid in enumerate(queue):
+                if i:
+                    yield "REQUEST", pid, hot, units[hot]
+                yield "COMPUTE", pid, "", rng.randint(1, 3)
+                yield "RELEASE", pid, hot, units[hot]
+
+
+_PATTERN_ROWS = {
+    "aleatorio": _random_rows,
+    "anillo": _ring_rows,
+    "punto_caliente": _hotspot_rows,
+    "filosofos": _philosophers_rows,
+}
+
+
+def iter_rows(spec: ScenarioSpec, config: dict, rng: random.Random) -> Iterator[Row]:
+    """Las `spec.events` filas del escenario (usar el rng que generó `config`)."""
+    return islice(_PATTERN_ROWS[spec.pattern](config, spec, rng), spec.events)
+
+
+def write_scenario(
+    spec: ScenarioSpec,
+    directory: Optional[str] = None,
+    compress: bool = False,
+    progress: Optional[Callable[[int], None]] = None,
+    cancel: Optional[threading.Event] = None,
+) -> Optional[Tuple[str, str, ScenarioSpec]]:
+    """
+    Escribe el escenario en `directory` (por defecto el temporal del
+    sistema) y devuelve (config, eventos, spec con la semilla usada).
+    Con `compress` los eventos van a .csv.gz. Si `cancel` se activa, se
+    borran los archivos y devuelve None.
+    """
+    spec.validate()
+    if spec.seed is None:
+        spec = replace(spec, seed=random.randrange(1 << 32))
+    rng = random.Random(spec.seed)
+    config = build_config(spec, rng)
+
+    fd, config_path = tempfile.mkstemp(prefix=f"escenario_{spec.pattern}_s{spec.seed}_",
+                                       suffix=".json", dir=directory)
+    events_path = config_path[:-len(".json")] + (".csv.gz" if compress else ".csv")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+    rows = iter_rows(spec, config, rng)
+    done = 0
+    with open_output(events_path) as f:
+        f.write("type,process,resource,amount_or_time\n")
+        while True:
+            batch = list(islice(rows, WRITE_BATCH))
+            if not batch:
+                break
+            f.write("".join(f"{kind},{pid},{rid},{amount}\n" for kind, pid, rid, amount in batch))
+            done += len(batch)
+            if progress:
+                progress(done)
+            if cancel is not None and cancel.is_set():
+                break
+    if cancel is not None and cancel.is_set():
+        os.remove(config_path)
+        os.remove(events_path)
+        return None
+    return config_path, events_path, spec
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Genera un escenario reproducible (config.json + events.csv)")
+    parser.add_argument("--patron", default="aleatorio", choices=PATTERNS, help="patrón de contención")
+    parser.add_argument("--procesos", type=int, default=10)
+    parser.add_argument("--recursos", type=int, default=5, help="ignorado en filosofos (un tenedor por proceso)")
+    parser.add_argument("--eventos", type=int, default=1000)
+    parser.add_argument("--semilla", type=int, default=None, help="sin semilla se elige una y se informa")
+    parser.add_argument("--prob", type=float, default=0.5,
+                        help="probabilidad de que cada ronda termine en interbloqueo (patrones estructurados)")
+    parser.add_argument("--anillo", type=int, default=3, help="procesos por ronda en el patrón anillo")
+    parser.add_argument("--intervalo", type=int, default=1, help="intervalo de detección de la configuración")
+    parser.add_argument("--dir", default=".", help="directorio de salida (por defecto el actual)")
+    parser.add_argument("--gz", action="store_true", help="comprimir los eventos (.csv.gz)")
+    args = parser.parse_args(argv)
+
+    spec = ScenarioSpec(args.patron, args.procesos, args.recursos, args.eventos, args.semilla,
+                        args.prob, args.anillo, args.intervalo)
+    try:
+        spec.validate()
+    except ValueError as e:
+        parser.error(str(e))
+    os.makedirs(args.dir, exist_ok=True)
+    start = time.perf_counter()
+    config_path, events_path, spec = write_scenario(spec, args.dir, args.gz)
+    elapsed = time.perf_counter() - start
+    print(f"[GEN] semilla {spec.seed}: {spec.events} eventos en {elapsed:.1f} s")
+    print(config_path)
+    print(events_path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+Administrador de recursos como servicio local (asyncio, TCP o socket Unix).
+
+Los clientes envían líneas con el formato de events.csv, sin cabecera:
+
+    REQUEST,P1,R1,2
+    RELEASE,P1,R1,1
+    COMPUTE,P1,,3
+
+Cada línea se valida con el mismo parser que los archivos
+(io_utils.parse_event_lines), se aplica al SystemState con los
+manejadores de sim.py y se responde, en orden, con la decisión del motor:
+
+    GRANT,P1,R1,2    BLOCK,...    RELEASE,...    DENY,...    COMPUTE,...
+    ERROR,<descripción>           (línea inválida; no se aplica)
+
+Igual que en la simulación, un REQUEST bloqueado queda pendiente hasta que
+el proceso lo vuelva a pedir con éxito. Una tarea de fondo ejecuta la
+detección cada `interval` segundos, resuelve todos los ciclos (víctima
+según victim_policy de la configuración) y avisa a las conexiones que
+usaron el proceso abortado con una línea no solicitada:
+
+    ABORT,P2,P1 P2 P3     (víctima, procesos del ciclo)
+
+Un proceso que espera un recurso del que es el único dueño (pidió más
+unidades de lo que ya tiene y no quedan) tampoco puede avanzar: el grafo
+de espera no tiene aristas a sí mismo, así que se detecta aparte, como en
+lockmon.py, y se aborta con el ciclo `ABORT,P1,P1`.
+
+Los clientes pueden mandar muchas líneas sin esperar respuesta: se leen
+en bloques y las respuestas de un bloque se escriben de una vez, que es
+lo que permite decenas de miles de mensajes por segundo. Ver loadgen.py.
+
+Uso:
+    python server.py config2.json --port 8765
+    python server.py config2.json --unix /tmp/interbloqueos.sock
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import signal
+import sys
+import time
+from typing import Dict, List, Optional, Set, TextIO
+
+from deadlock import build_wait_for_graph, resolve_deadlock, select_victim, strongly_connected_components
+from io_utils import load_config, parse_event_lines
+from models import SystemState
+from sim import handle_compute, handle_release, handle_request
+
+
+DEFAULT_PORT = 8765
+
+# Segundos entre pasadas de la detección
+DETECTION_INTERVAL = 0.05
+
+# Bytes que se leen de una conexión por vez
+READ_SIZE = 1 << 16
+
+# Cabecera implícita de las líneas que mandan los clientes
+HEADER = "type,process,resource,amount_or_time"
+
+_HANDLERS = {"REQUEST": handle_request, "RELEASE": handle_release, "COMPUTE": handle_compute}
+
+
+class _Decision:
+    """Tracer que se queda con la decisión del último evento aplicado."""
+    __slots__ = ("kind",)
+
+    def __init__(self):
+        self.kind = ""
+
+    def emit(self, kind: str, tick: int, pid: Optional[str], rid: Optional[str] = None,
+             amount: int = 0, detail: Optional[str] = None) -> None:
+        self.kind = kind
+
+
+class ResourceServer:
+    """
+    Estado compartido por todas las conexiones. Todo corre en el bucle de
+    asyncio, así que los manejadores y la detección nunca se pisan.
+    """
+
+    def __init__(self, state: SystemState, interval: float = DETECTION_INTERVAL,
+                 out: TextIO = sys.stderr):
+        self.state = state
+        self.interval = interval
+        self.out = out
+        self.messages = 0
+        self.errors = 0
+        self.deadlocks = 0
+        self.clients = 0
+        # pid -> conexiones que mandaron eventos de ese proceso (para avisar abortos)
+        self._owners: Dict[str, Set[asyncio.StreamWriter]] = {}
+        self._decision = _Decision()
+        self._stop: Optional[asyncio.Event] = None
+        self._writers: Set[asyncio.StreamWriter] = set()
+        # Dirección real en la que escucha (con port=0 el sistema elige el puerto)
+        self.address = None
+
+    def apply_lines(self, lines: List[str], pids: Set[str], writer) -> str:
+        """Aplica un bloque de líneas y devuelve las respuestas, una por línea no vacía."""
+        replies: List[str] = []
+
+        def on_error(lineno: int, msg: str) -> None:
+            self.errors += 1
+            replies.append(f"ERROR,{msg}\n")
+
+        state = self.state
+        decision = self._decision
+        applied = 0
+        for event in parse_event_lines(([HEADER], lines), "<cliente>", state, on_error):
+            state.tick += 1
+            _HANDLERS[event.type](state, event, decision)
+            pid = event.process_id
+            if pid not in pids:
+                pids.add(pid)
+                self._owners.setdefault(pid, set()).add(writer)
+            replies.append(f"{decision.kind},{pid},{event.resource_id or ''},{event.amount_or_time}\n")
+            applied += 1
+        self.messages += applied
+        return "".join(replies)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.clients += 1
+        self._writers.add(writer)
+        pids: Set[str] = set()
+        partial = b""
+        try:
+            while True:
+                data = await reader.read(READ_SIZE)
+                if not data:
+                    break
+                data = partial + data
+                end = data.rfind(b"\n") + 1
+                partial = data[end:]
+                if not end:
+                    continue
+                lines = data[:end].decode("utf-8", "replace").split("\n")
+                lines.pop()  # vacío después del último salto de línea
+                reply = self.apply_lines([line.rstrip("\r") for line in lines], pids, writer)
+                if reply:
+                    writer.write(reply.encode())
+                    await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for pid in pids:
+                owners = self._owners.get(pid)
+                if owners is not None:
+                    owners.discard(writer)
+                    if not owners:
+                        del self._owners[pid]
+            self.clients -= 1
+            self._writers.discard(writer)
+            writer.close()
+
+    def self_waits(self) -> List[str]:
+        """Procesos con un pedido pendiente de un recurso del que son el único dueño."""
+        state = self.state
+        holders: Dict[str, Set[str]] = {}
+        for (pid, rid), units in state.allocation.items():
+            if units > 0:
+                holders.setdefault(rid, set()).add(pid)
+        waits = []
+        for (pid, rid), units in state.requests.items():
+            if units > 0 and holders.get(rid) == {pid} and pid not in waits:
+                waits.append(pid)
+        return waits
+
+    def resolve_cycles(self) -> int:
+        """
+        Una ronda de detección: aborta a los procesos que se esperan a sí
+        mismos y, sobre el grafo de espera (deadlock.py, sin la salida de
+        depuración del motor), una víctima por cada componente fuertemente
+        conexa con más de un proceso; avisa a sus clientes. Devuelve
+        cuántas víctimas abortó.
+        """
+        state = self.state
+        if not state.requests:
+            return 0
+        resolved = 0
+        for pid in self.self_waits():
+            self._abort([pid])
+            resolved += 1
+        graph = build_wait_for_graph(state, verbose=False)
+        for cycle in strongly_connected_components(graph):
+            if len(cycle) > 1:
+                self._abort(cycle)
+                resolved += 1
+        self.deadlocks += resolved
+        return resolved
+
+    def _abort(self, cycle: List[str]) -> None:
+        victim = select_victim(self.state, cycle)
+        resolve_deadlock(self.state, victim)
+        line = f"ABORT,{victim},{' '.join(cycle)}\n".encode()
+        for writer in self._owners.get(victim, ()):
+            if not writer.is_closing():
+                writer.write(line)
+
+    async def detection_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            # Abortar una víctima puede dejar otro ciclo en la misma componente:
+            # se repite hasta que no quede ninguno, cediendo el bucle entre
+            # rondas para que los clientes no esperen toda la resolución
+            while self.resolve_cycles():
+                await asyncio.sleep(0)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                    unix_path: Optional[str] = None) -> None:
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_client, unix_path)
+            self.address = where = unix_path
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            self.address = server.sockets[0].getsockname()[:2]
+            where = "%s:%d" % self.address
+        print(f"[SERVIDOR] Escuchando en {where} (detección cada {self.interval * 1000:.0f} ms)",
+              file=self.out, flush=True)
+        self._stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            # No disponible en Windows: ahí Ctrl+C llega como KeyboardInterrupt
+            with contextlib.suppress(NotImplementedError, AttributeError, ValueError):
+                loop.add_signal_handler(sig, self._stop.set)
+        detector = asyncio.ensure_future(self.detection_loop())
+        try:
+            async with server:
+                await self._stop.wait()
+        finally:
+            detector.cancel()
+            # Cortar las conexiones abiertas para que sus tareas terminen solas
+            # (close() esperaría a que un cliente lento lea lo pendiente)
+            for writer in list(self._writers):
+                writer.transport.abort()
+            while self._writers:
+                await asyncio.sleep(0)
+            if unix_path:
+                with contextlib.suppress(OSError):
+                    os.unlink(unix_path)
+
+    def stop(self) -> None:
+        """Termina serve() (se puede llamar desde el mismo bucle)."""
+        if self._stop is not None:
+            self._stop.set()
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Administrador de recursos como servicio (asyncio)")
+    parser.add_argument("config", help="archivo de configuración (procesos y recursos)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", metavar="RUTA", help="escuchar en un socket Unix en lugar de TCP")
+    parser.add_argument("--intervalo", type=float, default=DETECTION_INTERVAL,
+                        help="segundos entre pasadas de la detección")
+    parser.add_argument("--verbose", action="store_true",
+                        help="mostrar la salida del motor por cada mensaje (lento)")
+    args = parser.parse_args(argv)
+
+    state = load_config(args.config)
+    server = ResourceServer(state, args.intervalo)
+    start = time.perf_counter()
+    # Los manejadores del motor imprimen cada decisión: sin --verbose se descarta
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(sys.stdout if args.verbose else null):
+        try:
+            asyncio.run(server.serve(args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            pass
+        except OSError as exc:
+            print(f"[SERVIDOR] No se pudo escuchar: {exc}", file=sys.stderr)
+            return 1
+    elapsed = time.perf_counter() - start
+    print(f"[SERVIDOR] {server.messages} mensajes en {elapsed:.1f} s, {server.errors} inválidos, "
+          f"{server.deadlocks} interbloqueos resueltos", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
-from typing import List
+import time
+from typing import Iterable, List, Optional, Tuple
 from models import SystemState, Event
 from deadlock import build_wait_for_graph, detect_cycle, select_victim, resolve_deadlock
 
@@ -6,36 +7,18 @@ from deadlock import build_wait_for_graph, detect_cycle, select_victim, resolve_
 # Función principal del motor de simulación
 # ───────────────────────────────────────────────
 
-def run_simulation(state: SystemState, events: List[Event]) -> None:
+def run_simulation(state: SystemState, events: Iterable[Event], tracer=None) -> None:
+    """
+    Ejecuta la simulación consumiendo `events` de uno en uno: acepta una
+    lista o cualquier iterable (por ejemplo io_utils.iter_events), por lo
+    que no hace falta tener la traza completa en memoria.
+    Si se pasa `tracer` (tracelog.TraceWriter o cualquier objeto con
+    emit()), cada decisión del motor queda registrada en él.
+    """
     print("\n=== INICIO DE LA SIMULACIÓN ===\n")
 
     for i, event in enumerate(events):
-        state.tick += 1
-        print(f"--- Tick {state.tick} | Evento {i}: {event.type} {event.process_id} {event.resource_id or ''} {event.amount_or_time}")
-
-        if event.type == "REQUEST":
-            handle_request(state, event)
-        elif event.type == "RELEASE":
-            handle_release(state, event)
-        elif event.type == "COMPUTE":
-            handle_compute(state, event)
-
-        # Mostrar estado del sistema después de cada evento
-        show_state(state)
-        print("-" * 50)
-
-        # Cada cierto número de ticks, verificar interbloqueos
-        if state.mode == "deteccion" and state.tick % state.detection_interval == 0:
-            print(f"\n[DEBUG] Tick {state.tick}: analizando interbloqueo...")
-            graph = build_wait_for_graph(state)
-            cycle = detect_cycle(graph)
-            if cycle:
-                print(f"\nPosible interbloqueo detectado entre: {', '.join(cycle)}")
-                victim = select_victim(state, cycle)
-                resolve_deadlock(state, victim)
-                # Mostrar el estado actualizado después de resolver
-                show_state(state)
-                print("-" * 50)
+        step(state, event, i, tracer)
 
     print("\n=== FIN DE LA SIMULACIÓN ===")
 
@@ -43,58 +26,144 @@ def run_simulation(state: SystemState, events: List[Event]) -> None:
     show_summary(state)
 
 
+def step(state: SystemState, event: Event, index: int, tracer=None) -> Optional[Tuple[List[str], str]]:
+    """
+    Avanza un tick: aplica `event` y, si toca, ejecuta la detección.
+    Devuelve (ciclo, víctima) si se detectó y resolvió un interbloqueo,
+    o None. Es la unidad que usan run_simulation y el modo follow.
+    """
+    state.tick += 1
+    print(f"--- Tick {state.tick} | Evento {index}: {event.type} {event.process_id} {event.resource_id or ''} {event.amount_or_time}")
+
+    if event.type == "REQUEST":
+        handle_request(state, event, tracer)
+    elif event.type == "RELEASE":
+        handle_release(state, event, tracer)
+    elif event.type == "COMPUTE":
+        handle_compute(state, event, tracer)
+
+    # Mostrar estado del sistema después de cada evento
+    show_state(state)
+    print("-" * 50)
+
+    # Cada cierto número de ticks (o cuando lo indique la política adaptativa), verificar interbloqueos
+    if state.mode == "deteccion":
+        policy = state.detection_policy
+        if policy is None:
+            if state.tick % state.detection_interval == 0:
+                return detect_and_resolve(state, tracer)
+        elif policy.due(state.tick):
+            start = time.perf_counter()
+            result = detect_and_resolve(state, tracer)
+            policy.record_check(state.tick, result[0] if result else None, time.perf_counter() - start)
+            return result
+    return None
+
+
+def detect_and_resolve(state: SystemState, tracer=None) -> Optional[Tuple[List[str], str]]:
+    """Construye el grafo de espera y, si hay ciclo, aborta una víctima."""
+    print(f"\n[DEBUG] Tick {state.tick}: analizando interbloqueo...")
+    graph = build_wait_for_graph(state)
+    cycle = detect_cycle(graph)
+    if not cycle:
+        return None
+    print(f"\nPosible interbloqueo detectado entre: {', '.join(cycle)}")
+    # DETECT se emite antes de abortar: un tracer que mire el estado ve el ciclo
+    if tracer is not None:
+        tracer.emit("DETECT", state.tick, None, None, len(cycle), " ".join(cycle))
+    victim = select_victim(state, cycle)
+    released = resolve_deadlock(state, victim)
+    if tracer is not None:
+        for rid, units in released:
+            tracer.emit("ABORT", state.tick, victim, rid, units)
+        if not released:
+            tracer.emit("ABORT", state.tick, victim)
+    # Mostrar el estado actualizado después de resolver
+    show_state(state)
+    print("-" * 50)
+    return cycle, victim
+
+
 # ───────────────────────────────────────────────
 # Funciones auxiliares de manejo de eventos
 # ───────────────────────────────────────────────
 
-def handle_request(state: SystemState, e: Event):
+def handle_request(state: SystemState, e: Event, tracer=None):
+    # Lecturas locales: evitan búsquedas de atributo repetidas en el camino caliente
     pid = e.process_id
     rid = e.resource_id
     req = e.amount_or_time
+    key = (pid, rid)
+    allocation = state.allocation
+    requests = state.requests
 
     resource = state.resources[rid]
-    allocated = state.get_allocation(pid, rid)
-    requested = state.get_request(pid, rid)
 
     # Si hay suficientes instancias disponibles
     if resource.available_instances >= req:
         resource.available_instances -= req
-        state.set_allocation(pid, rid, allocated + req)
-        state.set_request(pid, rid, 0)
+        units = allocation.get(key, 0) + req
+        if units > 0:
+            allocation[key] = units
+        else:
+            allocation.pop(key, None)
+        requests.pop(key, None)
         print(f"{pid} obtiene {req} instancia(s) de {rid}.")
+        if tracer is not None:
+            tracer.emit("GRANT", state.tick, pid, rid, req)
+        if state.detection_policy is not None:
+            state.detection_policy.note_grant(pid, state.tick)
         # Si estaba bloqueado, lo desbloqueamos
-        if pid in state.blocked_processes:
-            state.blocked_processes.remove(pid)
+        state.blocked_processes.discard(pid)
     else:
         # No hay suficientes instancias, el proceso se bloquea
-        state.set_request(pid, rid, requested + req)
+        units = requests.get(key, 0) + req
+        if units > 0:
+            requests[key] = units
+        else:
+            requests.pop(key, None)
         state.blocked_processes.add(pid)
+        if state.detection_policy is not None:
+            state.detection_policy.note_block(pid, state.tick)
         print(f"{pid} BLOQUEADO: no hay suficientes instancias de {rid}.")
+        if tracer is not None:
+            tracer.emit("BLOCK", state.tick, pid, rid, req)
 
 
-def handle_release(state: SystemState, e: Event):
+def handle_release(state: SystemState, e: Event, tracer=None):
     pid = e.process_id
     rid = e.resource_id
     rel = e.amount_or_time
+    key = (pid, rid)
+    allocation = state.allocation
 
     resource = state.resources[rid]
-    allocated = state.get_allocation(pid, rid)
+    allocated = allocation.get(key, 0)
 
     # Solo libera si tenía asignadas
     if allocated >= rel:
         resource.available_instances += rel
-        state.set_allocation(pid, rid, allocated - rel)
+        if allocated - rel > 0:
+            allocation[key] = allocated - rel
+        else:
+            allocation.pop(key, None)
         print(f"{pid} libera {rel} instancia(s) de {rid}.")
+        if tracer is not None:
+            tracer.emit("RELEASE", state.tick, pid, rid, rel)
     else:
         print(f"{pid} intentó liberar {rel} de {rid}, pero solo tenía {allocated} asignadas.")
+        if tracer is not None:
+            tracer.emit("DENY", state.tick, pid, rid, rel, str(allocated))
 
 
-def handle_compute(state: SystemState, e: Event):
+def handle_compute(state: SystemState, e: Event, tracer=None):
     pid = e.process_id
     time = e.amount_or_time
     proc = state.processes[pid]
     proc.work_done += time
     print(f"💻 {pid} realiza {time} unidad(es) de trabajo (total={proc.work_done}).")
+    if tracer is not None:
+        tracer.emit("COMPUTE", state.tick, pid, None, time)
 
 
 # ───────────────────────────────────────────────
@@ -133,7 +202,7 @@ def show_summary(state: SystemState):
         print(f"  {rid}: disponibles={res.available_instances}/{res.total_instances}")
 
     print("\nProcesos abortados:")
-    if hasattr(state, "aborted_processes") and state.aborted_processes:
+    if state.aborted_processes:
         for p in state.aborted_processes:
             print(f"  ⚰ {p}")
     else:
@@ -145,4 +214,9 @@ def show_summary(state: SystemState):
     else:
         print("  Ninguno")
 
+    if state.detection_policy is not None:
+        print()
+        for line in state.detection_policy.summary(state.tick):
+            print(line)
+
     print("===============================")
@@ -0,0 +1,56 @@
+"""
+Pruebas del tiempo bloqueado de EntityHistory (ejecutar con pytest).
+"""
+import contextlib
+import io
+
+from history import EntityHistory
+from models import Event, Process, ResourceType, SystemState
+from sim import step
+
+
+def _run(events):
+    state = SystemState(mode="deteccion", victim_policy="menor_trabajo_hecho")
+    for pid in ("P1", "P2"):
+        state.processes[pid] = Process(pid)
+    for rid in ("R1", "R2"):
+        state.resources[rid] = ResourceType(rid, 1, 1)
+    history = EntityHistory()
+    # El motor imprime cada decisión
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i, (kind, pid, rid, amount) in enumerate(events):
+            step(state, Event(kind, pid, rid, amount), i, history)
+    return state, history
+
+
+def test_bloqueo_termina_con_asignacion():
+    state, history = _run([
+        ("REQUEST", "P1", "R1", 1),
+        ("REQUEST", "P2", "R1", 1),  # tick 2: P2 se bloquea
+        ("RELEASE", "P1", "R1", 1),
+        ("REQUEST", "P2", "R1", 1),  # tick 4: P2 obtiene R1
+        ("COMPUTE", "P1", None, 1),
+    ])
+    assert history.blocked_ticks("P2", state.tick) == 2
+    assert state.waiting_processes() == set()
+
+
+def test_aborto_cierra_el_tiempo_bloqueado():
+    state, history = _run([
+        ("COMPUTE", "P2", None, 5),  # P1 (menos trabajo) será la víctima
+        ("REQUEST", "P1", "R1", 1),
+        ("REQUEST", "P2", "R2", 1),
+        ("REQUEST", "P1", "R2", 1),  # tick 4: P1 espera a P2
+        ("COMPUTE", "P2", None, 1),
+        ("REQUEST", "P2", "R1", 1),  # tick 6: ciclo, se aborta P1
+        ("COMPUTE", "P2", None, 1),
+        ("COMPUTE", "P2", None, 1),
+    ])
+    assert state.aborted_processes == {"P1"}
+    # El motor deja a la víctima en blocked_processes, pero ya no espera
+    assert "P1" in state.blocked_processes
+    assert state.waiting_processes() == {"P2"}
+    # El contador de P1 se detuvo en el aborto; el de P2 sigue
+    assert history.blocked_ticks("P1", state.tick) == 2
+    assert history.blocked_ticks("P1", state.tick + 100) == 2
+    assert history.blocked_ticks("P2", state.tick) == 2
@@ -0,0 +1,218 @@
+"""
+Grabación de una corrida para recorrerla tick por tick, independiente de Qt.
+
+RunTimeline recibe las decisiones del motor con la interfaz de tracer
+(emit(kind, tick, pid, rid, amount, detail), ver tracelog.py) y guarda
+cada registro en arreglos compactos:
+
+    kind, pid, rid, amount   un registro por decisión (ids internados)
+    fin de cada tick         posición del primer registro del tick siguiente
+
+Cada KEYFRAME_INTERVAL ticks guarda además una copia del estado
+(keyframe). Para ver el tick t se parte del keyframe anterior (o del
+tick que se mostró último, si está entre ese keyframe y t) y se
+reaplican los registros hasta t: nunca se vuelve a ejecutar el motor y
+el costo de un salto está acotado por el intervalo, no por el largo de
+la corrida.
+
+Los registros se aplican con las mismas reglas que sim.py y
+deadlock.resolve_deadlock.
+"""
+from array import array
+from typing import Dict, List, Optional
+
+from models import Process, ResourceType, SystemState
+
+
+# Ticks entre dos copias completas del estado
+KEYFRAME_INTERVAL = 1024
+
+KINDS = ("GRANT", "BLOCK", "RELEASE", "DENY", "COMPUTE", "DETECT", "ABORT")
+_CODE = {kind: i for i, kind in enumerate(KINDS)}
+GRANT, BLOCK, RELEASE, DENY, COMPUTE, DETECT, ABORT = range(len(KINDS))
+
+
+class _Keyframe:
+    __slots__ = ("tick", "allocation", "requests", "available", "work_done",
+                 "blocked", "aborted")
+
+    def __init__(self, state: SystemState):
+        self.tick = state.tick
+        self.allocation = dict(state.allocation)
+        self.requests = dict(state.requests)
+        self.available = [r.available_instances for r in state.resources.values()]
+        self.work_done = [p.work_done for p in state.processes.values()]
+        self.blocked = frozenset(state.blocked_processes)
+        self.aborted = frozenset(state.aborted_processes)
+
+    def restore(self, state: SystemState) -> None:
+        state.tick = self.tick
+        state.allocation = dict(self.allocation)
+        state.requests = dict(self.requests)
+        for resource, available in zip(state.resources.values(), self.available):
+            resource.available_instances = available
+        for process, work in zip(state.processes.values(), self.work_done):
+            process.work_done = work
+        state.blocked_processes = set(self.blocked)
+        state.aborted_processes = set(self.aborted)
+
+
+def _copy_state(state: SystemState) -> SystemState:
+    # Copia propia (Process y ResourceType incluidos): se modifica al reaplicar
+    return SystemState(
+        mode=state.mode,
+        victim_policy=state.victim_policy,
+        detection_interval=state.detection_interval,
+        detection_policy=state.detection_policy,
+        processes={pid: Process(p.pid, p.priority, p.work_done) for pid, p in state.processes.items()},
+        resources={rid: ResourceType(r.rid, r.total_instances, r.available_instances)
+                   for rid, r in state.resources.items()},
+        allocation=dict(state.allocation),
+        requests=dict(state.requests),
+        blocked_processes=set(state.blocked_processes),
+        aborted_processes=set(state.aborted_processes),
+        tick=state.tick,
+        event_history=state.event_history,
+        entity_history=state.entity_history,
+    )
+
+
+class RunTimeline:
+    """
+    Historia de una corrida desde `state` (el estado inicial, que no se
+    modifica). `emit()` la extiende; `state_at(tick)` devuelve una copia
+    del estado en ese tick.
+    """
+
+    def __init__(self, state: SystemState, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.first_tick = state.tick
+        self.kinds = array("B")
+        self.pids = array("i")
+        self.rids = array("i")
+        self.amounts = array("q")
+        # _tick_end[i]: registros de los ticks <= first_tick + i
+        self._tick_end = array("I")
+        self._ids: List[Optional[str]] = []
+        self._id_index: Dict[Optional[str], int] = {}
+
+        # Estado al frente de la grabación y cursor para recorrerla
+        self._front = _copy_state(state)
+        self._front_tick = state.tick
+        self._keyframes: List[_Keyframe] = [_Keyframe(self._front)]
+        self._cursor = _copy_state(state)
+        self._cursor_end = 0  # registros ya aplicados al cursor
+
+    @property
+    def last_tick(self) -> int:
+        return self._front_tick
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def _intern(self, value: Optional[str]) -> int:
+        index = self._id_index.get(value)
+        if index is None:
+            index = self._id_index[value] = len(self._ids)
+            self._ids.append(value)
+        return index
+
+    def emit(self, kind: str, tick: int, pid: Optional[str], rid: Optional[str] = None,
+             amount: int = 0, detail: Optional[str] = None) -> None:
+        code = _CODE[kind]
+        if code == DETECT:
+            return  # no cambia el estado
+        if tick != self._front_tick:
+            self._close_ticks(tick)
+        self.kinds.append(code)
+        self.pids.append(self._intern(pid))
+        self.rids.append(self._intern(rid))
+        self.amounts.append(amount)
+        self._apply(self._front, len(self.kinds) - 1, len(self.kinds))
+
+    def _close_ticks(self, tick: int) -> None:
+        # Los ticks anteriores a `tick` quedan completos
+        end = len(self.kinds)
+        front = self._front
+        interval = self.keyframe_interval
+        for closed in range(self._front_tick, tick):
+            self._tick_end.append(end)
+            front.tick = closed
+            if closed > self.first_tick and (closed - self.first_tick) % interval == 0:
+                self._keyframes.append(_Keyframe(front))
+        self._front_tick = front.tick = tick
+
+    def _end_of(self, tick: int) -> int:
+        i = tick - self.first_tick
+        return self._tick_end[i] if i < len(self._tick_end) else len(self.kinds)
+
+    def state_at(self, tick: int) -> SystemState:
+        """
+        Copia del estado al final de `tick`. Después del último registro el
+        estado ya no cambia (hay pasos que no emiten nada), así que se
+        devuelve el del frente con ese tick.
+        """
+        tick = max(self.first_tick, tick)
+        target = min(tick, self._front_tick)
+        cursor = self._cursor
+        index = min((target - self.first_tick) // self.keyframe_interval, len(self._keyframes) - 1)
+        keyframe = self._keyframes[index]
+        if not keyframe.tick <= cursor.tick <= target:
+            keyframe.restore(cursor)
+            self._cursor_end = self._end_of(keyframe.tick)
+        end = self._end_of(target)
+        self._apply(cursor, self._cursor_end, end)
+        self._cursor_end = end
+        cursor.tick = target
+        result = _copy_state(cursor)
+        result.tick = tick
+        return result
+
+    def _apply(self, state: SystemState, start: int, stop: int) -> None:
+        """Reaplica los registros [start, stop) sobre `state`."""
+        ids = self._ids
+        kinds, pids, rids, amounts = self.kinds, self.pids, self.rids, self.amounts
+        allocation = state.allocation
+        requests = state.requests
+        resources = state.resources
+        blocked = state.blocked_processes
+        for i in range(start, stop):
+            code = kinds[i]
+            pid = ids[pids[i]]
+            rid = ids[rids[i]]
+            amount = amounts[i]
+            key = (pid, rid)
+            if code == GRANT:
+                resources[rid].available_instances -= amount
+                units = allocation.get(key, 0) + amount
+                if units > 0:
+                    allocation[key] = units
+                else:
+                    allocation.pop(key, None)
+                requests.pop(key, None)
+                blocked.discard(pid)
+            elif code == BLOCK:
+                units = requests.get(key, 0) + amount
+                if units > 0:
+                    requests[key] = units
+                else:
+                    requests.pop(key, None)
+                blocked.add(pid)
+            elif code == RELEASE:
+                resources[rid].available_instances += amount
+                units = allocation.get(key, 0) - amount
+                if units > 0:
+                    allocation[key] = units
+                else:
+                    allocation.pop(key, None)
+            elif code == COMPUTE:
+                state.processes[pid].work_done += amount
+            elif code == ABORT:
+                # Un registro por recurso liberado (o uno sin recurso)
+                if rid is not None:
+                    resources[rid].available_instances += amount
+                    allocation.pop(key, None)
+                for other in [k for k in requests if k[0] == pid]:
+                    del requests[other]
+                state.aborted_processes.add(pid)
+            # DENY no cambia el estado
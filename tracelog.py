@@ -0,0 +1,141 @@
+"""
+Traza estructurada de las decisiones del motor (JSONL o CSV).
+
+Cada decisión produce un registro con: kind, tick, pid, rid, amount y
+detail. Tipos de registro:
+
+    GRANT    pid obtiene `amount` instancias de rid
+    BLOCK    pid queda bloqueado pidiendo `amount` de rid
+    RELEASE  pid libera `amount` de rid
+    DENY     pid intentó liberar `amount` de rid sin tenerlas (detail = asignadas)
+    COMPUTE  pid trabaja `amount` unidades
+    DETECT   ciclo detectado (detail = procesos del ciclo separados por espacio)
+    ABORT    víctima pid abortada; un registro por recurso liberado
+
+Los registros se acumulan en un buffer grande y se escriben en bloque,
+con un vaciado periódico por tiempo para que un lector externo vea datos
+recientes. El formato se elige por extensión (.jsonl / .csv) y admite
+compresión (.jsonl.gz, .csv.xz, ...).
+"""
+import json
+import time
+from typing import Dict, List, Optional
+
+from io_utils import open_output
+
+
+KINDS = ("GRANT", "BLOCK", "RELEASE", "DENY", "COMPUTE", "DETECT", "ABORT")
+
+FIELDS = ("kind", "tick", "pid", "rid", "amount", "detail")
+
+# Registros acumulados antes de escribir en el archivo
+DEFAULT_BUFFER_RECORDS = 65536
+
+# Segundos máximos que un registro puede quedar en el buffer
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+
+class TraceWriter:
+    """
+    Escritor de trazas con buffer. Usar como context manager o llamar a
+    close() al final para vaciar lo pendiente.
+    """
+
+    def __init__(self, path: str, fmt: Optional[str] = None,
+                 buffer_records: int = DEFAULT_BUFFER_RECORDS,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.format = fmt or _format_from_path(path)
+        if self.format not in ("jsonl", "csv"):
+            raise ValueError(f"Formato de traza no soportado: {self.format!r} (use jsonl o csv)")
+        self.buffer_records = buffer_records
+        self.flush_interval = flush_interval
+        self.records_written = 0
+
+        self._out = open_output(path)
+        self._pending: List[str] = []
+        self._last_flush = time.monotonic()
+        self._quoted: Dict[Optional[str], str] = {}
+        if self.format == "csv":
+            self._out.write(",".join(FIELDS) + "\n")
+            self._line = self._csv_line
+        else:
+            self._line = self._jsonl_line
+
+    def _quote(self, value: Optional[str]) -> str:
+        # Los ids se repiten muchísimo: se codifican una sola vez
+        q = self._quoted.get(value)
+        if q is None:
+            if self.format == "csv":
+                if value is None:
+                    q = ""
+                elif any(c in value for c in ',"\r\n'):
+                    q = '"' + value.replace('"', '""') + '"'
+                else:
+                    q = value
+            else:
+                q = "null" if value is None else json.dumps(value, ensure_ascii=False)
+            if len(self._quoted) < 1 << 16:
+                self._quoted[value] = q
+        return q
+
+    def _jsonl_line(self, kind, tick, pid, rid, amount, detail) -> str:
+        q = self._quote
+        return (f'{{"kind":"{kind}","tick":{tick},"pid":{q(pid)},"rid":{q(rid)},'
+                f'"amount":{amount},"detail":{q(detail)}}}\n')
+
+    def _csv_line(self, kind, tick, pid, rid, amount, detail) -> str:
+        q = self._quote
+        return f"{kind},{tick},{q(pid)},{q(rid)},{amount},{q(detail)}\n"
+
+    def emit(self, kind: str, tick: int, pid: Optional[str], rid: Optional[str] = None,
+             amount: int = 0, detail: Optional[str] = None) -> None:
+        pending = self._pending
+        pending.append(self._line(kind, tick, pid, rid, amount, detail))
+        # El reloj solo se consulta cada 1024 registros
+        if len(pending) >= self.buffer_records or (
+                not len(pending) & 1023 and time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self) -> None:
+        if self._pending:
+            self._out.write("".join(self._pending))
+            self.records_written += len(self._pending)
+            self._pending.clear()
+        self._out.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self) -> None:
+        if self._out is not None:
+            self.flush()
+            self._out.close()
+            self._out = None
+
+    def __enter__(self) -> "TraceWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class TeeTracer:
+    """Reenvía cada registro a varios tracers (por ejemplo historial y línea de tiempo)."""
+
+    def __init__(self, *tracers):
+        self.tracers = [t for t in tracers if t is not None]
+
+    def emit(self, kind: str, tick: int, pid: Optional[str], rid: Optional[str] = None,
+             amount: int = 0, detail: Optional[str] = None) -> None:
+        for tracer in self.tracers:
+            tracer.emit(kind, tick, pid, rid, amount, detail)
+
+
+def _format_from_path(path: str) -> str:
+    name = str(path).lower()
+    for ext in (".gz", ".bz2", ".xz", ".lzma"):
+        if name.endswith(ext):
+            name = name[: -len(ext)]
+            break
+    if name.endswith(".csv"):
+        return "csv"
+    return "jsonl"